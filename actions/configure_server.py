@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Converge a validator host: drives, CPU governor, swap, sysctls, auto-updates, packages, fail2ban, firewall.
+
+Replaces the strictly sequential configure-server.sh. Each step declares the
+steps it must follow and a postcondition probed with the same code the
+sentinel checks use, so on an already configured host every step is skipped.
+Timings go to ~/logs/configure-server.jsonl.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checks import config, deadline, firewall, health, probe, remediate, security, topology
+from checks.result import Status
+from orchestrator import MAX_WORKERS, run_dag, step
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MOUNTPOINTS = ("/mnt/ledger", "/mnt/account")
+LOG_PATH = os.path.join(topology.get_base_path(), "logs", "configure-server.jsonl")
+
+def run_script(*cmd):
+    """Run another action script from the actions directory; raise with its stderr tail on failure."""
+    proc = subprocess.run(list(cmd), cwd=ACTIONS_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-3:]
+        raise RuntimeError(f"{os.path.basename(cmd[-1])} exited {proc.returncode}: " + " | ".join(tail))
+
+def passes(check, *args, **kwargs):
+    """Postcondition helper: the sentinel check returns PASS, within that check's own deadline."""
+    def done():
+        deadline.set_check_deadline(time.monotonic() + deadline.check_timeout(check))
+        try:
+            return check(*args, **kwargs).status == Status.PASS
+        except deadline.DeadlineExceeded as e:
+            raise RuntimeError(f"{check.__name__} did not finish: {e}")
+        finally:
+            deadline.set_check_deadline(None)
+    return done
+
+def forget_facts(s):
+    """on_verify hook: drop only the probe facts the step just changed; other steps may be probing concurrently."""
+    for key in s["invalidates"]:
+        probe.forget(key)
+
+def apply_fixes(plan):
+    outcome = remediate.apply_plan(plan)
+    if outcome["errors"]:
+        raise RuntimeError("; ".join(outcome["errors"]))
+
+def build_steps():
+    return [
+        step("mount_drives",
+             lambda: run_script(os.path.join(topology.get_base_path(), "bin", "mount-drives.sh")),
+             done=lambda: all(os.path.ismount(path) for path in MOUNTPOINTS)),
+        step("cpu_performance",
+             lambda: apply_fixes(remediate.governor_plan()),
+             done=passes(health.check_cpu_governor)),
+        step("swappiness",
+             lambda: apply_fixes([remediate.sysctl_fix("vm.swappiness")]),
+             done=passes(config.run_sysctl_check, "vm.swappiness", "0"),
+             invalidates=[("sysctl", "vm.swappiness")]),
+        step("swap_off",
+             lambda: run_script(sys.executable, "configure_swap.py"),
+             done=passes(health.check_swap_disabled),
+             after=["swappiness"],
+             invalidates=[("run", ("swapon", "--show")), ("sysctl", "vm.swappiness")]),
+        step("disable_auto_updates",
+             lambda: run_script(sys.executable, "disable_auto_updates.py"),
+             done=passes(security.check_unattended_upgrades_disabled),
+             invalidates=[("run", ("dpkg", "-l")), ("run", ("rpm", "-q", "yum-cron")), ("run", ("rpm", "-q", "dnf-automatic"))]),
+        # apt holds a lock, so package work is serialised behind the auto-updates step.
+        # The postcondition reads the local indexes only; fetching them is the step's job.
+        step("package_updates",
+             lambda: run_script(sys.executable, "install_package_updates.py"),
+             done=passes(health.check_package_updates, refresh=False),
+             after=["disable_auto_updates"]),
+        step("fail2ban",
+             lambda: run_script(sys.executable, "configure_fail2ban.py"),
+             done=passes(security.check_fail2ban),
+             after=["package_updates"],
+             invalidates=[("run", ("systemctl", "list-unit-files")),
+                          ("run", ("systemctl", "is-enabled", "fail2ban")),
+                          ("run", ("systemctl", "is-active", "fail2ban"))]),
+        step("firewall",
+             lambda: run_script("bash", "configure-firewall.sh"),
+             done=passes(firewall.check_firewall_rules),
+             invalidates=[("which", "nft"), ("which", "iptables-save")]),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Configure a validator host, skipping steps that are already in place.")
+    parser.add_argument("--dry-run", action="store_true", help="Only probe; report which steps would run")
+    parser.add_argument("--jobs", type=int, default=MAX_WORKERS, help=f"Steps to run in parallel (default: {MAX_WORKERS})")
+    parser.add_argument("--log", default=LOG_PATH, help=f"JSON-lines log of step outcomes and timings (default: {LOG_PATH})")
+    args = parser.parse_args()
+    if os.geteuid() != 0 and not args.dry_run:
+        print("configure_server.py must be run with sudo or as root")
+        sys.exit(1)
+
+    probe.begin_run()
+    steps = build_steps()
+    # Facts cached while probing would hide the effect of a step that just ran
+    records = run_dag(steps, args.log, max_workers=args.jobs, dry_run=args.dry_run, on_verify=forget_facts)
+    for name in (s["name"] for s in steps):
+        record = records[name]
+        line = f"{record['status']:>8}  {name} ({record['duration_ms']:.0f} ms)"
+        if record.get("error"):
+            line += f": {record['error']}"
+        print(line)
+    print(f"Log: {args.log}")
+    sys.exit(1 if any(r["status"] in ("failed", "blocked") for r in records.values()) else 0)
+
+if __name__ == "__main__":
+    main()
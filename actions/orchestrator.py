@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Run setup steps as a dependency graph.
+
+A step is a dict built by step(): a name, a run() callable, an optional done()
+postcondition, the names of the steps it must wait for and the cached probe
+facts its run() can change. Steps whose dependencies are satisfied run
+concurrently. A step whose done() already holds is skipped, and after run() its
+done() must hold or the step fails. Steps that depend on a failed step are
+blocked. Every outcome is appended to one JSON-lines log with its timing.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+MAX_WORKERS = 4
+
+def step(name, run, done=None, after=(), invalidates=()):
+    return {"name": name, "run": run, "done": done, "after": tuple(after), "invalidates": tuple(invalidates)}
+
+def check_graph(steps):
+    """Raise ValueError on duplicate names, unknown dependencies or cycles."""
+    by_name = {}
+    for s in steps:
+        if s["name"] in by_name:
+            raise ValueError(f"duplicate step {s['name']}")
+        by_name[s["name"]] = s
+    for s in steps:
+        for dep in s["after"]:
+            if dep not in by_name:
+                raise ValueError(f"step {s['name']} depends on unknown step {dep}")
+    state = {}
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError("dependency cycle: " + " -> ".join(path + [name]))
+        state[name] = "visiting"
+        for dep in by_name[name]["after"]:
+            visit(dep, path + [name])
+        state[name] = "done"
+    for name in by_name:
+        visit(name, [])
+
+class JsonLog:
+    """Thread-safe JSON-lines writer; one object per line with a UTC timestamp."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, **record):
+        record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), **record}
+        with self.lock, open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def execute(s, dry_run=False, on_verify=None):
+    """Run one step and return its record (status: skipped, ok, pending or failed)."""
+    started = time.perf_counter()
+    record = {"step": s["name"]}
+    try:
+        if s["done"] is not None and s["done"]():
+            record["status"] = "skipped"
+        elif dry_run:
+            record["status"] = "pending"
+        else:
+            s["run"]()
+            if on_verify is not None:
+                on_verify(s)
+            if s["done"] is None or s["done"]():
+                record["status"] = "ok"
+            else:
+                record["status"] = "failed"
+                record["error"] = "postcondition still not met after running"
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e) or type(e).__name__
+    record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+def run_dag(steps, log_path, max_workers=MAX_WORKERS, dry_run=False, on_verify=None):
+    """Run the steps in dependency order, independent ones in parallel. Returns {name: record}.
+
+    on_verify(step) is called after a step's run() and before its postcondition
+    is re-checked (e.g. to drop the cached probe facts listed in its
+    invalidates). Other steps may be probing at the same time, so it must only
+    touch what that step changed. With dry_run, steps are only probed; a step
+    that would run is reported as pending and its dependents run their probes
+    as if it had succeeded.
+    """
+    check_graph(steps)
+    log = JsonLog(log_path)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    log.write(run=run_id, event="start", steps=[s["name"] for s in steps], dry_run=dry_run)
+    started = time.perf_counter()
+    records = {}
+    remaining = {s["name"]: s for s in steps}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while remaining or running:
+            for name, s in list(remaining.items()):
+                deps = [records.get(dep, {}).get("status") for dep in s["after"]]
+                if any(status in ("failed", "blocked") for status in deps):
+                    blocked = [dep for dep in s["after"] if records[dep]["status"] in ("failed", "blocked")]
+                    records[name] = {"step": name, "status": "blocked", "error": "waiting on " + ", ".join(blocked), "duration_ms": 0}
+                    log.write(run=run_id, event="step", **records[name])
+                    del remaining[name]
+                elif all(status in ("ok", "skipped", "pending") for status in deps):
+                    running[pool.submit(execute, s, dry_run, on_verify)] = name
+                    del remaining[name]
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                records[name] = future.result()
+                log.write(run=run_id, event="step", **records[name])
+    counts = {}
+    for record in records.values():
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    log.write(run=run_id, event="end", duration_ms=round((time.perf_counter() - started) * 1000, 3), **counts)
+    return records
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Build a Firedancer ref next to the running validator, then swap it in during a leader-schedule gap.
+
+Unlike update-firedancer.sh + make-firedancer.sh, which check out and build in
+~/code/firedancer itself, the new ref is built in its own git worktree under
+~/code/firedancer-worktrees while the validator keeps running. The build runs
+on the housekeeping CPUs at the lowest priority, through ccache with a cache
+that persists across releases. The new fdctl and solana are renamed over the
+live ones in one step each; the running process keeps its old inode. The
+restart (stop, configure-firedancer.sh, start-firedancer.sh) waits for a gap
+in our leader schedule, so downtime is only the restart itself. Phase timings
+go to ~/logs/firedancer-stage.jsonl.
+
+Usage: python3 stage_firedancer.py <git-ref> [--no-restart] [--skip-deps]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checks import isolation, schedule, topology
+from orchestrator import JsonLog
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_PATH = topology.get_base_path()
+REPO_DIR = os.path.join(BASE_PATH, "code", "firedancer")
+WORKTREE_ROOT = os.path.join(BASE_PATH, "code", "firedancer-worktrees")
+BIN_SUBDIR = os.path.join("build", "native", "gcc", "bin")
+BINARIES = ("fdctl", "solana")
+CCACHE_DIR = os.path.join(BASE_PATH, ".cache", "ccache")
+CCACHE_WRAPPER_DIRS = ("/usr/lib/ccache", "/usr/lib64/ccache")
+LOG_PATH = os.path.join(BASE_PATH, "logs", "firedancer-stage.jsonl")
+BUILD_LOG = os.path.join(BASE_PATH, "logs", "firedancer-stage-build.log")
+SERVICE = "frankendancer.service"
+RESTART_GAP_SLOTS = 1500      # ~10 min: room for stop, configure, start and catch-up before we lead
+MAX_RESTART_WAIT = 3600       # seconds to wait for such a gap before giving up
+
+class Phases:
+    """Times named phases and logs each one as a JSON line."""
+
+    def __init__(self, log, ref):
+        self.log = log
+        self.ref = ref
+        self.timings = {}
+
+    def run(self, name, func, *args):
+        print(f"==> {name}")
+        started = time.perf_counter()
+        try:
+            value = func(*args)
+        except Exception as e:
+            self.timings[name] = round(time.perf_counter() - started, 3)
+            self.log.write(ref=self.ref, phase=name, status="failed", seconds=self.timings[name], error=str(e))
+            raise
+        self.timings[name] = round(time.perf_counter() - started, 3)
+        self.log.write(ref=self.ref, phase=name, status="ok", seconds=self.timings[name])
+        return value
+
+def sh(cmd, cwd=None, env=None, log_file=None, preexec_fn=None):
+    """Run a command, streaming output to log_file (or the terminal). Raises on a non-zero exit."""
+    out = open(log_file, "a") if log_file else None
+    try:
+        proc = subprocess.run(cmd, cwd=cwd, env=env, stdout=out, stderr=subprocess.STDOUT if out else None, preexec_fn=preexec_fn)
+    finally:
+        if out:
+            out.close()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} exited {proc.returncode}")
+
+def worktree_path(ref):
+    return os.path.join(WORKTREE_ROOT, ref.replace("/", "_"))
+
+def prepare_worktree(ref):
+    """Fetch and check out ref in its own worktree (reused if it exists, keeping earlier build output)."""
+    sh(["git", "-C", REPO_DIR, "fetch", "--tags", "origin"], log_file=BUILD_LOG)
+    sh(["git", "-C", REPO_DIR, "rev-parse", "-q", "--verify", f"{ref}^{{commit}}"], log_file=BUILD_LOG)
+    path = worktree_path(ref)
+    if os.path.isdir(path):
+        sh(["git", "-C", path, "checkout", "--detach", ref], log_file=BUILD_LOG)
+    else:
+        os.makedirs(WORKTREE_ROOT, exist_ok=True)
+        sh(["git", "-C", REPO_DIR, "worktree", "add", "--detach", path, ref], log_file=BUILD_LOG)
+    sh(["git", "-C", path, "submodule", "update", "--init", "--recursive"], log_file=BUILD_LOG)
+    return path
+
+def build_environment(worktree):
+    """Environment for deps.sh and make: ccache in front of the compilers with a persistent cache."""
+    env = dict(os.environ)
+    wrappers = next((d for d in CCACHE_WRAPPER_DIRS if os.path.isdir(d)), None)
+    if wrappers:
+        env["PATH"] = wrappers + os.pathsep + env.get("PATH", "")
+        env["CCACHE_DIR"] = CCACHE_DIR
+        # Paths inside the worktree are hashed relative to it, so every release's worktree shares hits.
+        env["CCACHE_BASEDIR"] = worktree
+    else:
+        print("ccache not found; building without a compiler cache")
+    return env
+
+def housekeeping_preexec(cpus):
+    """preexec_fn confining a build child to the housekeeping CPUs at the lowest CPU and IO priority."""
+    def confine():
+        os.sched_setaffinity(0, cpus)
+        os.nice(isolation.LOWEST_PRIORITY_NICE)
+        isolation.set_idle_io_priority()
+    return confine
+
+def build(worktree, jobs=None):
+    cpus = isolation.get_housekeeping_cpus()
+    env = build_environment(worktree)
+    sh(["make", f"-j{jobs or len(cpus)}", *BINARIES], cwd=worktree, env=env, log_file=BUILD_LOG, preexec_fn=housekeeping_preexec(cpus))
+    version = subprocess.run([os.path.join(worktree, BIN_SUBDIR, "fdctl"), "version"], capture_output=True, text=True)
+    return version.stdout.strip()
+
+def install_binaries(worktree):
+    """Rename the new binaries over the live ones; the previous ones are kept as <name>.prev for rollback."""
+    live_dir = os.path.join(REPO_DIR, BIN_SUBDIR)
+    os.makedirs(live_dir, exist_ok=True)
+    for name in BINARIES:
+        live = os.path.join(live_dir, name)
+        staged = os.path.join(live_dir, f".{name}.new")
+        shutil.copy2(os.path.join(worktree, BIN_SUBDIR, name), staged)
+        if os.path.exists(live):
+            prev = live + ".prev"
+            if os.path.exists(prev):
+                os.unlink(prev)
+            os.link(live, prev)
+        os.replace(staged, live)
+
+def wait_for_gap(max_wait):
+    """Wait for a restart-sized gap; an unreadable leader schedule is retried, never taken as a gap."""
+    if not schedule.wait_for_safe_gap(max_wait=max_wait, min_gap=RESTART_GAP_SLOTS, require_schedule=True):
+        raise RuntimeError(f"no confirmed gap of {RESTART_GAP_SLOTS} slots before our next leader slot within {max_wait}s "
+                           "(leader schedule busy, unreachable or too full); binaries were not swapped")
+
+def restart():
+    sh(["sudo", "systemctl", "stop", SERVICE])
+    sh(["bash", os.path.join(ACTIONS_DIR, "configure-firedancer.sh")])
+    sh(["bash", os.path.join(ACTIONS_DIR, "start-firedancer.sh")])
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage a Firedancer ref in a worktree and swap it in during a leader-schedule gap.")
+    parser.add_argument("ref", help="Git ref to build (normally a release tag)")
+    parser.add_argument("--skip-deps", action="store_true", help="Do not run deps.sh in the worktree")
+    parser.add_argument("--jobs", type=int, help="make -j value (default: number of housekeeping CPUs)")
+    parser.add_argument("--no-restart", action="store_true", help="Stop after the build; do not install or restart")
+    parser.add_argument("--max-wait", type=int, default=MAX_RESTART_WAIT, help=f"Seconds to wait for a leader-schedule gap (default: {MAX_RESTART_WAIT})")
+    args = parser.parse_args()
+
+    # Like update-firedancer.sh: build as the validator user so nothing under ~/code is root-owned.
+    if os.geteuid() == 0:
+        user = os.environ.get("SUDO_USER")
+        if not user or user == "root":
+            print("❌ ERROR: Do not run as a root login. Run as the validator user or use sudo from that user.")
+            sys.exit(1)
+        os.execvp("sudo", ["sudo", "-u", user, "-H", sys.executable, os.path.abspath(__file__), *sys.argv[1:]])
+
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    phases = Phases(JsonLog(LOG_PATH), args.ref)
+    try:
+        worktree = phases.run("worktree", prepare_worktree, args.ref)
+        if not args.skip_deps:
+            # Attached to the terminal so deps.sh can prompt for approval
+            phases.run("deps", sh, ["./deps.sh"], worktree, build_environment(worktree))
+        version = phases.run("build", build, worktree, args.jobs)
+        print(f"Built {version or args.ref} in {worktree}")
+        if args.no_restart:
+            return
+        phases.run("wait_for_gap", wait_for_gap, args.max_wait)
+        phases.run("install", install_binaries, worktree)
+        phases.run("restart", restart)
+    except Exception as e:
+        print(f"❌ ERROR: {e} (build output: {BUILD_LOG})")
+        sys.exit(1)
+    finally:
+        phases.log.write(ref=args.ref, phase="total", seconds=round(sum(phases.timings.values()), 3), phases=phases.timings)
+        print("Phase timings: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in phases.timings.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# checks/anomaly.py
+
+import math
+import os
+import socket
+import time
+from array import array
+
+from checks import nvme, storage, topology
+from checks.report import iter_unpack, packb
+from checks.result import Status, check, new_result
+
+ANOMALY_STATE_PATH = os.path.join("output", "anomaly_state.msgpack")
+ALPHA = 0.1                 # EWMA weight of a new sample (~10-sample memory)
+SEASON_ALPHA = 0.3          # EWMA weight of one day's hourly mean in its hour-of-day bucket
+MEDIAN_STEP = 0.05          # streaming median step, in units of the current MAD
+MIN_SAMPLES = 30            # samples before a metric is judged at all
+MIN_SEASON_DAYS = 5         # days folded into an hour bucket before it replaces the EWMA baseline
+Z_THRESHOLD = 4.0
+MIN_REL_STD = 0.01          # deviations under 1% of the baseline are never anomalous
+MAD_SCALE = 1.4826          # MAD -> standard deviation for normal data
+
+# Smallest deviation worth judging, in the metric's own unit, by metric name suffix (first match wins).
+# Metrics whose baseline is 0 (steal, drops, throttling) would otherwise turn any nonzero reading into an anomaly.
+ABSOLUTE_FLOORS = (
+    ("_pct", 1.0),
+    ("_percent_full", 1.0),
+    ("_percent_used", 1.0),
+    ("_fill_per_hour", 0.5),
+    ("_ms", 1.0),
+    ("_per_s", 1.0),
+    ("_per_min", 1.0),
+    ("_ghz", 0.05),
+    ("_temperature_c", 3.0),
+    ("_rss_mb", 256.0),
+    ("_new_drops", 10.0),
+    ("_rx_queue", 65536.0),
+    ("_media_errors", 1.0),
+    ("banned", 1.0),
+    ("slot_lag", 10.0),
+    ("skip_rate", 0.02),
+)
+DEFAULT_ABSOLUTE_FLOOR = 1.0
+
+# Per-metric state is one flat array('d') slot of SLOT doubles:
+COUNT, MEAN, VAR, MEDIAN, MAD, LAST_VALUE, LAST_TIME = range(7)
+HOUR_MEAN = 7
+HOUR_VAR = HOUR_MEAN + 24
+HOUR_COUNT = HOUR_VAR + 24
+# Samples of the hour in progress; their mean is folded into its hour bucket once the hour is over
+PENDING_SUM, PENDING_COUNT, PENDING_HOUR = HOUR_COUNT + 24, HOUR_COUNT + 25, HOUR_COUNT + 26
+SLOT = HOUR_COUNT + 27
+
+# metric key -> slot offset in _data; loaded lazily from ANOMALY_STATE_PATH
+_index = None
+_data = array("d")
+# raw kernel counters from the previous sample: name -> [value, time]
+_counters = {}
+
+def load_state(path=ANOMALY_STATE_PATH):
+    global _index, _data, _counters
+    _index, _data, _counters = {}, array("d"), {}
+    try:
+        with open(path, "rb") as f:
+            state = next(iter_unpack(f.read()))
+    except Exception:  # missing or unreadable state: start building baselines afresh
+        return
+    if state.get("slot") != SLOT:
+        return
+    _data.frombytes(state["data"])
+    _index = {key: i * SLOT for i, key in enumerate(state["keys"])}
+    _counters = state.get("counters", {})
+
+def save_state(path=ANOMALY_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    keys = sorted(_index, key=_index.get)
+    state = {"host": socket.gethostname(), "slot": SLOT, "keys": keys, "data": _data.tobytes(), "counters": _counters}
+    with open(path + ".tmp", "wb") as f:
+        f.write(packb(state))
+    os.replace(path + ".tmp", path)
+
+def slot_for(key):
+    base = _index.get(key)
+    if base is None:
+        base = len(_data)
+        _data.extend([0.0] * SLOT)
+        _index[key] = base
+    return base
+
+def absolute_floor(key):
+    metric = key.rsplit("/", 1)[-1]
+    return next((floor for suffix, floor in ABSOLUTE_FLOORS if metric.endswith(suffix)), DEFAULT_ABSOLUTE_FLOOR)
+
+def score(base, value, hour, abs_floor=DEFAULT_ABSOLUTE_FLOOR):
+    """Return (z, baseline) of value against the slot's history, or None while the metric is warming up.
+
+    The baseline is the hour-of-day mean once that bucket has seen
+    MIN_SEASON_DAYS days, otherwise the overall EWMA; the spread is the larger
+    of the two variances, so day-to-day variation of the hourly mean alone
+    cannot make the test tighter. Deviations below abs_floor (or 1% of the
+    baseline) never count. A value only counts as anomalous when it is also far
+    from the streaming median in MAD units, so a single earlier outlier cannot
+    inflate or deflate the verdict.
+    """
+    d = _data
+    if d[base + COUNT] < MIN_SAMPLES:
+        return None
+    mean, var = d[base + MEAN], d[base + VAR]
+    if d[base + HOUR_COUNT + hour] >= MIN_SEASON_DAYS:
+        mean, var = d[base + HOUR_MEAN + hour], max(var, d[base + HOUR_VAR + hour])
+    floor = max(MIN_REL_STD * abs(mean), abs_floor)
+    z = (value - mean) / max(math.sqrt(var), floor)
+    robust = (value - d[base + MEDIAN]) / max(MAD_SCALE * d[base + MAD], floor)
+    return (z if abs(robust) >= Z_THRESHOLD else 0.0), mean
+
+def fold_hour(base):
+    """Fold the finished hour's mean into its hour-of-day bucket (EWMA across days) and reset the accumulator."""
+    d = _data
+    hour = int(d[base + PENDING_HOUR]) % 24
+    value = d[base + PENDING_SUM] / d[base + PENDING_COUNT]
+    if d[base + HOUR_COUNT + hour] == 0:
+        d[base + HOUR_MEAN + hour] = value
+    diff = value - d[base + HOUR_MEAN + hour]
+    incr = SEASON_ALPHA * diff
+    d[base + HOUR_MEAN + hour] += incr
+    d[base + HOUR_VAR + hour] = (1 - SEASON_ALPHA) * (d[base + HOUR_VAR + hour] + diff * incr)
+    d[base + HOUR_COUNT + hour] += 1
+    d[base + PENDING_SUM] = d[base + PENDING_COUNT] = 0.0
+
+def update(base, value, now):
+    """Fold one sample into the slot in O(1): EWMA mean/variance, streaming median/MAD and the hour buckets.
+
+    Samples are averaged per clock hour; the average is folded into its
+    hour-of-day bucket once the hour is over, so each bucket gets one update a
+    day and tracks that hour across days rather than the last few minutes.
+    """
+    d = _data
+    if d[base + COUNT] == 0:
+        d[base + MEAN] = d[base + MEDIAN] = value
+    diff = value - d[base + MEAN]
+    incr = ALPHA * diff
+    d[base + MEAN] += incr
+    d[base + VAR] = (1 - ALPHA) * (d[base + VAR] + diff * incr)
+    step = MEDIAN_STEP * (d[base + MAD] or abs(value) * MIN_REL_STD or 1e-9)
+    d[base + MEDIAN] += step if value > d[base + MEDIAN] else -step if value < d[base + MEDIAN] else 0.0
+    d[base + MAD] += ALPHA * (abs(value - d[base + MEDIAN]) - d[base + MAD])
+    current_hour = now // 3600
+    if d[base + PENDING_COUNT] and d[base + PENDING_HOUR] != current_hour:
+        fold_hour(base)
+    d[base + PENDING_SUM] += value
+    d[base + PENDING_COUNT] += 1
+    d[base + PENDING_HOUR] = current_hour
+    d[base + COUNT] += 1
+    d[base + LAST_VALUE] = value
+    d[base + LAST_TIME] = now
+
+def counter_rate(name, value, now):
+    """Per-second rate of a monotonically increasing kernel counter since the previous sample (None on the first)."""
+    previous = _counters.get(name)
+    _counters[name] = [value, now]
+    if previous is None or now <= previous[1] or value < previous[0]:
+        return None
+    return (value - previous[0]) / (now - previous[1])
+
+def sample_system_metrics(now):
+    """Metrics no check reports itself: CPU steal, disk await of the ledger drives and validator RSS."""
+    metrics = {}
+    line = topology.read_sysfs("/proc/stat", "").split("\n", 1)[0].split()
+    if len(line) > 8:
+        ticks = [int(v) for v in line[1:9]]
+        total_rate = counter_rate("cpu_total", sum(ticks), now)
+        steal_rate = counter_rate("cpu_steal", ticks[7], now)
+        if total_rate and steal_rate is not None:
+            metrics["steal_pct"] = round(100 * steal_rate / total_rate, 3)
+
+    disks = set()
+    for root in storage.get_scan_roots():
+        try:
+            disks |= nvme.get_block_devices(root)
+        except OSError:
+            continue
+    for disk in sorted(disks):
+        fields = topology.read_sysfs(f"/sys/block/{disk}/stat", "").split()
+        if len(fields) < 8:
+            continue
+        ios = int(fields[0]) + int(fields[4])
+        ticks_ms = int(fields[3]) + int(fields[7])
+        io_rate = counter_rate(f"{disk}_ios", ios, now)
+        tick_rate = counter_rate(f"{disk}_ticks", ticks_ms, now)
+        if io_rate and tick_rate is not None:
+            metrics[f"{disk}_await_ms"] = round(tick_rate / io_rate, 3)
+
+    pid = topology.find_validator_pid()
+    if pid:
+        for line in topology.read_sysfs(f"/proc/{pid}/status", "").splitlines():
+            if line.startswith("VmRSS:"):
+                metrics["validator_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                break
+    return metrics
+
+@check("Metric Anomaly Check", "Health")
+def check_metric_anomalies(results):
+    """Compare every numeric metric of this run with its own rolling baseline.
+
+    WARNING when a metric is more than Z_THRESHOLD deviations from both its
+    (hour-of-day) EWMA baseline and its streaming median, even if the check
+    that reported it passed its absolute threshold.
+    """
+    result = new_result(check_metric_anomalies)
+    if _index is None:
+        load_state()
+    now = time.time()
+    hour = time.gmtime(now).tm_hour
+    result.metrics = sample_system_metrics(now)
+
+    samples = {f"{r.name}/{metric}": value for r in results for metric, value in r.metrics.items()}
+    samples.update({f"{result.name}/{metric}": value for metric, value in result.metrics.items()})
+    for key, value in list(samples.items()):
+        if key.endswith("_percent_full"):
+            # Fill rate in percentage points per hour, from the previous sample of the same metric
+            base = _index.get(key)
+            if base is not None and _data[base + COUNT] and now > _data[base + LAST_TIME]:
+                samples[key[:-len("_percent_full")] + "_fill_per_hour"] = (value - _data[base + LAST_VALUE]) * 3600 / (now - _data[base + LAST_TIME])
+
+    anomalies = []
+    warming = 0
+    for key, value in samples.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+            continue
+        base = slot_for(key)
+        verdict = score(base, value, hour, absolute_floor(key))
+        if verdict is None:
+            warming += 1
+        elif abs(verdict[0]) >= Z_THRESHOLD:
+            direction = "above" if verdict[0] > 0 else "below"
+            anomalies.append({"metric": key, "value": value, "baseline": round(verdict[1], 3), "z": round(verdict[0], 1)})
+            result.message += f"{key} = {value:g} is {abs(verdict[0]):.1f}σ {direction} its baseline {verdict[1]:.3g}; "
+        update(base, value, now)
+
+    try:
+        save_state()
+    except OSError:
+        pass
+    result.details["anomalies"] = anomalies
+    tracked = len(samples)
+    if anomalies:
+        result.status = Status.WARNING
+        result.message = result.message.rstrip("; ") + "."
+    else:
+        result.message = f"{tracked} metric(s) within their baselines"
+        result.message += f" ({warming} still building a baseline of {MIN_SAMPLES} samples)." if warming else "."
+    return result
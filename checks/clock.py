@@ -0,0 +1,214 @@
+# checks/clock.py
+
+import ctypes
+import json
+import os
+import random
+import socket
+import statistics
+import struct
+import time
+
+from checks.result import Status, check, new_result
+
+CLOCK_HISTORY_PATH = os.path.join("output", "clock_history.json")
+CLOCK_HISTORY_LEN = 60        # samples kept for jitter
+WARN_OFFSET_MS = 10.0
+FAIL_OFFSET_MS = 50.0         # beyond this vote timestamps start to drift noticeably
+SOCKET_TIMEOUT = 0.5
+
+TIME_ERROR = 5
+STA_UNSYNC = 0x0040
+STA_NANO = 0x2000
+
+CHRONY_ADDR = ("127.0.0.1", 323)
+CHRONY_PROTO_VERSION = 6
+CHRONY_REQ_TRACKING = 33
+CHRONY_RPY_TRACKING = 5
+CHRONY_REPLY_LEN = 104        # requests must be padded to the reply length
+NTPD_ADDR = ("127.0.0.1", 123)
+
+class Timex(ctypes.Structure):
+    """struct timex from <sys/timex.h>; natural alignment reproduces the kernel layout."""
+    _fields_ = [
+        ("modes", ctypes.c_uint),
+        ("offset", ctypes.c_long),
+        ("freq", ctypes.c_long),
+        ("maxerror", ctypes.c_long),
+        ("esterror", ctypes.c_long),
+        ("status", ctypes.c_int),
+        ("constant", ctypes.c_long),
+        ("precision", ctypes.c_long),
+        ("tolerance", ctypes.c_long),
+        ("time_sec", ctypes.c_long),
+        ("time_usec", ctypes.c_long),
+        ("tick", ctypes.c_long),
+        ("ppsfreq", ctypes.c_long),
+        ("jitter", ctypes.c_long),
+        ("shift", ctypes.c_int),
+        ("stabil", ctypes.c_long),
+        ("jitcnt", ctypes.c_long),
+        ("calcnt", ctypes.c_long),
+        ("errcnt", ctypes.c_long),
+        ("stbcnt", ctypes.c_long),
+        ("tai", ctypes.c_int),
+        ("_reserved", ctypes.c_int * 11),
+    ]
+
+def read_adjtimex():
+    """Read the kernel clock discipline state without changing it (modes=0)."""
+    libc = ctypes.CDLL(None, use_errno=True)
+    tx = Timex()
+    state = libc.adjtimex(ctypes.byref(tx))
+    if state < 0:
+        raise OSError(ctypes.get_errno(), "adjtimex failed")
+    offset_unit = 1e-9 if tx.status & STA_NANO else 1e-6
+    return {
+        "state": state,
+        "synced": state != TIME_ERROR and not tx.status & STA_UNSYNC,
+        "offset_ms": tx.offset * offset_unit * 1000,
+        "freq_ppm": tx.freq / 65536,
+        "maxerror_ms": tx.maxerror / 1000,
+        "esterror_ms": tx.esterror / 1000,
+    }
+
+def chrony_float(value):
+    """Decode chrony's 32-bit network float (7-bit exponent, 25-bit coefficient)."""
+    exp = value >> 25
+    if exp >= 1 << 6:
+        exp -= 1 << 7
+    coef = value & ((1 << 25) - 1)
+    if coef >= 1 << 24:
+        coef -= 1 << 25
+    return coef * 2.0 ** (exp - 25)
+
+def query_chrony():
+    """Ask chronyd for its tracking data over the local command port. Returns a dict or None."""
+    sequence = random.getrandbits(32)
+    request = struct.pack("!BBBBHHIII", CHRONY_PROTO_VERSION, 1, 0, 0, CHRONY_REQ_TRACKING, 0, sequence, 0, 0)
+    request += bytes(CHRONY_REPLY_LEN - len(request))
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(SOCKET_TIMEOUT)
+        try:
+            sock.sendto(request, CHRONY_ADDR)
+            reply = sock.recv(1024)
+        except OSError:
+            return None
+    if len(reply) < CHRONY_REPLY_LEN:
+        return None
+    _, pkt_type, _, _, _, reply_code, status, _, _, _, reply_seq = struct.unpack("!BBBBHHHHHHI", reply[:20])
+    if pkt_type != 2 or reply_code != CHRONY_RPY_TRACKING or status != 0 or reply_seq != sequence:
+        return None
+    stratum, leap = struct.unpack("!HH", reply[52:56])
+    floats = [chrony_float(v) for v in struct.unpack("!9I", reply[68:104])]
+    return {
+        "source": "chronyd",
+        "stratum": stratum,
+        "synced": leap != 3,
+        "offset_ms": floats[0] * 1000,        # current correction (system time vs. NTP time)
+        "last_offset_ms": floats[1] * 1000,
+        "rms_offset_ms": floats[2] * 1000,
+        "freq_ppm": floats[3],
+        "root_delay_ms": floats[6] * 1000,
+        "root_dispersion_ms": floats[7] * 1000,
+    }
+
+def query_ntpd():
+    """Read ntpd's system variables with a mode 6 READVAR control query. Returns a dict or None."""
+    sequence = random.getrandbits(16)
+    request = struct.pack("!BBHHHHH", 0x16, 2, sequence, 0, 0, 0, 0)
+    fragments = {}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(SOCKET_TIMEOUT)
+        try:
+            sock.sendto(request, NTPD_ADDR)
+            while True:
+                reply = sock.recv(2048)
+                _, op, seq, _, _, offset, count = struct.unpack("!BBHHHHH", reply[:12])
+                if seq != sequence or not op & 0x80:
+                    continue
+                fragments[offset] = reply[12:12 + count]
+                if not op & 0x20:  # no "more" bit: last fragment
+                    break
+        except OSError:
+            return None
+    text = b"".join(fragments[o] for o in sorted(fragments)).decode(errors="replace")
+    variables = {}
+    for item in text.replace("\r\n", "").split(","):
+        key, _, value = item.strip().partition("=")
+        variables[key] = value.strip('"')
+    try:
+        return {
+            "source": "ntpd",
+            "stratum": int(variables.get("stratum", 16)),
+            "synced": variables.get("leap", "11") != "11",
+            "offset_ms": float(variables["offset"]),
+            "jitter_ms": float(variables.get("sys_jitter", 0)),
+            "freq_ppm": float(variables.get("frequency", 0)),
+        }
+    except (KeyError, ValueError):
+        return None
+
+def load_history():
+    try:
+        with open(CLOCK_HISTORY_PATH, "r") as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+def save_history(history):
+    try:
+        os.makedirs(os.path.dirname(CLOCK_HISTORY_PATH), exist_ok=True)
+        with open(CLOCK_HISTORY_PATH, "w") as f:
+            json.dump(history[-CLOCK_HISTORY_LEN:], f)
+    except Exception:
+        pass
+
+@check("Clock Discipline Check", "Health")
+def check_clock_discipline():
+    """Check clock offset, error and sync status from the kernel and the local NTP daemon.
+
+    The kernel view comes from adjtimex(2) via ctypes. chronyd and ntpd are
+    queried over their local control ports for the offset they measure, which
+    is more meaningful than the kernel PLL offset chrony leaves at zero. When
+    neither answers (e.g. systemd-timesyncd, which has no control port), the
+    kernel's sync flag and offset are judged on their own.
+    Offsets are kept in a short history to report jitter.
+    """
+    result = new_result(check_clock_discipline)
+    try:
+        kernel = read_adjtimex()
+    except (OSError, AttributeError) as e:
+        result.status = Status.WARNING
+        result.message = f"Could not read kernel clock state: {e}"
+        return result
+
+    daemon = query_chrony() or query_ntpd()
+    offset_ms = daemon["offset_ms"] if daemon else kernel["offset_ms"]
+    synced = kernel["synced"] and (daemon["synced"] if daemon else True)
+
+    history = load_history()
+    history.append([round(time.time(), 1), round(offset_ms, 4)])
+    save_history(history)
+    offsets = [o for _, o in history[-CLOCK_HISTORY_LEN:]]
+    jitter_ms = statistics.pstdev(offsets) if len(offsets) > 1 else 0.0
+
+    result.metrics = {"offset_ms": offset_ms, "jitter_ms": jitter_ms, "esterror_ms": kernel["esterror_ms"]}
+    source = f"{daemon['source']} stratum {daemon['stratum']}" if daemon else "kernel only"
+    summary = (
+        f"offset {offset_ms:+.3f}ms, jitter {jitter_ms:.3f}ms over {len(offsets)} sample(s), "
+        f"est. error {kernel['esterror_ms']:.3f}ms, max error {kernel['maxerror_ms']:.1f}ms, "
+        f"freq {kernel['freq_ppm']:+.3f}ppm ({source})"
+    )
+    if not synced:
+        result.status = Status.FAIL
+        result.message = f"Clock is not synchronized: {summary}."
+    elif abs(offset_ms) >= FAIL_OFFSET_MS:
+        result.status = Status.FAIL
+        result.message = f"Clock offset exceeds {FAIL_OFFSET_MS:g}ms: {summary}."
+    elif abs(offset_ms) >= WARN_OFFSET_MS:
+        result.status = Status.WARNING
+        result.message = f"Clock offset exceeds {WARN_OFFSET_MS:g}ms: {summary}."
+    else:
+        result.message = f"Clock synchronized: {summary}."
+    return result
@@ -0,0 +1,101 @@
+# checks/deadline.py
+
+import os
+import signal
+import subprocess
+import threading
+import time
+
+RUN_BUDGET = 300              # seconds for a whole run, checks included
+CHECK_TIMEOUT = 60            # default seconds per check
+# Checks that legitimately take longer (mirror round trips, full ledger walks)
+CHECK_TIMEOUTS = {
+    "check_package_updates": 180,
+    "check_storage_inventory": 120,
+}
+KILL_GRACE = 2                # seconds between SIGTERM and SIGKILL of a child group
+
+class DeadlineExceeded(BaseException):
+    """Raised by run() when the current check's deadline passes while a child is running.
+
+    A BaseException so the checks' broad `except Exception` handlers let it
+    reach run_check, which turns it into a TIMEOUT result.
+    """
+
+_run_deadline = None
+_local = threading.local()
+# thread ident -> Popen objects (each leading its own process group) started by the check running on it
+_children = {}
+_children_lock = threading.Lock()
+
+def start_run(budget=RUN_BUDGET):
+    global _run_deadline
+    _run_deadline = time.monotonic() + budget
+
+def run_remaining():
+    """Seconds left in the run budget (None when no run deadline is set)."""
+    return None if _run_deadline is None else _run_deadline - time.monotonic()
+
+def check_timeout(func):
+    """Seconds the given check may take: its own limit, capped by what is left of the run."""
+    timeout = CHECK_TIMEOUTS.get(func.__name__, CHECK_TIMEOUT)
+    remaining = run_remaining()
+    return timeout if remaining is None else min(timeout, remaining)
+
+def set_check_deadline(deadline):
+    """Set the monotonic deadline that run() enforces for the calling thread."""
+    _local.deadline = deadline
+
+def kill_group(proc):
+    """SIGTERM a child's process group, give it KILL_GRACE seconds, then SIGKILL whatever is left."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        proc.wait(KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        pass
+    # Grandchildren can outlive the leader; the group id stays valid while any member lives.
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def kill_children(thread_ident):
+    """Kill every child process group started by the check running on the given thread."""
+    with _children_lock:
+        procs = _children.pop(thread_ident, set())
+    for proc in procs:
+        kill_group(proc)
+
+def run(cmd, timeout=None, text=True):
+    """subprocess.run(capture_output=True) that respects the current check's deadline.
+
+    The child gets its own process group, so the whole tree (apt-get and its
+    http methods, dpkg and its helpers) is killed when the deadline passes.
+    Raises subprocess.TimeoutExpired for an explicit timeout and
+    DeadlineExceeded when the check deadline is what ran out.
+    """
+    deadline = getattr(_local, "deadline", None)
+    limit = timeout
+    if deadline is not None:
+        left = max(deadline - time.monotonic(), 0)
+        if limit is None or left < limit:
+            limit = left
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=text, start_new_session=True)
+    ident = threading.get_ident()
+    with _children_lock:
+        _children.setdefault(ident, set()).add(proc)
+    try:
+        stdout, stderr = proc.communicate(timeout=limit)
+    except subprocess.TimeoutExpired:
+        kill_group(proc)
+        proc.communicate()
+        if timeout is not None and limit == timeout:
+            raise
+        raise DeadlineExceeded(f"{cmd[0]} killed at the check deadline")
+    finally:
+        with _children_lock:
+            _children.get(ident, set()).discard(proc)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
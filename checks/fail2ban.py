@@ -0,0 +1,208 @@
+# checks/fail2ban.py
+
+import ipaddress
+import json
+import os
+import pickle
+import re
+import socket
+import time
+
+from checks.result import Status, check, new_result
+
+FAIL2BAN_LOG = "/var/log/fail2ban.log"
+FAIL2BAN_SOCKET = "/var/run/fail2ban/fail2ban.sock"
+FAIL2BAN_STATE_PATH = os.path.join("output", "fail2ban_state.json")
+SOCKET_END = b"<F2B_END_COMMAND>"
+SOCKET_TIMEOUT = 1.0
+
+WINDOW_MINUTES = 60
+BOOTSTRAP_BYTES = 1 << 20      # history read from the end of the log on the first run
+SPIKE_MINUTES = 5
+SPIKE_MIN_ATTEMPTS = 300       # failed attempts per minute that always count as a spike
+SPIKE_FACTOR = 5               # ...or this many times the window's average rate
+TOP_SUBNETS = 3
+
+LINE_RE = re.compile(r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\S*\s+fail2ban\.\w+\s+\[\d+\]:\s+\w+\s+\[([^\]]+)\]\s+(Found|Ban|Unban|Restore Ban)\s+(\S+)")
+
+def subnet_of(ip):
+    """Group an address into its /24 (IPv4) or /64 (IPv6)."""
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    prefix = 24 if addr.version == 4 else 64
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+def load_state():
+    try:
+        with open(FAIL2BAN_STATE_PATH, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_state(state):
+    try:
+        os.makedirs(os.path.dirname(FAIL2BAN_STATE_PATH), exist_ok=True)
+        with open(FAIL2BAN_STATE_PATH, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+    except Exception:
+        pass
+
+def read_new_lines(state, log_path=FAIL2BAN_LOG):
+    """Return log lines appended since the saved offset and advance it.
+
+    After a rotation the rest of the old file is read from `<log>.1` if its
+    inode matches the saved one. The first run starts BOOTSTRAP_BYTES before
+    the end instead of parsing the whole history.
+    """
+    st = os.stat(log_path)
+    chunks = []
+    inode, offset = state.get("inode"), state.get("offset")
+    if inode is not None and inode != st.st_ino:
+        rotated = log_path + ".1"
+        try:
+            if os.stat(rotated).st_ino == inode:
+                with open(rotated, "rb") as f:
+                    f.seek(offset)
+                    chunks.append(f.read())
+        except OSError:
+            pass
+        offset = 0
+    elif offset is None:
+        offset = max(0, st.st_size - BOOTSTRAP_BYTES)
+    elif offset > st.st_size:
+        offset = 0  # truncated in place (copytruncate)
+
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    # Keep a trailing partial line for the next cycle.
+    end = data.rfind(b"\n") + 1
+    chunks.append(data[:end])
+    state["inode"], state["offset"] = st.st_ino, offset + end
+    return b"".join(chunks).decode(errors="replace").splitlines()
+
+def apply_lines(state, lines):
+    """Fold new log lines into per-minute buckets and the set of currently banned addresses."""
+    buckets = state.setdefault("buckets", {})
+    banned = state.setdefault("banned", {})
+    for line in lines:
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        stamp, jail, action, ip = m.groups()
+        try:
+            minute = str(int(time.mktime(time.strptime(stamp, "%Y-%m-%d %H:%M:%S")) // 60 * 60))
+        except ValueError:
+            continue
+        bucket = buckets.setdefault(minute, {"jails": {}, "subnets": {}})
+        counts = bucket["jails"].setdefault(jail, [0, 0, 0])  # found, ban, unban
+        jail_bans = banned.setdefault(jail, [])
+        if action == "Found":
+            counts[0] += 1
+            subnet = subnet_of(ip)
+            bucket["subnets"][subnet] = bucket["subnets"].get(subnet, 0) + 1
+        elif action == "Unban":
+            counts[2] += 1
+            if ip in jail_bans:
+                jail_bans.remove(ip)
+        else:
+            if action == "Ban":
+                counts[1] += 1
+            if ip not in jail_bans:
+                jail_bans.append(ip)
+
+    cutoff = (time.time() // 60 - WINDOW_MINUTES) * 60
+    for minute in [m for m in buckets if int(m) < cutoff]:
+        del buckets[minute]
+
+def socket_command(command, path=FAIL2BAN_SOCKET):
+    """Send one command to the fail2ban server socket and return its reply, or None.
+
+    The socket is only accessible to root; replies are pickled by the
+    root-owned fail2ban server, the same trust model fail2ban-client uses.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(SOCKET_TIMEOUT)
+            sock.connect(path)
+            sock.sendall(pickle.dumps(command, pickle.HIGHEST_PROTOCOL) + SOCKET_END)
+            data = b""
+            while not data.endswith(SOCKET_END):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return None
+                data += chunk
+        code, reply = pickle.loads(data[:-len(SOCKET_END)])
+        return reply if code == 0 else None
+    except (OSError, pickle.UnpicklingError, ValueError, TypeError):
+        return None
+
+def get_active_bans():
+    """Return {jail: currently banned count} from the fail2ban server, or None when the socket is unavailable."""
+    status = socket_command(["status"])
+    if not status:
+        return None
+    jails = [j.strip() for j in dict(status).get("Jail list", "").split(",") if j.strip()]
+    active = {}
+    for jail in jails:
+        reply = socket_command(["status", jail])
+        if reply:
+            actions = dict(dict(reply).get("Actions", []))
+            active[jail] = actions.get("Currently banned", 0)
+    return active
+
+@check("fail2ban Activity Check", "Security")
+def check_fail2ban_activity(log_path=FAIL2BAN_LOG):
+    """Report bans, ban/unban rates per jail and top offending subnets, and alert on attack spikes.
+
+    Reads only the lines fail2ban appended since the last run, so the cost per
+    cycle follows the attack volume rather than the log size.
+    """
+    result = new_result(check_fail2ban_activity)
+    state = load_state()
+    try:
+        lines = read_new_lines(state, log_path)
+    except OSError as e:
+        result.status = Status.SKIPPED
+        result.message = f"Cannot read {log_path}: {e.strerror}."
+        return result
+    apply_lines(state, lines)
+    save_state(state)
+
+    buckets = state["buckets"]
+    now_minute = time.time() // 60 * 60
+    totals, recent_found, window_found, subnets = {}, 0, 0, {}
+    for minute, bucket in buckets.items():
+        for jail, counts in bucket["jails"].items():
+            total = totals.setdefault(jail, [0, 0, 0])
+            for i in range(3):
+                total[i] += counts[i]
+            window_found += counts[0]
+            if int(minute) > now_minute - SPIKE_MINUTES * 60:
+                recent_found += counts[0]
+        for subnet, count in bucket["subnets"].items():
+            subnets[subnet] = subnets.get(subnet, 0) + count
+
+    active = get_active_bans()
+    if active is None:
+        active = {jail: len(ips) for jail, ips in state["banned"].items()}
+    per_jail = ", ".join(
+        f"{jail}: {active.get(jail, 0)} banned, +{c[1]}/-{c[2]} bans, {c[0]} failures"
+        for jail, c in sorted(totals.items())
+    ) or "no events"
+    top = sorted(subnets.items(), key=lambda item: -item[1])[:TOP_SUBNETS]
+    summary = f"last {WINDOW_MINUTES}m: {per_jail}"
+    if top:
+        summary += "; top subnets " + ", ".join(f"{s} ({n})" for s, n in top)
+
+    recent_rate = recent_found / SPIKE_MINUTES
+    average_rate = window_found / WINDOW_MINUTES
+    result.metrics = {"failures_per_min": recent_rate, "banned": sum(active.values())}
+    if recent_rate >= SPIKE_MIN_ATTEMPTS or (recent_rate >= SPIKE_MIN_ATTEMPTS / 10 and recent_rate >= SPIKE_FACTOR * average_rate):
+        result.status = Status.WARNING
+        result.message = f"Attack spike: {recent_rate:.0f} failed attempts/min over the last {SPIKE_MINUTES}m (window average {average_rate:.1f}/min). {summary}."
+    else:
+        result.message = f"{sum(active.values())} address(es) banned; {summary}."
+    return result
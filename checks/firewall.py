@@ -0,0 +1,319 @@
+# checks/firewall.py
+
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+
+from checks import deadline, probe, sshd_config
+from checks.result import CheckResult, Status, check, new_result
+
+# What actions/configure-firewall.sh sets up: validator ports open, SSH on the
+# custom port open (taken from the effective sshd config), port 22 closed.
+REQUIRED_OPEN = [("tcp", 8000, 10000), ("udp", 8000, 10000)]
+REQUIRED_CLOSED = [("tcp", 22, 22)]
+COMMAND_TIMEOUT = 10
+
+ACCEPT, DROP, RETURN = "accept", "drop", "return"
+
+# Last verdict, keyed by ruleset hash and the requirements it was evaluated for
+_verdict_cache = {}
+
+class Rule:
+    """One filter rule reduced to what matters for a new inbound connection from outside."""
+
+    __slots__ = ("protos", "ports", "matches", "verdict", "target")
+
+    def __init__(self):
+        self.protos = None    # set of protocols, None = any
+        self.ports = None     # list of (lo, hi) destination port ranges, None = any
+        self.matches = True   # False if the rule can never match a new external packet (or cannot be evaluated)
+        self.verdict = None   # accept/drop/return/jump/goto, None = non-terminating (log, counter)
+        self.target = None    # chain for jump/goto
+
+    def applies(self, proto, port):
+        if not self.matches:
+            return False
+        if self.protos is not None and proto not in self.protos:
+            return False
+        if self.ports is not None and not any(lo <= port <= hi for lo, hi in self.ports):
+            return False
+        return True
+
+def load_ruleset():
+    """Return (source, raw ruleset text) from nftables, falling back to iptables-save; (None, "") if neither works."""
+    if probe.which("nft"):
+        try:
+            proc = deadline.run(["nft", "-j", "list", "ruleset"], timeout=COMMAND_TIMEOUT)
+            # Rules created through iptables-nft may carry xt expressions nft cannot
+            # translate; iptables-save renders those faithfully, so prefer it then.
+            if proc.returncode == 0 and '"xt"' not in proc.stdout:
+                return "nft", proc.stdout
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    if probe.which("iptables-save"):
+        try:
+            proc = deadline.run(["iptables-save", "-t", "filter"], timeout=COMMAND_TIMEOUT)
+            if proc.returncode == 0:
+                return "iptables", proc.stdout
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    return None, ""
+
+def parse_nft_ports(right):
+    """Turn the right-hand side of an nft dport match into a list of (lo, hi), or None for named sets."""
+    if isinstance(right, int):
+        return [(right, right)]
+    if isinstance(right, dict) and "range" in right:
+        return [tuple(right["range"])]
+    if isinstance(right, dict) and "set" in right:
+        ranges = []
+        for item in right["set"]:
+            parsed = parse_nft_ports(item)
+            if parsed is None:
+                return None
+            ranges.extend(parsed)
+        return ranges
+    return None
+
+def parse_nft(text):
+    """Build (base chains, chains) for the IPv4 input path from `nft -j list ruleset` output."""
+    chains = {}
+    base = []
+    for item in json.loads(text).get("nftables", []):
+        if "chain" in item:
+            chain = item["chain"]
+            if chain["family"] not in ("ip", "inet"):
+                continue
+            key = (chain["family"], chain["table"], chain["name"])
+            chains.setdefault(key, [])
+            if chain.get("hook") == "input" and chain.get("type", "filter") == "filter":
+                base.append((chain.get("prio", 0), key, chain.get("policy", ACCEPT)))
+        elif "rule" in item:
+            rule_json = item["rule"]
+            if rule_json["family"] not in ("ip", "inet"):
+                continue
+            key = (rule_json["family"], rule_json["table"], rule_json["chain"])
+            chains.setdefault(key, []).append(parse_nft_rule(rule_json, key))
+    base.sort()
+    return [(key, policy) for _, key, policy in base], chains
+
+def parse_nft_rule(rule_json, chain_key):
+    rule = Rule()
+    for expr in rule_json.get("expr", []):
+        if "match" in expr:
+            match = expr["match"]
+            left, right = match.get("left", {}), match.get("right")
+            op = "==" if match.get("op", "==") in ("==", "in") else match["op"]
+            if isinstance(right, list):
+                values = right
+            elif isinstance(right, dict) and "set" in right:
+                values = right["set"]
+            else:
+                values = [right]
+            if "payload" in left and left["payload"].get("field") == "dport" and op == "==":
+                rule.ports = parse_nft_ports(right)
+                if rule.ports is None:
+                    rule.matches = False
+                if left["payload"].get("protocol") in ("tcp", "udp"):
+                    rule.protos = {left["payload"]["protocol"]}
+            elif "payload" in left and left["payload"].get("field") == "protocol" and op == "==":
+                rule.protos = set(values)
+            elif "meta" in left and left["meta"].get("key") == "l4proto" and op == "==":
+                rule.protos = set(values)
+            elif "meta" in left and left["meta"].get("key") in ("iifname", "iif"):
+                # "iifname lo" never matches traffic from outside; "iifname != lo" always does.
+                if not (op == "!=" and values == ["lo"]):
+                    rule.matches = False
+            elif "ct" in left and left["ct"].get("key") == "state":
+                if ("new" in values) != (op == "=="):
+                    rule.matches = False
+            else:
+                rule.matches = False
+        elif "accept" in expr:
+            rule.verdict = ACCEPT
+        elif "drop" in expr or "reject" in expr:
+            rule.verdict = DROP
+        elif "return" in expr:
+            rule.verdict = RETURN
+        elif "jump" in expr or "goto" in expr:
+            rule.verdict = "jump" if "jump" in expr else "goto"
+            rule.target = chain_key[:2] + (expr[rule.verdict]["target"],)
+    return rule
+
+def parse_port_spec(spec):
+    """Parse iptables '8000:10000' or multiport '22,8000:10000' into [(lo, hi), ...]."""
+    ranges = []
+    for part in spec.split(","):
+        lo, _, hi = part.partition(":")
+        ranges.append((int(lo), int(hi or lo)))
+    return ranges
+
+def parse_iptables(text):
+    """Build (base chains, chains) for the filter INPUT path from iptables-save output."""
+    chains = {}
+    policies = {}
+    for line in text.splitlines():
+        if line.startswith(":"):
+            name, policy = line[1:].split()[:2]
+            chains.setdefault(name, [])
+            policies[name] = ACCEPT if policy == "ACCEPT" else DROP if policy == "DROP" else None
+        elif line.startswith("-A "):
+            args = shlex.split(line)
+            chains.setdefault(args[1], []).append(parse_iptables_rule(args[2:]))
+    for rules in chains.values():
+        for rule in rules:
+            if rule.target and rule.target not in chains:
+                # Extension target we do not model (LOG, NFLOG, ...): non-terminating.
+                rule.verdict, rule.target = None, None
+    return [("INPUT", policies.get("INPUT", ACCEPT))], chains
+
+# iptables-save options that do not restrict which new inbound packets match
+IGNORED_IPTABLES_OPTIONS = {"--comment", "--limit", "--limit-burst", "--log-prefix", "--log-level", "--reject-with"}
+
+def parse_iptables_rule(args):
+    rule = Rule()
+    negate = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "!":
+            negate = True
+            i += 1
+            continue
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if value.startswith("-") or value == "!":
+            # Flag without a value (e.g. --syn): nothing we model.
+            rule.matches = False
+            negate = False
+            i += 1
+            continue
+        if arg == "-m" or arg in IGNORED_IPTABLES_OPTIONS:
+            pass
+        elif arg == "-p" and not negate:
+            rule.protos = {value}
+        elif arg in ("--dport", "--dports", "--destination-port", "--destination-ports") and not negate:
+            rule.ports = parse_port_spec(value)
+        elif arg == "-i":
+            # "-i lo" never matches traffic from outside; "! -i lo" always does.
+            if not (negate and value == "lo"):
+                rule.matches = False
+        elif arg in ("--ctstate", "--state"):
+            if ("NEW" in value.split(",")) == negate:
+                rule.matches = False
+        elif arg == "--dst-type":
+            if (value == "LOCAL") == negate:
+                rule.matches = False
+        elif arg in ("-j", "-g"):
+            verdict = {"ACCEPT": ACCEPT, "DROP": DROP, "REJECT": DROP, "RETURN": RETURN}.get(value)
+            if verdict:
+                rule.verdict = verdict
+            else:
+                rule.verdict, rule.target = ("jump" if arg == "-j" else "goto"), value
+        else:
+            rule.matches = False  # source address, sport, recent, ...: not evaluated
+        negate = False
+        i += 2
+    return rule
+
+def walk_chain(chains, key, proto, port, depth=0):
+    """Return accept/drop/return for a new packet traversing one chain."""
+    if depth > 32:
+        return RETURN
+    for rule in chains.get(key, []):
+        if rule.verdict is None or not rule.applies(proto, port):
+            continue
+        if rule.verdict in (ACCEPT, DROP):
+            return rule.verdict
+        if rule.verdict == RETURN:
+            return RETURN
+        outcome = walk_chain(chains, rule.target, proto, port, depth + 1)
+        if outcome in (ACCEPT, DROP) or rule.verdict == "goto":
+            return outcome
+    return RETURN
+
+def is_open(base, chains, proto, port):
+    """A port is open only if every input base chain accepts the packet."""
+    for key, policy in base:
+        outcome = walk_chain(chains, key, proto, port)
+        if outcome == RETURN:
+            outcome = policy or ACCEPT
+        if outcome != ACCEPT:
+            return False
+    return True
+
+def port_segments(chains, lo, hi):
+    """Split [lo, hi] at every port boundary used by any rule, so one probe per segment is exact."""
+    cuts = {lo, hi + 1}
+    for rules in chains.values():
+        for rule in rules:
+            for rlo, rhi in rule.ports or ():
+                cuts.update(p for p in (rlo, rhi + 1) if lo < p <= hi)
+    points = sorted(cuts)
+    return [(a, b - 1) for a, b in zip(points, points[1:])]
+
+def evaluate(base, chains, required_open, required_closed):
+    """Return a list of problems with the required open/closed port sets."""
+    problems = []
+    for proto, lo, hi in required_open:
+        closed = [(a, b) for a, b in port_segments(chains, lo, hi) if not is_open(base, chains, proto, a)]
+        if closed:
+            problems.append(f"{proto} {', '.join(f'{a}-{b}' if a != b else str(a) for a, b in closed)} should be open")
+    for proto, lo, hi in required_closed:
+        opened = [(a, b) for a, b in port_segments(chains, lo, hi) if is_open(base, chains, proto, a)]
+        if opened:
+            problems.append(f"{proto} {', '.join(f'{a}-{b}' if a != b else str(a) for a, b in opened)} should be closed")
+    return problems
+
+@check("Firewall Rules Check", "Security")
+def check_firewall_rules():
+    """Verify the live firewall still matches configure-firewall.sh and the effective SSH port.
+
+    The ruleset is read once per cycle; the verdict is cached by its hash, so an
+    unchanged ruleset is not re-evaluated.
+    """
+    result = new_result(check_firewall_rules)
+    source, text = load_ruleset()
+    # An unread ruleset says nothing about the firewall, so it is never a FAIL
+    if source is None and os.geteuid() != 0:
+        result.status = Status.SKIPPED
+        result.message = "Reading the firewall ruleset requires root."
+        return result
+    if source is None:
+        result.status = Status.WARNING
+        result.message = "Could not read the firewall ruleset (nft and iptables-save unavailable or failing)."
+        return result
+
+    try:
+        ssh_ports = [int(p) for p in sshd_config.resolve().effective("Port")]
+    except Exception:
+        ssh_ports = []
+    required_open = REQUIRED_OPEN + [("tcp", p, p) for p in ssh_ports]
+    required_closed = [r for r in REQUIRED_CLOSED if not (r[0] == "tcp" and r[1] in ssh_ports)]
+
+    key = (hashlib.sha256(text.encode()).hexdigest(), tuple(required_open), tuple(required_closed))
+    if key in _verdict_cache:
+        status, message, metrics = _verdict_cache[key]
+        return CheckResult(result.name, result.category, status, message, dict(metrics))
+
+    try:
+        base, chains = parse_nft(text) if source == "nft" else parse_iptables(text)
+    except (ValueError, KeyError, IndexError) as e:
+        result.status = Status.WARNING
+        result.message = f"Could not parse {source} ruleset: {e}"
+        return result
+
+    if not base:
+        problems = ["no input filter chain is loaded (firewall disabled?)"]
+    else:
+        problems = evaluate(base, chains, required_open, required_closed)
+    ssh_note = f"SSH port {', '.join(map(str, ssh_ports))}" if ssh_ports else "SSH port unknown"
+    if problems:
+        result.status = Status.FAIL
+        result.message = f"Firewall ({source}) deviates from the expected policy: " + "; ".join(problems) + f" ({ssh_note})."
+    else:
+        result.message = f"Firewall ({source}) allows validator ports 8000-10000 and {ssh_note}, and blocks 22/tcp."
+    _verdict_cache.clear()
+    _verdict_cache[key] = (result.status, result.message, dict(result.metrics))
+    return result
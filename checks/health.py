@@ -1,13 +1,18 @@
 # checks/health.py
 
-import subprocess
 import glob
 import os
 import re
+import time
+from array import array
 
+from checks import clock, deadline, nvme, pressure, probe, rpc, storage, topology
+from checks.result import Status, check, new_result, run_check
+
+@check("CPU Governor Check", "Health")
 def check_cpu_governor():
     """Check that all CPUs are set to the 'performance' governor."""
-    result = {"name": "CPU Governor Check", "status": "PASS", "message": "", "category": "Health"}
+    result = new_result(check_cpu_governor)
     expected = "performance"
     mismatches = []
     total_checkable = 0
@@ -26,10 +31,10 @@ def check_cpu_governor():
             pass
 
     if not mismatches:
-        result["message"] = f"All {total_checkable} CPU cores set to '{expected}'."
+        result.message = f"All {total_checkable} CPU cores set to '{expected}'."
     else:
-        result["status"] = "FAIL"
-        result["message"] = f"{len(mismatches)} of {total_checkable} cores are not set to '{expected}': " + ", ".join(mismatches)
+        result.status = Status.FAIL
+        result.message = f"{len(mismatches)} of {total_checkable} cores are not set to '{expected}': " + ", ".join(mismatches)
     return result
 
 """Ensure that swap is disabled for optimal validator performance.
@@ -43,14 +48,14 @@ Swap space can cause significant performance degradation for validators due to:
 This check verifies that swap is completely disabled to maintain consistent,
 high-performance operation of the validator node.
 """
+@check("Swap Disabled Check", "Health")
 def check_swap_disabled():
 
     """Ensure that swap is disabled."""
-    result = {"name": "Swap Disabled Check", "status": "PASS", "message": "", "category": "Health"}
+    result = new_result(check_swap_disabled)
     swap_status = "disabled"
     try:
-        proc = subprocess.run(["swapon", "--show"], capture_output=True, text=True)
-        if proc.stdout.strip():
+        if probe.run(["swapon", "--show"]).stdout.strip():
             swap_status = "enabled"
     except FileNotFoundError:
         if os.path.exists("/proc/swaps"):
@@ -59,15 +64,16 @@ def check_swap_disabled():
                 if lines:
                     swap_status = "enabled"
     if swap_status == "disabled":
-        result["message"] = "Swap is disabled."
+        result.message = "Swap is disabled."
     else:
-        result["status"] = "FAIL"
-        result["message"] = "Swap is enabled."
+        result.status = Status.FAIL
+        result.message = "Swap is enabled."
     return result
 
+@check("CPU Boost Check", "Health")
 def check_cpu_boost():
     """Check if CPU boost is enabled."""
-    result = {"name": "CPU Boost Check", "status": "PASS", "message": "", "category": "Health"}
+    result = new_result(check_cpu_boost)
     boost_status = None
     boost_path = "/sys/devices/system/cpu/cpufreq/boost"
     intel_boost_path = "/sys/devices/system/cpu/intel_pstate/no_turbo"
@@ -109,113 +115,96 @@ def check_cpu_boost():
             else:
                 boost_status = "disabled"
         else:
-            result["status"] = "WARNING"
-            result["message"] = "Could not determine CPU boost status."
+            result.status = Status.WARNING
+            result.message = "Could not determine CPU boost status."
             return result
 
     if boost_status == "enabled":
-        result["message"] = "CPU boost is enabled."
+        result.message = "CPU boost is enabled."
     elif boost_status == "disabled":
-        result["status"] = "FAIL"
-        result["message"] = "CPU boost is disabled; expected enabled."
+        result.status = Status.FAIL
+        result.message = "CPU boost is disabled; expected enabled."
     else:
-        result["status"] = "WARNING"
-        result["message"] = "CPU boost status is unknown."
+        result.status = Status.WARNING
+        result.message = "CPU boost status is unknown."
     return result
 
+@check("CPU p-state Driver Check", "Health")
 def check_pstate_driver():
     """Check if the CPU is using a p-state driver."""
-    result = {"name": "CPU p-state Driver Check", "status": "PASS", "message": "", "category": "Health"}
+    result = new_result(check_pstate_driver)
     driver_file = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_driver"
     if os.path.isfile(driver_file):
         try:
             with open(driver_file, "r") as f:
                 driver = f.read().strip()
             if "pstate" in driver.lower():
-                result["message"] = f"Using p-state driver: {driver}"
+                result.message = f"Using p-state driver: {driver}"
             else:
-                result["status"] = "FAIL"
-                result["message"] = f"Not using p-state driver. Current: {driver}. Expected a p-state driver."
+                result.status = Status.FAIL
+                result.message = f"Not using p-state driver. Current: {driver}. Expected a p-state driver."
         except Exception as e:
-            result["status"] = "FAIL"
-            result["message"] = f"Error reading driver: {e}"
+            result.status = Status.FAIL
+            result.message = f"Error reading driver: {e}"
     else:
-        result["status"] = "FAIL"
-        result["message"] = "CPU scaling driver file not found."
+        result.status = Status.FAIL
+        result.message = "CPU scaling driver file not found."
     return result
 
-def check_ntp_sync():
-    """Check if NTP-based time synchronization is active."""
-    result = {"name": "NTP Sync Check", "status": "FAIL", "message": "", "category": "Health"}
-    ntp_synced = False
-    sync_method = ""
-    try:
-        proc = subprocess.run(["timedatectl", "status"], capture_output=True, text=True)
-        output = proc.stdout
-        if "NTP service: active" in output or "System clock synchronized: yes" in output:
-            ntp_synced = True
-            sync_method = "timedatectl"
-    except Exception:
-        pass
-
-    if ntp_synced:
-        result["status"] = "PASS"
-        result["message"] = f"Time sync is enabled via {sync_method}."
-    else:
-        result["message"] = "No active NTP synchronization detected. An NTP service is expected."
-    return result
+@check("Package Updates Check", "Health", expensive=True)
+def check_package_updates(refresh=True):
+    """Check for pending package updates (max allowed: 5).
 
-def check_package_updates():
-    """Check for pending package updates (max allowed: 5)."""
-    result = {"name": "Package Updates Check", "status": "PASS", "message": "", "category": "Health"}
+    With refresh=False the package indexes are not fetched first, so the count
+    is only as fresh as the last update but the check stays local and quick.
+    """
+    result = new_result(check_package_updates)
     max_allowed = 5
     update_count = 0
-    pkgmanager = None
+    pkgmanager = probe.package_manager()
     try:
-        if subprocess.run(["which", "apt"], capture_output=True).returncode == 0:
-            pkgmanager = "apt"
-            subprocess.run(["apt-get", "update", "-qq"], capture_output=True)
-            proc = subprocess.run(["apt", "list", "--upgradable"], capture_output=True, text=True)
+        if pkgmanager == "apt":
+            if refresh:
+                deadline.run(["apt-get", "update", "-qq"])
+            proc = deadline.run(["apt", "list", "--upgradable"])
             lines = [line for line in proc.stdout.splitlines() if "Listing..." not in line]
             update_count = len(lines)
-        elif subprocess.run(["which", "dnf"], capture_output=True).returncode == 0:
-            pkgmanager = "dnf"
-            proc = subprocess.run(["dnf", "check-update", "--quiet"], capture_output=True, text=True)
+        elif pkgmanager == "dnf":
+            proc = deadline.run(["dnf", "check-update", "--quiet"] + ([] if refresh else ["--cacheonly"]))
             update_count = len([l for l in proc.stdout.splitlines() if l.strip()])
-        elif subprocess.run(["which", "yum"], capture_output=True).returncode == 0:
-            pkgmanager = "yum"
-            proc = subprocess.run(["yum", "check-update", "--quiet"], capture_output=True, text=True)
+        elif pkgmanager == "yum":
+            proc = deadline.run(["yum", "check-update", "--quiet"] + ([] if refresh else ["--cacheonly"]))
             update_count = len([l for l in proc.stdout.splitlines() if l.strip()])
-        elif subprocess.run(["which", "pacman"], capture_output=True).returncode == 0:
-            pkgmanager = "pacman"
-            subprocess.run(["pacman", "-Sy"], capture_output=True)
-            proc = subprocess.run(["pacman", "-Qu"], capture_output=True, text=True)
+        elif pkgmanager == "pacman":
+            if refresh:
+                deadline.run(["pacman", "-Sy"])
+            proc = deadline.run(["pacman", "-Qu"])
             update_count = len(proc.stdout.splitlines())
-        elif subprocess.run(["which", "zypper"], capture_output=True).returncode == 0:
-            pkgmanager = "zypper"
-            proc = subprocess.run(["zypper", "list-updates"], capture_output=True, text=True)
+        elif pkgmanager == "zypper":
+            proc = deadline.run(["zypper"] + ([] if refresh else ["--no-refresh"]) + ["list-updates"])
             update_count = len([l for l in proc.stdout.splitlines() if "|" in l])
         else:
-            result["status"] = "WARNING"
-            result["message"] = "Could not determine package manager."
+            result.status = Status.WARNING
+            result.message = "Could not determine package manager."
             return result
     except Exception as e:
-        result["status"] = "FAIL"
-        result["message"] = f"Error checking package updates: {e}"
+        result.status = Status.FAIL
+        result.message = f"Error checking package updates: {e}"
         return result
 
     if update_count <= max_allowed:
-        result["message"] = f"{update_count} update(s) pending ({pkgmanager}). Maximum allowed: {max_allowed}."
+        result.message = f"{update_count} update(s) pending ({pkgmanager}). Maximum allowed: {max_allowed}."
     else:
-        result["status"] = "FAIL"
-        result["message"] = f"{update_count} update(s) pending ({pkgmanager}). Maximum allowed: {max_allowed}."
+        result.status = Status.FAIL
+        result.message = f"{update_count} update(s) pending ({pkgmanager}). Maximum allowed: {max_allowed}."
     return result
 
+@check("Reboot Required Check", "Health")
 def check_reboot_required():
     """Check if a system reboot is required (Ubuntu/Debian)."""
-    result = {"name": "Reboot Required Check", "status": "PASS", "message": "", "category": "Health"}
+    result = new_result(check_reboot_required)
     if os.path.exists("/var/run/reboot-required"):
-        result["status"] = "FAIL"
+        result.status = Status.FAIL
         msg = "System requires a reboot."
         if os.path.exists("/var/run/reboot-required.pkgs"):
             try:
@@ -224,21 +213,610 @@ def check_reboot_required():
                 msg += f" Packages: {pkgs}"
             except Exception:
                 pass
-        result["message"] = msg
+        result.message = msg
+    else:
+        result.message = "System does not require a reboot."
+    return result
+
+IRQ_SAMPLE_INTERVAL = 1.0  # seconds between /proc/interrupts snapshots
+IRQ_IMBALANCE_RATIO = 4.0  # busiest queue vs. mean queue rate
+IRQ_MIN_RATE = 1000        # ignore imbalance below this many interrupts/s per NIC
+
+def get_nic_irqs():
+    """Return a dict mapping NIC name -> list of its MSI/MSI-X IRQ numbers."""
+    nic_irqs = {}
+    for iface in topology.get_nic_numa_nodes():
+        irq_dir = f"/sys/class/net/{iface}/device/msi_irqs"
+        try:
+            irqs = sorted(int(i) for i in os.listdir(irq_dir))
+        except (OSError, ValueError):
+            continue
+        if irqs:
+            nic_irqs[iface] = irqs
+    return nic_irqs
+
+def read_interrupt_counts(irqs):
+    """Read per-CPU counts for the given IRQs from /proc/interrupts.
+
+    The header is parsed once into a column -> CPU map (offline CPUs have no
+    column). Only rows for the requested IRQs are decoded, each straight into an
+    unsigned array indexed by column, so a 256-CPU host costs one read and a few
+    array conversions instead of splitting every line. Returns
+    (column_cpus, {irq: (counts_array, label)}).
+    """
+    with open("/proc/interrupts", "rb") as f:
+        data = f.read()
+    lines = data.split(b"\n")
+    column_cpus = [int(name[3:]) for name in lines[0].split()]
+    ncols = len(column_cpus)
+    wanted = {str(irq).encode() + b":": irq for irq in irqs}
+    counts = {}
+    for line in lines[1:]:
+        head = line[:16].lstrip()
+        key = head.split(b" ", 1)[0]
+        irq = wanted.get(key)
+        if irq is None:
+            continue
+        fields = line.split(None, ncols + 1)
+        row = array("Q", map(int, fields[1:ncols + 1]))
+        label = fields[ncols + 1].split()[-1].decode(errors="replace") if len(fields) > ncols + 1 else ""
+        counts[irq] = (row, label)
+    return column_cpus, counts
+
+def get_irq_affinity(irq):
+    """Return the CPUs an IRQ is routed to, preferring the effective affinity."""
+    for name in ("effective_affinity_list", "smp_affinity_list"):
+        value = topology.read_sysfs(f"/proc/irq/{irq}/{name}")
+        if value:
+            try:
+                return set(topology.parse_cpu_list(value))
+            except ValueError:
+                continue
+    return set()
+
+@check("NIC IRQ Affinity Check", "Health")
+def check_irq_affinity(interval=IRQ_SAMPLE_INTERVAL):
+    """Check NIC queue IRQs are served on the NIC's NUMA node and off the validator tile cores."""
+    result = new_result(check_irq_affinity)
+    nic_irqs = get_nic_irqs()
+    if not nic_irqs:
+        result.status = Status.WARNING
+        result.message = "No PCI NICs with MSI IRQs found."
+        return result
+
+    nic_nodes = topology.get_nic_numa_nodes()
+    cpu_node = topology.get_cpu_numa_map()
+    multi_node = len(set(cpu_node.values())) > 1
+    tile_cores = topology.get_tile_cores()
+    all_irqs = [irq for irqs in nic_irqs.values() for irq in irqs]
+
+    try:
+        column_cpus, before = read_interrupt_counts(all_irqs)
+        time.sleep(interval)
+        _, after = read_interrupt_counts(all_irqs)
+    except Exception as e:
+        result.status = Status.WARNING
+        result.message = f"Could not read /proc/interrupts: {e}"
+        return result
+
+    failures = []
+    warnings = []
+    for iface, irqs in nic_irqs.items():
+        node = nic_nodes.get(iface, -1)
+        cross_numa = []
+        on_tiles = []
+        queue_rates = []
+        for irq in irqs:
+            if irq not in before or irq not in after:
+                continue
+            old, label = before[irq]
+            new, _ = after[irq]
+            per_cpu = [(column_cpus[i], (new[i] - old[i]) / interval) for i in range(len(new))]
+            rate = sum(r for _, r in per_cpu)
+            queue_rates.append(rate)
+            serving = get_irq_affinity(irq)
+            busy_cpus = {cpu for cpu, r in per_cpu if r > 0}
+            if multi_node and node >= 0:
+                remote = sorted(cpu for cpu in serving if cpu_node.get(cpu, node) != node)
+                if remote:
+                    cross_numa.append(f"{label or irq}->{topology.format_cpu_list(remote)}")
+            tile_hits = (serving | busy_cpus) & tile_cores
+            if tile_hits:
+                on_tiles.append(f"{label or irq}->{topology.format_cpu_list(tile_hits)}")
+
+        if cross_numa:
+            failures.append(f"{iface} (node {node}) IRQs on remote NUMA CPUs: " + ", ".join(cross_numa))
+        if on_tiles:
+            failures.append(f"{iface} IRQs on validator tile cores: " + ", ".join(on_tiles))
+        active = [r for r in queue_rates if r > 0]
+        total = sum(active)
+        if len(active) > 1 and total >= IRQ_MIN_RATE:
+            mean = total / len(active)
+            if max(active) / mean > IRQ_IMBALANCE_RATIO:
+                warnings.append(f"{iface} queue interrupts unbalanced (max {max(active):.0f}/s vs mean {mean:.0f}/s)")
+
+    summary = f"{len(all_irqs)} IRQs on {len(nic_irqs)} NIC(s) sampled over {interval:g}s"
+    if not tile_cores:
+        summary += " (tile cores unknown)"
+    if failures:
+        result.status = Status.FAIL
+        result.message = f"{summary}: " + "; ".join(failures + warnings)
+    elif warnings:
+        result.status = Status.WARNING
+        result.message = f"{summary}: " + "; ".join(warnings)
+    else:
+        result.message = f"{summary}: all IRQs NUMA-local and off tile cores."
+    return result
+
+# Pages Firedancer needs reserved on each NUMA node, keyed by page size in kB.
+# The default leaves room for the default mainnet Frankendancer layout; `fdctl mem`
+# prints the figure for your config. Override it with HUGEPAGES_ENV, e.g. in .env:
+# FD_HUGEPAGES_PER_NODE="1G=40,2M=0".
+REQUIRED_HUGEPAGES_PER_NODE = {
+    1048576: 32,  # gigantic (1 GiB) pages
+    2048: 0,      # huge (2 MiB) pages
+}
+HUGEPAGES_ENV = "FD_HUGEPAGES_PER_NODE"
+PAGE_SIZE_UNITS_KB = {"G": 1048576, "M": 1024}
+BASE_PAGE_KB = 4
+
+def get_required_hugepages():
+    """Return {page_kb: pages per node}: REQUIRED_HUGEPAGES_PER_NODE with HUGEPAGES_ENV applied over it.
+
+    Raises ValueError when the variable is not a list like "1G=32,2M=512".
+    """
+    required = dict(REQUIRED_HUGEPAGES_PER_NODE)
+    for item in filter(None, (part.strip() for part in os.getenv(HUGEPAGES_ENV, "").split(","))):
+        size, sep, count = item.partition("=")
+        unit = PAGE_SIZE_UNITS_KB.get(size.strip()[-1:].upper())
+        if not sep or unit is None or not size.strip()[:-1].isdigit() or not count.strip().isdigit():
+            raise ValueError(f"{HUGEPAGES_ENV}: cannot parse {item!r} (expected e.g. 1G=32,2M=512)")
+        required[int(size.strip()[:-1]) * unit] = int(count)
+    return required
+
+def read_buddyinfo():
+    """Parse /proc/buddyinfo into {node: [free block count per order]}, summed over zones."""
+    free_blocks = {}
+    with open("/proc/buddyinfo", "r") as f:
+        for line in f:
+            parts = line.split()
+            node = int(parts[1].rstrip(","))
+            counts = [int(c) for c in parts[4:]]
+            totals = free_blocks.setdefault(node, [0] * len(counts))
+            for order, count in enumerate(counts):
+                totals[order] += count
+    return free_blocks
+
+def read_node_hugepages():
+    """Return {node: {page_kb: {"total", "free", "surplus"}}} from the per-node sysfs counters."""
+    nodes = {}
+    for path in glob.glob("/sys/devices/system/node/node[0-9]*/hugepages/hugepages-*kB"):
+        node = int(re.search(r"node(\d+)/", path).group(1))
+        page_kb = int(re.search(r"hugepages-(\d+)kB$", path).group(1))
+        nodes.setdefault(node, {})[page_kb] = {
+            "total": int(topology.read_sysfs(os.path.join(path, "nr_hugepages"), "0")),
+            "free": int(topology.read_sysfs(os.path.join(path, "free_hugepages"), "0")),
+            "surplus": int(topology.read_sysfs(os.path.join(path, "surplus_hugepages"), "0")),
+        }
+    if not nodes:
+        # Non-NUMA kernels only expose the global pools.
+        for path in glob.glob("/sys/kernel/mm/hugepages/hugepages-*kB"):
+            page_kb = int(re.search(r"hugepages-(\d+)kB$", path).group(1))
+            nodes.setdefault(0, {})[page_kb] = {
+                "total": int(topology.read_sysfs(os.path.join(path, "nr_hugepages"), "0")),
+                "free": int(topology.read_sysfs(os.path.join(path, "free_hugepages"), "0")),
+                "surplus": int(topology.read_sysfs(os.path.join(path, "surplus_hugepages"), "0")),
+            }
+    return nodes
+
+def read_reserved_hugepages():
+    """Return {page_kb: pages reserved by mappings but not yet faulted in}. The kernel only counts these globally."""
+    reserved = {}
+    for path in glob.glob("/sys/kernel/mm/hugepages/hugepages-*kB"):
+        page_kb = int(re.search(r"hugepages-(\d+)kB$", path).group(1))
+        value = topology.read_sysfs(os.path.join(path, "resv_hugepages"), "0")
+        reserved[page_kb] = int(value) if value.isdigit() else 0
+    return reserved
+
+def page_size_label(page_kb):
+    return f"{page_kb // 1048576}G" if page_kb >= 1048576 else f"{page_kb // 1024}M"
+
+@check("Hugepage Readiness Check", "Health")
+def check_hugepages(required=None):
+    """Check each NUMA node has (or can still allocate) the huge and gigantic pages Firedancer needs.
+
+    Pages already reserved survive a validator restart. Any shortfall has to be
+    carved out of free memory at restart time, which only works if the buddy
+    allocator still has large enough contiguous blocks on that node; after a long
+    uptime memory is often too fragmented and the workspace allocation fails.
+    A 2M shortfall is measured exactly from /proc/buddyinfo. Gigantic pages are
+    larger than any buddy block, so their capacity can only be estimated and a
+    1G shortfall is a WARNING unless the node lacks the free memory outright.
+    """
+    result = new_result(check_hugepages)
+    try:
+        required = get_required_hugepages() if required is None else required
+    except ValueError as e:
+        result.status = Status.WARNING
+        result.message = str(e)
+        return result
+    try:
+        nodes = read_node_hugepages()
+        buddy = read_buddyinfo()
+    except Exception as e:
+        result.status = Status.WARNING
+        result.message = f"Could not read hugepage information: {e}"
+        return result
+
+    if not nodes:
+        result.status = Status.WARNING
+        result.message = "Kernel has no hugetlb support."
+        return result
+
+    failures = []
+    warnings = []
+    node_reports = []
+    for node in sorted(nodes):
+        pools = nodes[node]
+        free_blocks = buddy.get(node, [])
+        max_order = len(free_blocks) - 1
+        free_kb = sum(count * BASE_PAGE_KB << order for order, count in enumerate(free_blocks))
+        pool_reports = []
+        for page_kb in sorted(pools, reverse=True):
+            pool = pools[page_kb]
+            pool_reports.append(f"{page_size_label(page_kb)} {pool['free']}/{pool['total']} free")
+            shortfall = required.get(page_kb, 0) - pool["total"]
+            if shortfall <= 0:
+                continue
+            needed = f"node {node} needs {shortfall} more {page_size_label(page_kb)} page(s)"
+            order = (page_kb // BASE_PAGE_KB).bit_length() - 1
+            if order > max_order:
+                # Gigantic pages need aligned contiguous ranges larger than any buddy block; free
+                # max-order blocks are only an upper bound on what can still be allocated.
+                contiguous_kb = sum(count * BASE_PAGE_KB << o for o, count in enumerate(free_blocks) if o == max_order)
+                if free_kb < shortfall * page_kb:
+                    failures.append(f"{needed} but only {free_kb // 1024} MiB of memory is free")
+                elif contiguous_kb < shortfall * page_kb:
+                    warnings.append(f"{needed}; at most {contiguous_kb // 1024} MiB is free in contiguous blocks (estimate)")
+                else:
+                    warnings.append(f"{needed}; allocation at restart may still fail if free memory is fragmented (estimate)")
+                continue
+            # A page of this size needs a contiguous block of at least its own order.
+            contiguous_kb = sum(count * BASE_PAGE_KB << o for o, count in enumerate(free_blocks) if o >= order)
+            if contiguous_kb < shortfall * page_kb:
+                failures.append(f"{needed} but only {contiguous_kb // 1024} MiB is free in large enough blocks")
+        # Share of free memory stuck in blocks too small for a 2M page.
+        huge_order = min(9, max_order)
+        small_kb = sum(count * BASE_PAGE_KB << o for o, count in enumerate(free_blocks) if o < huge_order)
+        frag = (small_kb / free_kb * 100) if free_kb else 0.0
+        node_reports.append(f"node{node}: " + ", ".join(pool_reports) + f", {frag:.0f}% of free memory fragmented")
+
+    reserved = read_reserved_hugepages()
+    summary = "; ".join(node_reports) + ". Reserved by mappings (all nodes): " + (
+        ", ".join(f"{page_size_label(page_kb)} {count}" for page_kb, count in sorted(reserved.items(), reverse=True)) or "none") + "."
+    if failures:
+        result.status = Status.FAIL
+        result.message = "; ".join(failures + warnings) + ". " + summary
+    elif warnings:
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings) + ". " + summary
+    else:
+        result.message = summary
+    return result
+
+MIN_NOFILE = 1000000
+
+def read_process_limits(pid):
+    """Parse /proc/<pid>/limits into {limit name: (soft, hard)}; 'unlimited' becomes None."""
+    limits = {}
+    with open(f"/proc/{pid}/limits", "r") as f:
+        next(f)
+        for line in f:
+            # Columns are fixed width: name (26 chars), soft (21), hard (21), units.
+            name = line[:26].strip()
+            values = line[26:].split()
+            if len(values) < 2:
+                continue
+            soft, hard = (None if v == "unlimited" else int(v) for v in values[:2])
+            limits[name] = (soft, hard)
+    return limits
+
+def read_cgroup_budget(cgroup_dir):
+    """Collect cpu.max, memory.max and io.max for a cgroup and all its ancestors.
+
+    Any ancestor slice can cap the validator, so every level is read. Returns a
+    list of (cgroup_path, filename, value) for the limits that are actually set,
+    plus the effective cpuset of the leaf.
+    """
+    caps = []
+    path = cgroup_dir
+    while path.startswith(topology.CGROUP_ROOT) and path != topology.CGROUP_ROOT:
+        for name in ("cpu.max", "memory.max", "io.max"):
+            value = topology.read_sysfs(os.path.join(path, name), "")
+            if not value:
+                continue
+            if name == "cpu.max" and value.split()[0] == "max":
+                continue
+            if name == "memory.max" and value == "max":
+                continue
+            caps.append((path[len(topology.CGROUP_ROOT):] or "/", name, value))
+        path = os.path.dirname(path)
+    cpuset = topology.read_sysfs(os.path.join(cgroup_dir, "cpuset.cpus.effective"))
+    return caps, (set(topology.parse_cpu_list(cpuset)) if cpuset else None)
+
+@check("Validator Limits Check", "Health")
+def check_validator_limits(pid=None):
+    """Check the validator's rlimits and cgroup v2 budget match what Firedancer needs.
+
+    Everything is read straight from /proc/<pid> and cgroupfs, so this sees the
+    limits the running process actually got, including any systemd drop-ins.
+    """
+    result = new_result(check_validator_limits)
+    pid = pid or topology.find_validator_pid()
+    if pid is None:
+        result.status = Status.WARNING
+        result.message = "Validator process not found; limits not checked."
+        return result
+
+    issues = []
+    try:
+        limits = read_process_limits(pid)
+    except Exception as e:
+        result.status = Status.WARNING
+        result.message = f"Could not read limits of PID {pid}: {e}"
+        return result
+
+    memlock = limits.get("Max locked memory", (0, 0))[0]
+    if memlock is not None:
+        issues.append(f"RLIMIT_MEMLOCK is {memlock} bytes (need unlimited, LimitMEMLOCK=infinity)")
+    nofile = limits.get("Max open files", (0, 0))[0]
+    if nofile is not None and nofile < MIN_NOFILE:
+        issues.append(f"RLIMIT_NOFILE is {nofile} (need >= {MIN_NOFILE})")
+
+    cgroup_dir = topology.get_cgroup_dir(pid)
+    if cgroup_dir:
+        caps, cpuset = read_cgroup_budget(cgroup_dir)
+        for path, name, value in caps:
+            issues.append(f"{name}={value.replace(chr(10), '; ')} set on {path}")
+        tile_cores = topology.get_tile_cores()
+        if cpuset is not None and tile_cores - cpuset:
+            missing = topology.format_cpu_list(tile_cores - cpuset)
+            issues.append(f"cpuset.cpus.effective excludes tile cores {missing}")
+        scope = f"cgroup {cgroup_dir[len(topology.CGROUP_ROOT):]}"
+    else:
+        scope = "no cgroup v2 hierarchy"
+
+    if issues:
+        result.status = Status.FAIL
+        result.message = f"Validator PID {pid} ({scope}): " + "; ".join(issues) + "."
+    else:
+        result.message = f"Validator PID {pid} ({scope}): memlock unlimited, nofile {nofile or 'unlimited'}, no CPU/memory/IO caps."
+    return result
+
+FREQ_SAMPLE_INTERVAL = 1.0  # seconds
+MIN_FREQ_SHARE = 0.9        # hot cores must run at >= this share of their nominal frequency
+FREQ_SHARE_ENV = "FD_MIN_FREQ_SHARE"  # overrides MIN_FREQ_SHARE, e.g. FD_MIN_FREQ_SHARE="0.8" in .env
+HOT_CORE_BUSY = 0.9         # a core busier than this over the window counts as hot
+MSR_APERF = 0xE8
+MSR_MPERF = 0xE7
+
+def read_cpu_busy_ticks():
+    """Return {cpu: (busy_ticks, total_ticks)} from /proc/stat."""
+    ticks = {}
+    with open("/proc/stat", "r") as f:
+        for line in f:
+            if not line.startswith("cpu") or line.startswith("cpu "):
+                continue
+            parts = line.split()
+            values = [int(v) for v in parts[1:]]
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            ticks[int(parts[0][3:])] = (sum(values[:8]) - idle, sum(values[:8]))
+    return ticks
+
+def read_msr_pair(cpu):
+    """Return (aperf, mperf) for a CPU via /dev/cpu/N/msr, or None when MSRs are not readable."""
+    try:
+        fd = os.open(f"/dev/cpu/{cpu}/msr", os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        aperf = int.from_bytes(os.pread(fd, 8, MSR_APERF), "little")
+        mperf = int.from_bytes(os.pread(fd, 8, MSR_MPERF), "little")
+        return aperf, mperf
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def get_cpu_model():
+    for line in topology.read_sysfs("/proc/cpuinfo", "").splitlines():
+        if line.startswith("model name"):
+            return line.split(":", 1)[1].strip()
+    return ""
+
+def read_reference_khz(cpu):
+    """Return the clock MPERF counts at (the nominal, non-boost frequency) in kHz, or None if unknown.
+
+    cpuinfo_max_freq is not a substitute: it is the boost maximum, which would
+    overstate the effective frequency.
+    """
+    base = topology.read_sysfs(f"/sys/devices/system/cpu/cpu{cpu}/cpufreq/base_frequency")  # intel_pstate
+    if base and base.isdigit():
+        return int(base)
+    nominal = topology.read_sysfs(f"/sys/devices/system/cpu/cpu{cpu}/acpi_cppc/nominal_freq")  # MHz; amd-pstate, CPPC
+    if nominal and nominal.isdigit() and int(nominal):
+        return int(nominal) * 1000
+    # Intel model names carry the nominal clock: "... CPU @ 2.40GHz"
+    match = re.search(r"@\s*([\d.]+)\s*GHz", get_cpu_model())
+    return int(float(match.group(1)) * 1e6) if match else None
+
+def get_min_freq_share():
+    """Return MIN_FREQ_SHARE, or the share set in FREQ_SHARE_ENV.
+
+    Raises ValueError when the variable is not a number in (0, 2].
+    """
+    value = os.getenv(FREQ_SHARE_ENV, "").strip()
+    if not value:
+        return MIN_FREQ_SHARE
+    try:
+        share = float(value)
+    except ValueError:
+        share = 0
+    if not 0 < share <= 2:
+        raise ValueError(f"{FREQ_SHARE_ENV}: cannot parse {value!r} (expected a share such as 0.9)")
+    return share
+
+def read_throttle_counts(cpus):
+    """Return the summed thermal throttle counters for the given CPUs.
+
+    core_throttle_count is per core; package_throttle_count is the same counter
+    seen from every CPU of a package, so it is counted once per package.
+    """
+    total = 0
+    packages = set()
+    for cpu in cpus:
+        base = f"/sys/devices/system/cpu/cpu{cpu}"
+        value = topology.read_sysfs(f"{base}/thermal_throttle/core_throttle_count")
+        if value and value.isdigit():
+            total += int(value)
+        package = topology.read_sysfs(f"{base}/topology/physical_package_id")
+        if package in packages:
+            continue
+        packages.add(package)
+        value = topology.read_sysfs(f"{base}/thermal_throttle/package_throttle_count")
+        if value and value.isdigit():
+            total += int(value)
+    return total
+
+def read_max_thermal_zone():
+    """Return (zone type, degrees C) of the hottest thermal zone, or None."""
+    hottest = None
+    for zone in glob.glob("/sys/class/thermal/thermal_zone*"):
+        temp = topology.read_sysfs(os.path.join(zone, "temp"))
+        if not temp or not temp.lstrip("-").isdigit():
+            continue
+        celsius = int(temp) / 1000
+        if hottest is None or celsius > hottest[1]:
+            hottest = (topology.read_sysfs(os.path.join(zone, "type"), "?"), celsius)
+    return hottest
+
+@check("CPU Frequency Check", "Health")
+def check_cpu_frequency(interval=FREQ_SAMPLE_INTERVAL, min_share=None):
+    """Sample effective frequency and thermal throttling on the tile (or busiest) cores.
+
+    Effective frequency comes from APERF/MPERF deltas when /dev/cpu/*/msr is
+    readable (root with the msr module loaded) and the nominal clock MPERF
+    counts at is known, which measures the clock the core really ran at while
+    busy. Otherwise scaling_cur_freq is averaged over the window. Cores without
+    a reading are left out rather than counted as slow.
+
+    A hot core fails when it runs below min_share (default: get_min_freq_share())
+    of its nominal clock, or of scaling_max_freq where the nominal clock is
+    unknown. The boost maximum is not used: all-core turbo sits well below it
+    on a healthy, fully loaded host.
+    """
+    result = new_result(check_cpu_frequency)
+    try:
+        min_share = get_min_freq_share() if min_share is None else min_share
+    except ValueError as e:
+        result.status = Status.WARNING
+        result.message = str(e)
+        return result
+    cpus = topology.get_online_cpus()
+    reference = {}
+    target = {}
+    for cpu in cpus:
+        value = topology.read_sysfs(f"/sys/devices/system/cpu/cpu{cpu}/cpufreq/scaling_max_freq")
+        if value and value.isdigit():
+            reference[cpu] = read_reference_khz(cpu)
+            target[cpu] = reference[cpu] or int(value)
+    if not target:
+        result.status = Status.WARNING
+        result.message = "cpufreq is not available; effective frequency not checked."
+        return result
+
+    tile_cores = topology.get_tile_cores() & set(target)
+    # Without the reference clock APERF/MPERF cannot be turned into GHz
+    use_msr = read_msr_pair(cpus[0]) is not None and all(reference.values())
+
+    def sample():
+        freqs = {}
+        for cpu in target:
+            if use_msr:
+                freqs[cpu] = read_msr_pair(cpu)
+            else:
+                value = topology.read_sysfs(f"/sys/devices/system/cpu/cpu{cpu}/cpufreq/scaling_cur_freq", "0")
+                freqs[cpu] = int(value) if value.isdigit() else 0
+        return freqs, read_cpu_busy_ticks(), read_throttle_counts(target)
+
+    freq_before, busy_before, throttle_before = sample()
+    time.sleep(interval)
+    freq_after, busy_after, throttle_after = sample()
+
+    effective = {}
+    hot = set(tile_cores)
+    for cpu in target:
+        if use_msr:
+            # A core whose MSRs could not be read (or that never left idle) has no reading; skip it
+            if freq_before[cpu] and freq_after[cpu] and freq_after[cpu][1] > freq_before[cpu][1]:
+                (a0, m0), (a1, m1) = freq_before[cpu], freq_after[cpu]
+                effective[cpu] = reference[cpu] * (a1 - a0) / (m1 - m0)
+        elif freq_before[cpu] and freq_after[cpu]:
+            effective[cpu] = (freq_before[cpu] + freq_after[cpu]) / 2
+        b0, t0 = busy_before.get(cpu, (0, 0))
+        b1, t1 = busy_after.get(cpu, (0, 0))
+        if t1 > t0 and (b1 - b0) / (t1 - t0) >= HOT_CORE_BUSY:
+            hot.add(cpu)
+
+    throttle_rate = (throttle_after - throttle_before) / interval
+    if not effective:
+        result.status = Status.WARNING
+        result.message = f"Effective frequency unknown: no core could be sampled. {throttle_rate:.1f} throttle event(s)/s."
+        result.metrics = {"throttle_per_s": throttle_rate}
+        return result
+    hot &= set(effective)
+    slow = sorted(cpu for cpu in hot if effective[cpu] < min_share * target[cpu])
+    scope = sorted(hot) or sorted(effective)
+    avg_ghz = sum(effective[cpu] for cpu in scope) / len(scope) / 1e6
+    result.metrics = {"avg_ghz": avg_ghz, "throttle_per_s": throttle_rate}
+    summary = (
+        f"{'Tile' if tile_cores else 'Hot' if hot else 'All'} cores {topology.format_cpu_list(scope)} "
+        f"averaged {avg_ghz:.2f} GHz ({'APERF/MPERF' if use_msr else 'scaling_cur_freq'}), "
+        f"{throttle_rate:.1f} throttle event(s)/s"
+    )
+    zone = read_max_thermal_zone()
+    if zone:
+        summary += f", hottest zone {zone[0]} {zone[1]:.0f}C"
+
+    if slow:
+        worst = ", ".join(f"CPU {cpu}={effective[cpu] / 1e6:.2f}/{target[cpu] / 1e6:.2f} GHz" for cpu in slow[:8])
+        result.status = Status.FAIL
+        result.message = f"{len(slow)} hot core(s) below {min_share:.0%} of nominal frequency: {worst}. {summary}."
+    elif throttle_rate > 0:
+        result.status = Status.WARNING
+        result.message = f"Thermal throttling detected. {summary}."
     else:
-        result["message"] = "System does not require a reboot."
+        result.message = f"{summary}."
     return result
 
 def run_health_checks():
     """Run all health-related checks and return a list of results."""
     results = []
-    results.append(check_cpu_governor())
-    results.append(check_swap_disabled())
-    results.append(check_cpu_boost())
-    results.append(check_package_updates())
-    results.append(check_reboot_required())
+    results.append(run_check(check_cpu_governor))
+    results.append(run_check(check_swap_disabled))
+    results.append(run_check(check_cpu_boost))
+    results.append(run_check(check_cpu_frequency))
+    results.append(run_check(check_package_updates))
+    results.append(run_check(check_reboot_required))
+    results.append(run_check(check_irq_affinity))
+    results.append(run_check(check_hugepages))
+    results.append(run_check(pressure.check_pressure_stall))
+    results.append(run_check(check_validator_limits))
+    results.append(run_check(clock.check_clock_discipline))
+    results.append(run_check(rpc.check_validator_rpc))
+    results.append(run_check(storage.check_storage_inventory))
+    results.append(run_check(nvme.check_nvme_health))
     # Advanced Checks
-    # results.append(check_pstate_driver())
-    # results.append(check_ntp_sync())
+    # results.append(run_check(check_pstate_driver))
     
     return results
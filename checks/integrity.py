@@ -0,0 +1,212 @@
+# checks/integrity.py
+
+import glob
+import hashlib
+import json
+import os
+import stat
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+INTEGRITY_INDEX_PATH = os.path.join("output", "integrity_index.json")
+SSHD_PATHS = ("/etc/ssh/sshd_config", "/etc/ssh/sshd_config.d")
+SYSTEMD_UNIT_DIR = "/etc/systemd/system"
+HASH_CHUNK = 1 << 20
+
+def list_dir_files(path, suffixes=None):
+    """Return regular files and symlinks directly inside a directory (and inside *.d drop-in dirs for units)."""
+    files = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if suffixes and entry.name.endswith(".d"):
+                        files.extend(list_dir_files(entry.path, (".conf",)))
+                elif suffixes is None or entry.name.endswith(suffixes):
+                    files.append(entry.path)
+    except OSError:
+        pass
+    return files
+
+def get_watched_files():
+    """Return {path: kind} for every validator-critical file; kind selects the permission policy."""
+    watched = {}
+    consensus = topology.read_fd_table("consensus")
+    for key in ("identity_path", "vote_account_path"):
+        if consensus.get(key):
+            watched[consensus[key]] = "keypair"
+
+    fd_config = topology.get_fd_config_path()
+    watched[fd_config] = "config"
+    if os.path.islink(fd_config):
+        watched[os.path.realpath(fd_config)] = "config"
+
+    for path in SSHD_PATHS:
+        for file in (list_dir_files(path) if os.path.isdir(path) else [path]):
+            watched[file] = "config"
+
+    for path in ["/root/.ssh/authorized_keys"] + glob.glob("/home/*/.ssh/authorized_keys"):
+        watched[path] = "authorized_keys"
+
+    for path in list_dir_files(SYSTEMD_UNIT_DIR, (".service", ".socket", ".timer", ".conf")):
+        watched[path] = "config"
+    return watched
+
+def hash_file(path, st):
+    """Return the sha256 of a file, or of the link target for symlinks."""
+    if stat.S_ISLNK(st.st_mode):
+        return "link:" + os.readlink(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def permission_problem(kind, st):
+    """Return a description of unsafe permissions for this kind of file, or None."""
+    if stat.S_ISLNK(st.st_mode):
+        return None
+    mode = stat.S_IMODE(st.st_mode)
+    if kind == "keypair" and mode & 0o077:
+        return f"mode {mode:04o}, must not be group/world accessible"
+    if mode & 0o022:
+        return f"mode {mode:04o} is group/world writable"
+    return None
+
+def load_index():
+    try:
+        with open(INTEGRITY_INDEX_PATH, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def save_index(index):
+    try:
+        os.makedirs(os.path.dirname(INTEGRITY_INDEX_PATH), exist_ok=True)
+        tmp_path = INTEGRITY_INDEX_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, INTEGRITY_INDEX_PATH)
+    except Exception:
+        pass
+
+def scan(watched, index):
+    """Bring the index up to date and return (changes, permission problems, unreadable paths, rehash count).
+
+    Changes are (critical, text) pairs; a replaced or removed keypair is critical.
+
+    Each index entry is {"kind", "stat": [ino, size, mtime_ns, ctime_ns],
+    "seen": [mode, uid, gid, digest], "base": [mode, uid, gid, digest] or None}.
+    A file is only rehashed when its stat key differs from the one recorded, so
+    a steady-state cycle costs one lstat per file. "base" is the accepted state changes are reported against;
+    it is set when a file is first seen in a baseline run and only moved by accept_changes().
+    """
+    first_run = not index
+    files = index.setdefault("files", {})
+    changes, problems, unreadable, rehashed = [], [], [], 0
+
+    for path, kind in watched.items():
+        entry = files.get(path)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            if entry and entry["base"] is not None and not os.path.lexists(path):
+                changes.append((kind == "keypair", f"{path} removed"))
+            continue
+        key = [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+        if entry is None or entry["stat"] != key:
+            try:
+                digest = hash_file(path, st)
+            except OSError:
+                unreadable.append(path)
+                continue
+            rehashed += 1
+            seen = [stat.S_IMODE(st.st_mode), st.st_uid, st.st_gid, digest]
+            if entry is None:
+                entry = files[path] = {"base": seen if first_run else None}
+            entry["kind"], entry["stat"], entry["seen"] = kind, key, seen
+
+        base, seen = entry["base"], entry["seen"]
+        if base is None:
+            changes.append((False, f"{path} added"))
+        elif seen != base:
+            what = [label for label, a, b in zip(("mode", "owner", "group", "content"), base, seen) if a != b]
+            changes.append((kind == "keypair" and "content" in what, f"{path} {'/'.join(what)} changed"))
+
+        problem = permission_problem(kind, st)
+        if problem:
+            problems.append(f"{path}: {problem}")
+
+    for path in list(files):
+        if path in watched:
+            continue
+        if os.path.lexists(path):
+            del files[path]  # no longer watched, e.g. the config now points at another keypair
+        elif files[path]["base"] is not None:
+            changes.append((files[path]["kind"] == "keypair", f"{path} removed"))
+    return changes, problems, unreadable, rehashed
+
+def accept_changes(path=None):
+    """Accept the current state of path, or of every tracked file, as the new baseline. Returns the accepted paths.
+
+    path may be a file or a directory (every tracked file below it). Baselines
+    of other files are kept; removed files are dropped from the index.
+    """
+    index = load_index() or {}
+    scan(get_watched_files(), index)
+    files = index["files"]
+    if path:
+        target = os.path.abspath(path)
+        selected = [p for p in files if p == target or p.startswith(target.rstrip("/") + "/")]
+    else:
+        selected = list(files)
+    accepted = []
+    for p in selected:
+        if not os.path.lexists(p):
+            del files[p]
+        elif files[p]["base"] != files[p]["seen"]:
+            files[p]["base"] = files[p]["seen"]
+        else:
+            continue
+        accepted.append(p)
+    save_index(index)
+    return accepted
+
+@check("File Integrity Check", "Security")
+def check_file_integrity():
+    """Compare validator-critical files with the stored baseline and flag unsafe permissions.
+
+    The first run records the baseline in output/integrity_index.json. After
+    reviewing an intended change, accept it with `run_sentinel.py
+    --accept-integrity PATH` (one file or directory) or `--accept-integrity`
+    (every file); see accept_changes(). Other files keep their baseline.
+    """
+    result = new_result(check_file_integrity)
+    index = load_index() or {}
+    first_run = not index
+    try:
+        changes, problems, unreadable, rehashed = scan(get_watched_files(), index)
+    except Exception as e:
+        result.status = Status.WARNING
+        result.message = f"Could not scan watched files: {e}"
+        return result
+    save_index(index)
+
+    tracked = len(index["files"])
+    if problems or any(critical for critical, _ in changes):
+        result.status = Status.FAIL
+    elif changes:
+        result.status = Status.WARNING
+
+    parts = []
+    if problems:
+        parts.append("Unsafe permissions: " + "; ".join(problems) + ".")
+    if changes:
+        parts.append("Changed since baseline: " + "; ".join(text for _, text in changes) + ".")
+    if not parts:
+        parts.append("Baseline recorded." if first_run else "No changes since baseline.")
+    if unreadable:
+        parts.append(f"Not readable by this user: {', '.join(unreadable)}.")
+    result.message = " ".join(parts) + f" ({tracked} file(s) tracked, {rehashed} hashed this run)"
+    return result
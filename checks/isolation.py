@@ -0,0 +1,111 @@
+# checks/isolation.py
+
+import ctypes
+import os
+import platform
+import resource
+
+from checks import topology
+
+SENTINEL_CGROUP = os.path.join(topology.CGROUP_ROOT, "solsentinel")
+CPU_MAX_PERIOD = 100000  # microseconds
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_SET_SYSCALL = {"x86_64": 251, "aarch64": 30}
+LOWEST_PRIORITY_NICE = 19
+
+def get_isolated_cpus():
+    """Return CPUs removed from general scheduling (isolcpus= and nohz_full=)."""
+    cpus = set()
+    for path in ("/sys/devices/system/cpu/isolated", "/sys/devices/system/cpu/nohz_full"):
+        value = topology.read_sysfs(path, "")
+        if value and value != "(null)":
+            cpus.update(topology.parse_cpu_list(value))
+    return cpus
+
+def get_validator_cpus(pid=None):
+    """Return CPUs the validator occupies: configured tile cores plus any CPU a validator thread is pinned to alone."""
+    cpus = set(topology.get_tile_cores())
+    pid = pid or topology.find_validator_pid()
+    if pid is None:
+        return cpus
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return cpus
+    for tid in tids:
+        status = topology.read_sysfs(f"/proc/{pid}/task/{tid}/status", "")
+        for line in status.splitlines():
+            if line.startswith("Cpus_allowed_list:"):
+                allowed = topology.parse_cpu_list(line.split(":", 1)[1])
+                if len(allowed) == 1:
+                    cpus.update(allowed)
+                break
+    return cpus
+
+def get_housekeeping_cpus():
+    """Return the CPUs the sentinel may use: online, not isolated and not used by the validator.
+
+    Falls back to the non-isolated CPUs if the validator appears to use all of them.
+    """
+    online = set(topology.get_online_cpus())
+    general = online - get_isolated_cpus()
+    housekeeping = general - get_validator_cpus()
+    return housekeeping or general or online
+
+def set_idle_io_priority():
+    """Put this process in the idle IO class (ioprio_set has no libc wrapper). Returns True on success."""
+    syscall_nr = IOPRIO_SET_SYSCALL.get(platform.machine())
+    if syscall_nr is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    return libc.syscall(syscall_nr, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0
+
+def join_budget_cgroup(cpu_percent):
+    """Move this process into a dedicated cgroup capped at cpu_percent of one CPU. Returns True on success."""
+    try:
+        os.makedirs(SENTINEL_CGROUP, exist_ok=True)
+        quota = max(int(CPU_MAX_PERIOD * cpu_percent / 100), 1000)
+        with open(os.path.join(SENTINEL_CGROUP, "cpu.max"), "w") as f:
+            f.write(f"{quota} {CPU_MAX_PERIOD}")
+        with open(os.path.join(SENTINEL_CGROUP, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    except OSError:
+        return False
+
+def apply_low_footprint(cpu_percent=None):
+    """Confine the sentinel to housekeeping CPUs with the lowest CPU and IO priority.
+
+    Affinity, nice and ioprio are inherited across fork/exec, so every child we
+    spawn (apt, dpkg, systemctl, ...) stays off the validator's cores too. Call
+    this before starting any threads. With cpu_percent the process also joins a
+    cgroup with a cpu.max budget. Returns a dict describing what was applied.
+    """
+    applied = {}
+    cpus = get_housekeeping_cpus()
+    try:
+        os.sched_setaffinity(0, cpus)
+        applied["cpus"] = topology.format_cpu_list(cpus)
+    except OSError as e:
+        applied["cpus"] = f"unchanged ({e})"
+    try:
+        applied["nice"] = os.nice(LOWEST_PRIORITY_NICE - os.nice(0))
+    except OSError:
+        applied["nice"] = os.nice(0)
+    applied["io_priority"] = "idle" if set_idle_io_priority() else "unchanged"
+    if cpu_percent:
+        applied["cpu_budget"] = f"{cpu_percent}%" if join_budget_cgroup(cpu_percent) else "unavailable"
+    return applied
+
+def get_own_usage():
+    """Return the sentinel's own CPU time and peak RSS (self and waited-for children)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu_seconds": round(own.ru_utime + own.ru_stime, 3),
+        "children_cpu_seconds": round(children.ru_utime + children.ru_stime, 3),
+        "peak_rss_kb": own.ru_maxrss,
+        "children_peak_rss_kb": children.ru_maxrss,
+    }
@@ -0,0 +1,156 @@
+# checks/nic.py
+
+import ctypes
+import errno
+import fcntl
+import os
+import socket
+import struct
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+SIOCETHTOOL = 0x8946
+ETHTOOL_GCOALESCE = 0x0000000e
+ETHTOOL_GRINGPARAM = 0x00000010
+ETHTOOL_GFLAGS = 0x00000025
+ETHTOOL_GGRO = 0x0000002b
+ETHTOOL_GCHANNELS = 0x0000003c
+ETH_FLAG_LRO = 1 << 15
+
+# Target settings per driver; "default" applies to drivers without an entry.
+# Firedancer's own `fdctl configure` disables GRO and sizes combined channels
+# to the number of net tiles, so those are checked for every driver.
+DRIVER_PROFILES = {
+    "default": {"rx_ring": "max", "tx_ring": "max", "gro": False, "lro": False, "adaptive_rx": None},
+    "mlx5_core": {"rx_ring": "max", "tx_ring": "max", "gro": False, "lro": False, "adaptive_rx": False},
+    "ice": {"rx_ring": "max", "tx_ring": "max", "gro": False, "lro": False, "adaptive_rx": False},
+    "ixgbe": {"rx_ring": "max", "tx_ring": "max", "gro": False, "lro": False, "adaptive_rx": None},
+}
+
+_sock = None
+
+def ethtool_ioctl(iface, cmd, nwords):
+    """Issue an ETHTOOL get command and return its reply as a tuple of u32 words (cmd excluded).
+
+    Returns None when the driver does not implement the command.
+    """
+    global _sock
+    if _sock is None:
+        _sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    buf = ctypes.create_string_buffer(struct.pack("I", cmd) + bytes(4 * nwords))
+    ifreq = struct.pack("16sP", iface.encode()[:15], ctypes.addressof(buf))
+    try:
+        fcntl.ioctl(_sock.fileno(), SIOCETHTOOL, ifreq)
+    except OSError as e:
+        if e.errno in (errno.EOPNOTSUPP, errno.EINVAL):
+            return None
+        raise
+    return struct.unpack(f"{nwords}I", buf.raw[4:4 + 4 * nwords])
+
+def get_traffic_interface():
+    """Return the interface carrying gossip/TPU traffic: [net] interface from the Firedancer config, else the default route."""
+    iface = topology.read_fd_table("net").get("interface")
+    if iface:
+        return iface
+    try:
+        with open("/proc/net/route", "r") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if fields[1] == "00000000" and int(fields[3], 16) & 0x2:
+                    return fields[0]
+    except Exception:
+        pass
+    return None
+
+def read_nic_settings(iface):
+    """Read ring, channel, coalescing and offload settings for one interface."""
+    settings = {}
+    link = os.path.join("/sys/class/net", iface, "device", "driver")
+    settings["driver"] = os.path.basename(os.readlink(link)) if os.path.islink(link) else None
+
+    ring = ethtool_ioctl(iface, ETHTOOL_GRINGPARAM, 8)
+    if ring:
+        settings["rx_ring"], settings["rx_ring_max"] = ring[4], ring[0]
+        settings["tx_ring"], settings["tx_ring_max"] = ring[7], ring[3]
+
+    channels = ethtool_ioctl(iface, ETHTOOL_GCHANNELS, 8)
+    if channels:
+        settings["combined"], settings["combined_max"] = channels[7], channels[3]
+    else:
+        # Fall back to the queue directories sysfs always exposes.
+        try:
+            settings["combined"] = sum(1 for q in os.listdir(f"/sys/class/net/{iface}/queues") if q.startswith("rx-"))
+        except OSError:
+            pass
+
+    coalesce = ethtool_ioctl(iface, ETHTOOL_GCOALESCE, 22)
+    if coalesce:
+        settings["rx_usecs"] = coalesce[0]
+        settings["adaptive_rx"] = bool(coalesce[9])
+
+    gro = ethtool_ioctl(iface, ETHTOOL_GGRO, 1)
+    if gro:
+        settings["gro"] = bool(gro[0])
+    flags = ethtool_ioctl(iface, ETHTOOL_GFLAGS, 1)
+    if flags:
+        settings["lro"] = bool(flags[0] & ETH_FLAG_LRO)
+    return settings
+
+def compare_to_profile(settings, profile, net_tiles=None):
+    """Return a list of human-readable deviations from the target profile."""
+    deviations = []
+    for ring in ("rx_ring", "tx_ring"):
+        target = profile.get(ring)
+        if target is None or ring not in settings:
+            continue
+        wanted = settings[f"{ring}_max"] if target == "max" else target
+        if settings[ring] < wanted:
+            deviations.append(f"{ring.replace('_', ' ')} {settings[ring]} (want {wanted})")
+    for flag in ("gro", "lro", "adaptive_rx"):
+        target = profile.get(flag)
+        if target is None or flag not in settings:
+            continue
+        if settings[flag] != target:
+            deviations.append(f"{flag} {'on' if settings[flag] else 'off'} (want {'on' if target else 'off'})")
+    if net_tiles and "combined" in settings and settings["combined"] != net_tiles:
+        deviations.append(f"{settings['combined']} combined channel(s) (want {net_tiles}, one per net tile)")
+    return deviations
+
+@check("NIC Configuration Check", "Configuration (NIC)")
+def check_nic_config(iface=None):
+    """Compare the traffic NIC's rings, channels, coalescing and offloads with the driver's target profile.
+
+    Uses SIOCETHTOOL ioctls on one cached socket instead of forking ethtool, so
+    it is cheap enough for every daemon cycle.
+    """
+    result = new_result(check_nic_config)
+    iface = iface or get_traffic_interface()
+    if not iface:
+        result.status = Status.WARNING
+        result.message = "Could not determine the gossip/TPU interface."
+        return result
+    try:
+        settings = read_nic_settings(iface)
+    except OSError as e:
+        result.status = Status.WARNING
+        result.message = f"Could not query {iface}: {e}"
+        return result
+
+    driver = settings.get("driver")
+    profile = DRIVER_PROFILES.get(driver, DRIVER_PROFILES["default"])
+    net_tiles = topology.read_fd_layout().get("net_tile_count")
+    deviations = compare_to_profile(settings, profile, int(net_tiles) if net_tiles and net_tiles.isdigit() else None)
+
+    summary = f"{iface} ({driver or 'virtual'})"
+    if "rx_ring" in settings:
+        summary += f" rx ring {settings['rx_ring']}/{settings['rx_ring_max']}"
+    if "combined" in settings:
+        summary += f", {settings['combined']} channel(s)"
+    if deviations:
+        result.status = Status.FAIL
+        result.message = f"{summary}: " + "; ".join(deviations) + "."
+    else:
+        result.message = f"{summary} matches the {driver if driver in DRIVER_PROFILES else 'default'} profile."
+    return result
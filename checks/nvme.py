@@ -0,0 +1,192 @@
+# checks/nvme.py
+
+import ctypes
+import fcntl
+import glob
+import os
+import re
+import time
+
+from checks import storage, topology
+from checks.result import Status, check, new_result
+
+NVME_IOCTL_ADMIN_CMD = 0xC0484E41
+NVME_ADMIN_GET_LOG_PAGE = 0x02
+NVME_LOG_SMART = 0x02
+NVME_NSID_ALL = 0xFFFFFFFF
+SMART_LOG_LEN = 512
+SMART_TTL = 600               # seconds a controller's SMART data is reused
+
+WARN_PERCENT_USED = 80
+FAIL_PERCENT_USED = 95
+WARN_TEMPERATURE_C = 70
+CRITICAL_WARNING_BITS = {
+    0x01: "spare below threshold",
+    0x02: "temperature threshold",
+    0x04: "reliability degraded",
+    0x08: "read-only",
+    0x10: "volatile backup failed",
+    0x20: "persistent memory read-only",
+}
+
+# controller -> (timestamp, health dict)
+_smart_cache = {}
+
+class NvmePassthruCmd(ctypes.Structure):
+    """struct nvme_passthru_cmd from <linux/nvme_ioctl.h> (72 bytes)."""
+    _fields_ = [
+        ("opcode", ctypes.c_uint8),
+        ("flags", ctypes.c_uint8),
+        ("rsvd1", ctypes.c_uint16),
+        ("nsid", ctypes.c_uint32),
+        ("cdw2", ctypes.c_uint32),
+        ("cdw3", ctypes.c_uint32),
+        ("metadata", ctypes.c_uint64),
+        ("addr", ctypes.c_uint64),
+        ("metadata_len", ctypes.c_uint32),
+        ("data_len", ctypes.c_uint32),
+        ("cdw10", ctypes.c_uint32),
+        ("cdw11", ctypes.c_uint32),
+        ("cdw12", ctypes.c_uint32),
+        ("cdw13", ctypes.c_uint32),
+        ("cdw14", ctypes.c_uint32),
+        ("cdw15", ctypes.c_uint32),
+        ("timeout_ms", ctypes.c_uint32),
+        ("result", ctypes.c_uint32),
+    ]
+
+def get_block_devices(path):
+    """Return the physical block device names (e.g. nvme0n1) backing a path, resolving partitions and dm/md slaves."""
+    st = os.stat(path)
+    stack = [os.path.realpath(f"/sys/dev/block/{os.major(st.st_dev)}:{os.minor(st.st_dev)}")]
+    disks = set()
+    while stack:
+        node = stack.pop()
+        slaves = glob.glob(os.path.join(node, "slaves", "*"))
+        if slaves:
+            stack.extend(os.path.realpath(s) for s in slaves)
+        elif os.path.exists(os.path.join(node, "partition")):
+            disks.add(os.path.basename(os.path.dirname(node)))
+        elif os.path.isdir(node):
+            disks.add(os.path.basename(node))
+    return disks
+
+def get_nvme_controller(disk):
+    """Return the controller (e.g. nvme0) of an NVMe namespace, or None for other devices."""
+    if not disk.startswith("nvme"):
+        return None
+    device = os.path.realpath(f"/sys/block/{disk}/device")
+    if re.fullmatch(r"nvme\d+", os.path.basename(device)):
+        return os.path.basename(device)
+    # Native multipath namespaces point at the subsystem, which lists its controllers.
+    controllers = sorted(c for c in os.listdir(device) if re.fullmatch(r"nvme\d+", c)) if os.path.isdir(device) else []
+    return controllers[0] if controllers else None
+
+def le_int(data, start, length):
+    return int.from_bytes(data[start:start + length], "little")
+
+def read_smart_log(controller):
+    """Fetch the SMART/health log page through the admin passthrough ioctl (needs CAP_SYS_ADMIN)."""
+    buf = ctypes.create_string_buffer(SMART_LOG_LEN)
+    cmd = NvmePassthruCmd(
+        opcode=NVME_ADMIN_GET_LOG_PAGE,
+        nsid=NVME_NSID_ALL,
+        addr=ctypes.addressof(buf),
+        data_len=SMART_LOG_LEN,
+        cdw10=((SMART_LOG_LEN // 4 - 1) << 16) | NVME_LOG_SMART,
+    )
+    fd = os.open(f"/dev/{controller}", os.O_RDONLY)
+    try:
+        fcntl.ioctl(fd, NVME_IOCTL_ADMIN_CMD, cmd)
+    finally:
+        os.close(fd)
+    data = buf.raw
+    return {
+        "source": "smart",
+        "critical_warning": data[0],
+        "temperature_c": le_int(data, 1, 2) - 273,
+        "available_spare": data[3],
+        "percent_used": data[5],
+        "power_on_hours": le_int(data, 128, 16),
+        "unsafe_shutdowns": le_int(data, 144, 16),
+        "media_errors": le_int(data, 160, 16),
+    }
+
+def read_hwmon_temperature(controller):
+    """Return the composite temperature from the controller's hwmon node, or None."""
+    for path in glob.glob(f"/sys/class/nvme/{controller}/hwmon*/temp1_input") + glob.glob(f"/sys/class/nvme/{controller}/device/hwmon/hwmon*/temp1_input"):
+        value = topology.read_sysfs(path)
+        if value and value.lstrip("-").isdigit():
+            return int(value) // 1000
+    return None
+
+def get_drive_health(controller, ttl=SMART_TTL):
+    """Return SMART data for a controller, reusing results younger than ttl; falls back to hwmon temperature."""
+    cached = _smart_cache.get(controller)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    try:
+        health = read_smart_log(controller)
+    except OSError:
+        health = {"source": "hwmon", "temperature_c": read_hwmon_temperature(controller)}
+    _smart_cache[controller] = (time.monotonic(), health)
+    return health
+
+@check("NVMe Health Check", "Health")
+def check_nvme_health(roots=None):
+    """Report wear, media errors, critical warnings, temperature and unsafe shutdowns of the ledger NVMe drives."""
+    result = new_result(check_nvme_health)
+    roots = roots or storage.get_scan_roots()
+    controllers = {}
+    for root in roots:
+        try:
+            disks = get_block_devices(root)
+        except OSError:
+            continue
+        for disk in disks:
+            controller = get_nvme_controller(disk)
+            if controller:
+                controllers.setdefault(controller, set()).add(root)
+    if not controllers:
+        result.status = Status.SKIPPED
+        result.message = f"No NVMe devices found behind {', '.join(roots) or 'the ledger paths'}."
+        return result
+
+    problems, warnings, details = [], [], []
+    for controller, mounts in sorted(controllers.items()):
+        health = get_drive_health(controller)
+        label = f"{controller} ({', '.join(sorted(mounts))})"
+        temperature = health.get("temperature_c")
+        if temperature is not None:
+            result.metrics[f"{controller}_temperature_c"] = temperature
+        if health["source"] != "smart":
+            details.append(f"{label}: {temperature if temperature is not None else '?'}C, SMART log needs root")
+        else:
+            result.metrics[f"{controller}_percent_used"] = health["percent_used"]
+            result.metrics[f"{controller}_media_errors"] = health["media_errors"]
+            flags = [text for bit, text in CRITICAL_WARNING_BITS.items() if health["critical_warning"] & bit]
+            if flags:
+                problems.append(f"{controller} critical warning: {', '.join(flags)}")
+            if health["media_errors"]:
+                problems.append(f"{controller} has {health['media_errors']} media error(s)")
+            if health["percent_used"] >= FAIL_PERCENT_USED:
+                problems.append(f"{controller} is {health['percent_used']}% worn")
+            elif health["percent_used"] >= WARN_PERCENT_USED:
+                warnings.append(f"{controller} is {health['percent_used']}% worn")
+            details.append(
+                f"{label}: {health['percent_used']}% used, {health['available_spare']}% spare, "
+                f"{temperature}C, {health['media_errors']} media errors, {health['unsafe_shutdowns']} unsafe shutdowns"
+            )
+        if temperature is not None and temperature >= WARN_TEMPERATURE_C:
+            warnings.append(f"{controller} at {temperature}C")
+
+    summary = "; ".join(details)
+    if problems:
+        result.status = Status.FAIL
+        result.message = "; ".join(problems + warnings) + f". {summary}."
+    elif warnings:
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings) + f". {summary}."
+    else:
+        result.message = f"{summary}."
+    return result
@@ -0,0 +1,234 @@
+# checks/pressure.py
+
+import datetime
+import os
+import select
+import threading
+import time
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+PSI_RESOURCES = ("cpu", "memory", "io")
+PSI_SAMPLE_INTERVAL = 1.0  # fallback sampling period, one-shot window and kernel trigger window, seconds
+PSI_MAX_EVENTS = 1000      # events kept per report window
+PSI_WARN_SOME_PCT = 10.0   # share of the window in which some tasks stalled
+PSI_FAIL_FULL_PCT = 5.0    # share of the window in which all non-idle tasks stalled
+# Kernel trigger derived from the same threshold, so a daemon event means exactly what a
+# one-shot WARNING means: some tasks stalled PSI_WARN_SOME_PCT of a PSI_SAMPLE_INTERVAL window.
+PSI_TRIGGER_WINDOW_US = int(PSI_SAMPLE_INTERVAL * 1e6)
+PSI_TRIGGER_STALL_US = int(PSI_TRIGGER_WINDOW_US * PSI_WARN_SOME_PCT / 100)
+PSI_TRIGGER = f"some {PSI_TRIGGER_STALL_US} {PSI_TRIGGER_WINDOW_US}"
+
+def read_psi(path):
+    """Parse a PSI file into {"some": {"avg10": float, ..., "total": int}, "full": {...}}."""
+    psi = {}
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            values = {}
+            for field in parts[1:]:
+                key, _, value = field.partition("=")
+                values[key] = int(value) if key == "total" else float(value)
+            psi[parts[0]] = values
+    return psi
+
+def get_psi_sources():
+    """Return {label: path} for the system-wide and validator-cgroup PSI files that exist."""
+    sources = {}
+    for resource in PSI_RESOURCES:
+        path = f"/proc/pressure/{resource}"
+        if os.path.exists(path):
+            sources[resource] = path
+    pid = topology.find_validator_pid()
+    cgroup_dir = topology.get_cgroup_dir(pid) if pid else None
+    if cgroup_dir:
+        for resource in PSI_RESOURCES:
+            path = os.path.join(cgroup_dir, f"{resource}.pressure")
+            if os.path.exists(path):
+                sources[f"validator {resource}"] = path
+    return sources
+
+def read_totals(sources):
+    """Return {label: {"some": total_us, "full": total_us}} for every readable source."""
+    totals = {}
+    for label, path in sources.items():
+        try:
+            psi = read_psi(path)
+        except Exception:
+            continue
+        totals[label] = {kind: values.get("total", 0) for kind, values in psi.items()}
+    return totals
+
+class PressureMonitor:
+    """Background PSI monitor for daemon mode.
+
+    Registers a kernel poll trigger on every PSI file so the thread sleeps in
+    poll() until the kernel reports a stall. Sources that reject the trigger
+    (kernels before 5.2, unprivileged users, kernels built without PSI triggers)
+    are sampled every PSI_SAMPLE_INTERVAL seconds instead.
+    """
+
+    def __init__(self, sources=None, trigger=PSI_TRIGGER):
+        self.sources = sources if sources is not None else get_psi_sources()
+        self.trigger = trigger
+        self.events = []
+        self.triggered = {}
+        self.sampled = {}
+        self.window_start = time.time()
+        self.window_totals = read_totals(self.sources)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _register_triggers(self):
+        for label, path in self.sources.items():
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            except OSError:
+                self.sampled[label] = path
+                continue
+            try:
+                os.write(fd, self.trigger.encode() + b"\0")
+                self.triggered[fd] = label
+            except OSError:
+                os.close(fd)
+                self.sampled[label] = path
+
+    def _record(self, label, stall_us=None):
+        event = {"time": datetime.datetime.utcnow().isoformat() + "Z", "source": label}
+        if stall_us is not None:
+            event["stall_ms"] = round(stall_us / 1000, 1)
+        with self._lock:
+            if len(self.events) < PSI_MAX_EVENTS:
+                self.events.append(event)
+
+    def _run(self):
+        poller = select.poll()
+        for fd in self.triggered:
+            poller.register(fd, select.POLLPRI)
+        last = read_totals(self.sampled)
+        # With no sampled sources, wake only to notice stop requests.
+        timeout_ms = int(PSI_SAMPLE_INTERVAL * 1000) if self.sampled else 5000
+        while not self._stop.is_set():
+            for fd, mask in poller.poll(timeout_ms):
+                if mask & select.POLLERR:
+                    # The monitored cgroup went away (e.g. validator restart).
+                    poller.unregister(fd)
+                    os.close(fd)
+                    self.triggered.pop(fd, None)
+                elif mask & select.POLLPRI:
+                    self._record(self.triggered[fd])
+            if self.sampled:
+                current = read_totals(self.sampled)
+                for label, totals in current.items():
+                    delta = totals.get("some", 0) - last.get(label, {}).get("some", 0)
+                    if delta >= PSI_TRIGGER_STALL_US:
+                        self._record(label, delta)
+                last = current
+
+    def start(self):
+        self._register_triggers()
+        self._thread = threading.Thread(target=self._run, name="psi-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        for fd in list(self.triggered):
+            os.close(fd)
+        self.triggered.clear()
+
+    def collect(self):
+        """Return (events, stall totals, window seconds) since the last collect and start a new window."""
+        now = time.time()
+        totals = read_totals(self.sources)
+        with self._lock:
+            events, self.events = self.events, []
+        window = now - self.window_start
+        deltas = diff_totals(self.window_totals, totals)
+        self.window_start, self.window_totals = now, totals
+        return events, deltas, window
+
+def diff_totals(before, after):
+    """Return {label: {"some": us, "full": us}} stall time accumulated between two snapshots."""
+    return {
+        label: {kind: total - before.get(label, {}).get(kind, 0) for kind, total in totals.items()}
+        for label, totals in after.items()
+        if label in before
+    }
+
+_monitor = None
+
+def start_monitor():
+    """Start the process-wide PSI monitor used by check_pressure_stall in daemon mode."""
+    global _monitor
+    if _monitor is None:
+        _monitor = PressureMonitor()
+        _monitor.start()
+    return _monitor
+
+def stop_monitor():
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+
+@check("Pressure Stall Check", "Health")
+def check_pressure_stall():
+    """Report CPU, memory and IO pressure-stall time for the host and the validator cgroup.
+
+    In daemon mode the window is the time since the previous cycle and stall
+    events come from the background monitor; otherwise a short sample is taken.
+    """
+    result = new_result(check_pressure_stall)
+    if _monitor is not None:
+        events, deltas, window = _monitor.collect()
+        mode = "triggers" if _monitor.triggered else "sampling"
+    else:
+        sources = get_psi_sources()
+        if not sources:
+            result.status = Status.WARNING
+            result.message = "PSI is not available (kernel without CONFIG_PSI or psi=0)."
+            return result
+        before = read_totals(sources)
+        time.sleep(PSI_SAMPLE_INTERVAL)
+        deltas = diff_totals(before, read_totals(sources))
+        events, window, mode = [], PSI_SAMPLE_INTERVAL, "sample"
+
+    if not deltas:
+        result.status = Status.WARNING
+        result.message = "PSI is not available (kernel without CONFIG_PSI or psi=0)."
+        return result
+
+    window_us = max(window, 1e-6) * 1e6
+    failures = []
+    warnings = []
+    parts = []
+    for label, stalls in deltas.items():
+        some_pct = stalls.get("some", 0) / window_us * 100
+        full_pct = stalls.get("full", 0) / window_us * 100
+        result.metrics[f"{label}_some_pct"] = some_pct
+        parts.append(f"{label} some {stalls.get('some', 0) / 1000:.0f}ms/full {stalls.get('full', 0) / 1000:.0f}ms")
+        # System-wide cpu "full" is not meaningful (always 0 or undefined).
+        if full_pct >= PSI_FAIL_FULL_PCT and label != "cpu":
+            failures.append(f"{label} fully stalled {full_pct:.1f}% of the time")
+        elif some_pct >= PSI_WARN_SOME_PCT:
+            warnings.append(f"{label} partially stalled {some_pct:.1f}% of the time")
+
+    summary = f"Stall time over {window:.0f}s ({mode}): " + ", ".join(parts)
+    if events:
+        summary += f". {len(events)} stall event(s), last at {events[-1]['time']} ({events[-1]['source']})"
+    if failures:
+        result.status = Status.FAIL
+        result.message = "; ".join(failures) + ". " + summary
+    elif warnings or events:
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings + [summary])
+    else:
+        result.message = summary
+    result.details["events"] = events
+    return result
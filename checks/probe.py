@@ -0,0 +1,149 @@
+# checks/probe.py
+
+import os
+import shutil
+import time
+
+from checks import deadline
+
+# Facts that cannot change while the host is up (binary locations, package
+# manager, init system, os-release) survive across daemon cycles this long.
+STATIC_TTL = 3600
+PACKAGE_MANAGERS = ("apt", "dnf", "yum", "pacman", "zypper")
+COMMAND_TIMEOUT = 30
+
+# key -> (expiry or None for run-scoped, value)
+_facts = {}
+# path -> ((st_ino, st_size, st_mtime_ns), content)
+_files = {}
+_stats = {"hits": 0, "misses": 0, "forks": 0}
+
+def begin_run():
+    """Start a new run: drop run-scoped facts and reset the counters. Static facts are kept until their TTL expires."""
+    now = time.monotonic()
+    for key in [k for k, (expiry, _) in list(_facts.items()) if expiry is None or expiry <= now]:
+        _facts.pop(key, None)
+    for counter in _stats:
+        _stats[counter] = 0
+
+def get_stats():
+    """Return hit/miss/fork counts for the current run."""
+    return dict(_stats)
+
+def fact(key, compute, ttl=None):
+    """Return the memoised value of a named fact, computing it on first use. ttl=None keeps it for this run only."""
+    entry = _facts.get(key)
+    if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+        _stats["hits"] += 1
+        return entry[1]
+    _stats["misses"] += 1
+    value = compute()
+    _facts[key] = (None if ttl is None else time.monotonic() + ttl, value)
+    return value
+
+def forget(key):
+    """Drop one memoised fact, e.g. after the remediation engine changed it."""
+    _facts.pop(key, None)
+
+def which(name):
+    """Cached shutil.which."""
+    return fact(("which", name), lambda: shutil.which(name), STATIC_TTL)
+
+def package_manager():
+    """Return the first available package manager of PACKAGE_MANAGERS, or None."""
+    return fact("package_manager", lambda: next((pm for pm in PACKAGE_MANAGERS if which(pm)), None), STATIC_TTL)
+
+def init_system():
+    """Return "systemd" when systemd is PID 1 and systemctl is available, else the name of PID 1."""
+    def compute():
+        if os.path.isdir("/run/systemd/system") and which("systemctl"):
+            return "systemd"
+        try:
+            with open("/proc/1/comm", "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    return fact("init_system", compute, STATIC_TTL)
+
+def os_release():
+    """Return /etc/os-release as a dict."""
+    def compute():
+        values = {}
+        for line in (read_file("/etc/os-release") or "").splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                values[key.strip()] = value.strip().strip('"')
+        return values
+    return fact("os_release", compute, STATIC_TTL)
+
+def run(cmd, timeout=COMMAND_TIMEOUT):
+    """Run a read-only command once per run and return its CompletedProcess (text mode).
+
+    Only for commands that report state (systemctl is-active, dpkg -l, ...),
+    never for commands with side effects. Raises like subprocess.run on the
+    first call; the failure is not cached.
+    """
+    def compute():
+        _stats["forks"] += 1
+        return deadline.run(cmd, timeout=timeout)
+    return fact(("run", tuple(cmd)), compute)
+
+def unit_state(unit, query="is-active"):
+    """Return the output of `systemctl is-active|is-enabled <unit>`, or "" without systemd."""
+    if init_system() != "systemd":
+        return ""
+    return run(["systemctl", query, unit]).stdout.strip()
+
+def process_table():
+    """Return [(pid, comm, cmdline)] for every process, read from /proc instead of forking ps."""
+    def compute():
+        table = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/comm", "r") as f:
+                    comm = f.read().strip()
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+            except OSError:
+                continue
+            table.append((int(entry), comm, cmdline))
+        return table
+    return fact("process_table", compute)
+
+def read_file(path):
+    """Return a regular text file's content, or None if unreadable.
+
+    Content is reused while the file's inode, size and mtime are unchanged, so
+    repeated reads within and across runs cost one stat. Not for /proc or
+    sysfs, whose size and mtime do not track changes.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        _stats["misses"] += 1
+        return None
+    key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    cached = _files.get(path)
+    if cached and cached[0] == key:
+        _stats["hits"] += 1
+        return cached[1]
+    _stats["misses"] += 1
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    _files[path] = (key, content)
+    return content
+
+def sysctl(param):
+    """Return a kernel parameter from /proc/sys (the value `sysctl -n` prints), or None. Run-scoped."""
+    def compute():
+        try:
+            with open(os.path.join("/proc/sys", param.replace(".", "/")), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    return fact(("sysctl", param), compute)
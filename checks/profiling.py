@@ -0,0 +1,122 @@
+# checks/profiling.py
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = os.path.join("output", "profile")
+SAMPLE_INTERVAL_MS = 5        # wall-clock stack sampling period; 0 disables the sampler
+TOP_ALLOCATIONS = 15
+
+# Set by enable(); None means profiling is off and call() is a plain function call
+_session = None
+
+def enable(sample_ms=SAMPLE_INTERVAL_MS, top=TOP_ALLOCATIONS, directory=PROFILE_DIR):
+    """Turn on per-call profiling for every check run through run_check and for call() sites."""
+    global _session
+    os.makedirs(directory, exist_ok=True)
+    tracemalloc.start()
+    _session = {"sample_ms": sample_ms, "top": top, "dir": directory, "summary": {}}
+
+def disable():
+    """Stop profiling, write summary.json (slowest first) and return its path."""
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return None
+    tracemalloc.stop()
+    path = os.path.join(session["dir"], "summary.json")
+    ordered = sorted(session["summary"].values(), key=lambda entry: entry["wall_ms"], reverse=True)
+    with open(path, "w") as f:
+        json.dump(ordered, f, indent=2)
+    return path
+
+def get_summary():
+    return sorted(_session["summary"].values(), key=lambda entry: entry["wall_ms"], reverse=True) if _session else []
+
+def frame_stack(frame):
+    """Collapsed-stack key (';'-separated file:function, outermost first) for a frame, rooted at the profiled function."""
+    names = []
+    while frame is not None and frame.f_code is not call.__code__:
+        names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def sample_stacks(ident, interval, stop, counts):
+    """Sampler thread body: count the target thread's stack every interval seconds until stop is set."""
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(ident)
+        if frame is not None:
+            key = frame_stack(frame)
+            counts[key] = counts.get(key, 0) + 1
+
+def call(label, func, *args, **kwargs):
+    """Call func; when profiling is on, record cProfile stats, wall-clock stacks and allocations for it under label.
+
+    Writes <label>.pstats (pstats/snakeviz), <label>.folded (collapsed stacks for
+    flamegraph.pl/speedscope, one sample per interval, so time spent waiting on
+    subprocesses or IO shows up too) and <label>.alloc.txt (top allocation
+    sites by size growth during the call).
+    """
+    session = _session
+    if session is None:
+        return func(*args, **kwargs)
+
+    counts = {}
+    stop = threading.Event()
+    sampler = None
+    if session["sample_ms"] > 0:
+        sampler = threading.Thread(target=sample_stacks, args=(threading.get_ident(), session["sample_ms"] / 1000, stop, counts), daemon=True)
+        sampler.start()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is still active (a check abandoned at its deadline)
+        profiler = None
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+        if profiler is not None:
+            profiler.disable()
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+        diff = []
+        # Tracing stops when the session ends; a check abandoned at its deadline can finish after that
+        if tracemalloc.is_tracing():
+            after = tracemalloc.take_snapshot()
+            # Leave out the snapshots' own bookkeeping
+            own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            diff = after.filter_traces(own).compare_to(before.filter_traces(own), "lineno")
+        write_profile(session, label, profiler, counts, diff, wall, cpu)
+
+def write_profile(session, label, profiler, counts, alloc_diff, wall, cpu):
+    base = os.path.join(session["dir"], re.sub(r"[^\w.-]+", "_", label))
+    if profiler is not None:
+        profiler.dump_stats(base + ".pstats")
+    if counts:
+        with open(base + ".folded", "w") as f:
+            for stack, count in sorted(counts.items()):
+                f.write(f"{stack} {count}\n")
+    top = [stat for stat in alloc_diff if stat.size_diff > 0][:session["top"]]
+    with open(base + ".alloc.txt", "w") as f:
+        for stat in top:
+            frame = stat.traceback[0]
+            f.write(f"{stat.size_diff / 1024:10.1f} KiB {stat.count_diff:+8d} blocks  {frame.filename}:{frame.lineno}\n")
+    session["summary"][label] = {
+        "label": label,
+        "wall_ms": round(wall * 1000, 3),
+        # Off-CPU time of the calling thread: subprocess waits, IO, sleeps and network
+        "cpu_ms": round(cpu * 1000, 3),
+        "wait_ms": round(max(wall - cpu, 0) * 1000, 3),
+        "alloc_kib": round(sum(stat.size_diff for stat in alloc_diff) / 1024, 1),
+        "samples": sum(counts.values()),
+    }
@@ -0,0 +1,143 @@
+# checks/remediate.py
+
+import difflib
+import os
+import time
+
+from checks import config, health, probe, topology
+from checks.result import Status, run_check
+
+SYSCTL_DROPIN = "/etc/sysctl.d/90-solsentinel.conf"
+CPU_SYSFS = "/sys/devices/system/cpu"
+TARGET_GOVERNOR = "performance"
+
+def sysctl_path(param):
+    return os.path.join("/proc/sys", param.replace(".", "/"))
+
+def sysctl_fix(param):
+    """Return the fix setting one checked sysctl to its expected value."""
+    target = config.expected_sysctls()[param][0]
+    return {"kind": "sysctl", "key": param, "current": probe.sysctl(param), "target": target, "check": f"Sysctl {param}"}
+
+def governor_plan():
+    """Return a fix for every online CPU whose cpufreq governor is not TARGET_GOVERNOR (and could be)."""
+    plan = []
+    for cpu in topology.get_online_cpus():
+        base = f"{CPU_SYSFS}/cpu{cpu}/cpufreq"
+        current = topology.read_sysfs(f"{base}/scaling_governor")
+        available = topology.read_sysfs(f"{base}/scaling_available_governors", "").split()
+        if current is not None and current != TARGET_GOVERNOR and TARGET_GOVERNOR in available:
+            plan.append({"kind": "governor", "key": f"cpu{cpu}", "current": current, "target": TARGET_GOVERNOR, "check": "CPU Governor Check"})
+    return plan
+
+def build_plan(results):
+    """Turn failing results into a list of fixes.
+
+    Each fix is a dict with kind ("sysctl" or "governor"), key (the sysctl name
+    or cpuN), current and target values, and the check it repairs.
+    """
+    failed = {r.name for r in results if r.status == Status.FAIL}
+    plan = [sysctl_fix(param) for param in config.expected_sysctls() if f"Sysctl {param}" in failed]
+    if "CPU Governor Check" in failed:
+        plan.extend(governor_plan())
+    return plan
+
+def read_dropin(path=SYSCTL_DROPIN):
+    """Return the drop-in's lines ([] if it does not exist)."""
+    try:
+        with open(path, "r") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+def render_dropin(plan, lines):
+    """Return the drop-in lines with every sysctl fix of the plan set, keeping unrelated entries."""
+    values = {fix["key"]: fix["target"] for fix in plan if fix["kind"] == "sysctl"}
+    out = []
+    for line in lines:
+        key = line.split("=", 1)[0].strip()
+        if "=" in line and not line.lstrip().startswith(("#", ";")) and key in values:
+            out.append(f"{key} = {values.pop(key)}")
+        else:
+            out.append(line)
+    if values and not out:
+        out.append("# Managed by SolSentinel --fix")
+    out.extend(f"{key} = {value}" for key, value in values.items())
+    return out
+
+def render_diff(plan, dropin=SYSCTL_DROPIN):
+    """Return the dry-run view: live value changes followed by a unified diff of the drop-in."""
+    lines = [f"{fix['kind']} {fix['key']}: {fix['current']} -> {fix['target']}" for fix in plan]
+    old = read_dropin(dropin)
+    new = render_dropin(plan, old)
+    if new != old:
+        lines.append("")
+        lines.extend(difflib.unified_diff(old, new, dropin, dropin, lineterm=""))
+    return "\n".join(lines)
+
+def write_atomic(path, text):
+    """Write a file through a temporary name in the same directory, fsync it and rename it into place."""
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, text.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    dir_fd = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def write_value(path, value):
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.write(fd, value.encode())
+    finally:
+        os.close(fd)
+
+def apply_plan(plan, dropin=SYSCTL_DROPIN):
+    """Apply every fix in one pass without forking and persist the sysctls.
+
+    Values are written straight to /proc/sys and cpufreq sysfs. The sysctl fixes
+    are then merged into a single drop-in so they survive a reboot. Returns
+    {"applied": [...], "errors": [...], "elapsed_ms": float}.
+    """
+    started = time.perf_counter()
+    applied, errors = [], []
+    for fix in plan:
+        if fix["kind"] == "sysctl":
+            path = sysctl_path(fix["key"])
+        else:
+            path = f"{CPU_SYSFS}/{fix['key']}/cpufreq/scaling_governor"
+        try:
+            write_value(path, fix["target"])
+            applied.append(fix)
+        except OSError as e:
+            errors.append(f"{fix['key']}: {e.strerror or e}")
+        if fix["kind"] == "sysctl":
+            probe.forget(("sysctl", fix["key"]))
+    persisted = [fix for fix in applied if fix["kind"] == "sysctl"]
+    if persisted:
+        try:
+            write_atomic(dropin, "\n".join(render_dropin(persisted, read_dropin(dropin))) + "\n")
+        except OSError as e:
+            errors.append(f"{dropin}: {e.strerror or e}")
+    return {"applied": applied, "errors": errors, "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+def verify_plan(plan):
+    """Re-run the checks the plan touched and return {check name: fresh result}."""
+    expected = config.expected_sysctls()
+    results = {}
+    for fix in plan:
+        name = fix["check"]
+        if name in results:
+            continue
+        if fix["kind"] == "sysctl":
+            target, label = expected[fix["key"]]
+            results[name] = run_check(config.run_sysctl_check, fix["key"], target, label)
+        else:
+            results[name] = run_check(health.check_cpu_governor)
+    return results
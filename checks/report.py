@@ -0,0 +1,179 @@
+# checks/report.py
+
+import json
+import os
+import struct
+
+try:
+    import msgpack
+except ImportError:  # optional; the fallback codec below covers the types reports use
+    msgpack = None
+
+OUTPUT_DIR = "output"
+REPORT_JSON_PATH = os.path.join(OUTPUT_DIR, "latest_report.json")
+REPORT_NDJSON_PATH = os.path.join(OUTPUT_DIR, "latest_report.ndjson")
+REPORT_MSGPACK_PATH = os.path.join(OUTPUT_DIR, "latest_report.msgpack")
+HISTORY_PATH = os.path.join(OUTPUT_DIR, "history.msgpack")
+HISTORY_MAX_BYTES = 32 << 20   # rotated to history.msgpack.1 beyond this
+
+def pack_into(obj, out):
+    """Minimal msgpack encoder for None, bool, int, float, str, bytes, list/tuple and dict."""
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True or obj is False:
+        out.append(0xc3 if obj else 0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj < 1 << 64:
+            out += b"\xcf" + struct.pack(">Q", obj)
+        else:
+            out += b"\xd3" + struct.pack(">q", obj)
+    elif isinstance(obj, float):
+        out += b"\xcb" + struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode()
+        if len(data) < 32:
+            out.append(0xa0 | len(data))
+        elif len(data) < 1 << 16:
+            out += b"\xda" + struct.pack(">H", len(data))
+        else:
+            out += b"\xdb" + struct.pack(">I", len(data))
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        out += b"\xc6" + struct.pack(">I", len(obj)) + obj
+    elif isinstance(obj, (list, tuple)):
+        if len(obj) < 16:
+            out.append(0x90 | len(obj))
+        else:
+            out += b"\xdd" + struct.pack(">I", len(obj))
+        for item in obj:
+            pack_into(item, out)
+    elif isinstance(obj, dict):
+        if len(obj) < 16:
+            out.append(0x80 | len(obj))
+        else:
+            out += b"\xdf" + struct.pack(">I", len(obj))
+        for key, value in obj.items():
+            pack_into(key, out)
+            pack_into(value, out)
+    else:
+        raise TypeError(f"cannot serialize {type(obj).__name__}")
+
+def packb(obj):
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    pack_into(obj, out)
+    return bytes(out)
+
+# Fixed-width msgpack types: marker -> (struct format, kind)
+_FIXED = {
+    0xcc: (">B", "int"), 0xcd: (">H", "int"), 0xce: (">I", "int"), 0xcf: (">Q", "int"),
+    0xd0: (">b", "int"), 0xd1: (">h", "int"), 0xd2: (">i", "int"), 0xd3: (">q", "int"),
+    0xca: (">f", "float"), 0xcb: (">d", "float"),
+    0xd9: (">B", "str"), 0xda: (">H", "str"), 0xdb: (">I", "str"),
+    0xc4: (">B", "bin"), 0xc5: (">H", "bin"), 0xc6: (">I", "bin"),
+    0xdc: (">H", "array"), 0xdd: (">I", "array"), 0xde: (">H", "map"), 0xdf: (">I", "map"),
+}
+
+def unpack_from(data, pos):
+    """Decode one msgpack object at pos; returns (object, next position)."""
+    marker = data[pos]
+    pos += 1
+    if marker < 0x80:
+        return marker, pos
+    if marker >= 0xe0:
+        return marker - 0x100, pos
+    if 0xa0 <= marker <= 0xbf:
+        kind, size = "str", marker & 0x1f
+    elif 0x90 <= marker <= 0x9f:
+        kind, size = "array", marker & 0x0f
+    elif 0x80 <= marker <= 0x8f:
+        kind, size = "map", marker & 0x0f
+    elif marker in (0xc0, 0xc2, 0xc3):
+        return {0xc0: None, 0xc2: False, 0xc3: True}[marker], pos
+    elif marker in _FIXED:
+        fmt, kind = _FIXED[marker]
+        (size,) = struct.unpack_from(fmt, data, pos)
+        pos += struct.calcsize(fmt)
+        if kind in ("int", "float"):
+            return size, pos
+    else:
+        raise ValueError(f"unsupported msgpack marker 0x{marker:02x}")
+    if kind == "str":
+        return data[pos:pos + size].decode(), pos + size
+    if kind == "bin":
+        return bytes(data[pos:pos + size]), pos + size
+    if kind == "array":
+        items = []
+        for _ in range(size):
+            item, pos = unpack_from(data, pos)
+            items.append(item)
+        return items, pos
+    obj = {}
+    for _ in range(size):
+        key, pos = unpack_from(data, pos)
+        obj[key], pos = unpack_from(data, pos)
+    return obj, pos
+
+def iter_unpack(data):
+    """Yield every object of a concatenated msgpack stream (the history file format)."""
+    if msgpack is not None:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(data)
+        yield from unpacker
+        return
+    pos = 0
+    while pos < len(data):
+        obj, pos = unpack_from(data, pos)
+        yield obj
+
+def report_to_dict(report):
+    """Convert a report holding CheckResult objects into plain data."""
+    return {
+        "meta": report["meta"],
+        "results": {group: [r.to_dict() for r in results] for group, results in report["results"].items()},
+    }
+
+class NdjsonWriter:
+    """Result listener that writes one JSON line per result as soon as it completes.
+
+    The file is written under a temporary name and moved into place by
+    close(), which appends the run's meta as the last line.
+    """
+
+    def __init__(self, path=REPORT_NDJSON_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(path + ".tmp", "w")
+
+    def __call__(self, result):
+        self.file.write(json.dumps(result.to_dict(), separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self, meta=None):
+        if meta is not None:
+            self.file.write(json.dumps({"meta": meta}, separators=(",", ":")) + "\n")
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+def write_report(report):
+    """Write the finished report as compact JSON and msgpack, and append it to the msgpack history."""
+    data = report_to_dict(report)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(REPORT_JSON_PATH, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    packed = packb(data)
+    with open(REPORT_MSGPACK_PATH, "wb") as f:
+        f.write(packed)
+    try:
+        if os.path.getsize(HISTORY_PATH) + len(packed) > HISTORY_MAX_BYTES:
+            os.replace(HISTORY_PATH, HISTORY_PATH + ".1")
+    except OSError:
+        pass
+    with open(HISTORY_PATH, "ab") as f:
+        f.write(packed)
+    return REPORT_JSON_PATH
@@ -0,0 +1,174 @@
+# checks/result.py
+
+import inspect
+import threading
+import time
+from enum import Enum
+
+from checks import deadline, profiling
+
+class Status(str, Enum):
+    """Outcome of a check. Members compare equal to their string value ("PASS" == Status.PASS)."""
+    PASS = "PASS"
+    WARNING = "WARNING"
+    FAIL = "FAIL"
+    SKIPPED = "SKIPPED"
+    DEFERRED = "DEFERRED"
+    TIMEOUT = "TIMEOUT"
+    ERROR = "ERROR"
+
+    def __str__(self):
+        return self.value
+
+class CheckResult:
+    """Outcome of one check.
+
+    metrics holds numeric readings (name -> float) for history and fleet
+    aggregation; details holds structured extras such as pressure events.
+    duration_ms is filled in by run_check.
+    """
+    __slots__ = ("name", "category", "status", "message", "metrics", "details", "duration_ms")
+
+    def __init__(self, name, category, status=Status.PASS, message="", metrics=None, details=None):
+        self.name = name
+        self.category = category
+        self.status = Status(status)
+        self.message = message
+        self.metrics = metrics if metrics is not None else {}
+        self.details = details if details is not None else {}
+        self.duration_ms = None
+
+    def __repr__(self):
+        return f"CheckResult({self.name!r}, {self.status.value}, {self.message!r})"
+
+    def to_dict(self):
+        """Plain-dict form used by the JSON, NDJSON and msgpack writers."""
+        data = {"name": self.name, "status": self.status.value, "message": self.message, "category": self.category}
+        if self.metrics:
+            data["metrics"] = self.metrics
+        if self.duration_ms is not None:
+            data["duration_ms"] = self.duration_ms
+        data.update(self.details)
+        return data
+
+# Callables invoked with every result as soon as it completes (e.g. the NDJSON writer)
+_listeners = []
+
+def add_listener(callback):
+    _listeners.append(callback)
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def emit(result):
+    """Hand a finished result to the listeners and return it."""
+    for callback in _listeners:
+        callback(result)
+    return result
+
+def check(name, category, expensive=False):
+    """Register the result name and category of a check function.
+
+    Both may contain str.format fields naming the check's parameters (e.g.
+    "Sysctl {param}"), filled in from the arguments it is called with. This is
+    the only place a check's name is spelled out: the check builds its result
+    with new_result() and run_check names TIMEOUT and ERROR placeholders with it.
+
+    expensive marks a check that forks heavy tools or walks large trees; it is
+    True or a callable returning whether the next call will be expensive.
+    run_check defers such checks while our leader slot is close.
+    """
+    def register(func):
+        func.check_name = name
+        func.check_category = category
+        func.check_expensive = expensive
+        return func
+    return register
+
+def check_identity(func, *args, **kwargs):
+    """Return the (name, category) registered with @check for a call of func with these arguments."""
+    name = getattr(func, "check_name", func.__name__)
+    category = getattr(func, "check_category", None)
+    if "{" in name or (category and "{" in category):
+        bound = inspect.signature(func).bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        name = name.format(**bound.arguments)
+        category = category.format(**bound.arguments) if category else category
+    return name, category
+
+def new_result(func, *args, **kwargs):
+    """A fresh PASS result named after the check function func called with these arguments."""
+    return CheckResult(*check_identity(func, *args, **kwargs))
+
+# Whether expensive checks may run in the current run; None until asked (see expensive_allowed)
+_expensive = {"allowed": None}
+
+def set_expensive_allowed(allowed=None):
+    """Start a run's answer to "may expensive checks run?": a bool, or None to ask the leader schedule once."""
+    _expensive["allowed"] = allowed
+
+def expensive_allowed():
+    """Return the run's answer, consulting schedule.expensive_checks_allowed the first time it is needed."""
+    if _expensive["allowed"] is None:
+        from checks import schedule  # schedule builds on this module
+        _expensive["allowed"] = schedule.expensive_checks_allowed()
+    return _expensive["allowed"]
+
+def is_deferred(func):
+    """True when func is an expensive check (for its next call) and expensive checks may not run now."""
+    expensive = getattr(func, "check_expensive", False)
+    if callable(expensive):
+        expensive = expensive()
+    return bool(expensive) and not expensive_allowed()
+
+def placeholder(func, status, message, *args, **kwargs):
+    """A result standing in for a check that was not (fully) run: skipped, deferred, timed out or crashed."""
+    return CheckResult(*check_identity(func, *args, **kwargs), status, message)
+
+def run_check(func, *args, **kwargs):
+    """Run one check function under its deadline, record its wall time and emit the result.
+
+    The check runs on a worker thread. If it has not returned when its
+    deadline (see checks.deadline) passes, the process groups of any commands
+    it started are killed, the thread is abandoned and a TIMEOUT result is
+    emitted instead, so one hung check cannot hold up the rest of the run or
+    the report. A check that raises is reported as ERROR with the exception
+    text, for the same reason. An expensive check is replaced by a DEFERRED
+    placeholder while expensive checks are not allowed.
+    """
+    if is_deferred(func):
+        return emit(placeholder(func, Status.DEFERRED, "Deferred: leader slot too close for expensive probes.", *args, **kwargs))
+    name, _ = check_identity(func, *args, **kwargs)
+    timeout = deadline.check_timeout(func)
+    if timeout <= 0:
+        return emit(placeholder(func, Status.TIMEOUT, "Not run: the run deadline had already passed.", *args, **kwargs))
+
+    outcome = {}
+    def worker():
+        deadline.set_check_deadline(time.monotonic() + timeout)
+        try:
+            outcome["result"] = profiling.call(name, func, *args, **kwargs)
+        except deadline.DeadlineExceeded as e:
+            outcome["error"] = e
+        except BaseException as e:
+            outcome["exception"] = e
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=worker, name=f"check-{func.__name__}", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    elapsed = time.perf_counter() - started
+    if thread.is_alive() or "error" in outcome:
+        deadline.kill_children(thread.ident)
+        message = f"Check did not finish within its {timeout:.0f}s deadline."
+        if "error" in outcome:
+            message += f" ({outcome['error']})"
+        result = placeholder(func, Status.TIMEOUT, message, *args, **kwargs)
+    elif "exception" in outcome:
+        e = outcome["exception"]
+        result = placeholder(func, Status.ERROR, f"Check raised {type(e).__name__}: {e}", *args, **kwargs)
+    else:
+        result = outcome["result"]
+    result.duration_ms = round(elapsed * 1000, 3)
+    return emit(result)
@@ -0,0 +1,263 @@
+# checks/rpc.py
+
+import bisect
+import http.client
+import json
+import os
+import urllib.parse
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+DEFAULT_RPC_PORT = 8899
+RPC_TIMEOUT = 5           # seconds per request
+MAX_SLOT_LAG = 100        # slots behind the reference before we FAIL
+MAX_SKIP_RATE = 0.10      # share of our leader slots skipped this epoch before we warn
+LEADER_CACHE_PATH = os.path.join("output", "leader_schedule.json")
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+# Errors meaning the server dropped our idle keep-alive connection; worth one reconnect
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                           ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+class RpcError(Exception):
+    """Raised when the RPC endpoint cannot be reached or returns a malformed response."""
+
+def base58_encode(data):
+    """Encode bytes as base58 (Solana public key format)."""
+    num = int.from_bytes(data, "big")
+    encoded = ""
+    while num:
+        num, rem = divmod(num, 58)
+        encoded = BASE58_ALPHABET[rem] + encoded
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + encoded
+
+def read_pubkey(path):
+    """Return the base58 public key stored in a Solana keypair JSON file (or a plain pubkey file)."""
+    try:
+        with open(path, "r") as f:
+            content = f.read().strip()
+    except Exception:
+        return None
+    if content.startswith("["):
+        try:
+            key = bytes(json.loads(content))
+        except (ValueError, TypeError):
+            return None
+        return base58_encode(key[32:64]) if len(key) == 64 else None
+    return content or None
+
+def get_validator_keys(config_path=None):
+    """Return (identity_pubkey, vote_pubkey) from the Firedancer [consensus] table; either may be None."""
+    consensus = topology.read_fd_table("consensus", config_path)
+    identity = read_pubkey(consensus["identity_path"]) if consensus.get("identity_path") else None
+    vote = read_pubkey(consensus["vote_account_path"]) if consensus.get("vote_account_path") else None
+    return identity, vote
+
+def get_local_rpc_url(config_path=None):
+    """Return the local validator's JSON-RPC URL (SOLANA_RPC_URL overrides the [rpc] port in the config)."""
+    if os.getenv("SOLANA_RPC_URL"):
+        return os.getenv("SOLANA_RPC_URL")
+    port = topology.read_fd_table("rpc", config_path).get("port") or DEFAULT_RPC_PORT
+    return f"http://127.0.0.1:{port}"
+
+class RpcClient:
+    """Minimal JSON-RPC client holding one persistent keep-alive HTTP connection."""
+
+    def __init__(self, url, timeout=RPC_TIMEOUT):
+        parsed = urllib.parse.urlsplit(url)
+        self.url = url
+        self.path = parsed.path or "/"
+        conn_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.conn = conn_class(parsed.hostname, parsed.port, timeout=timeout)
+        self._next_id = 1
+
+    def _post(self, payload):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        # One retry covers a keep-alive connection the server closed while idle. A timeout
+        # is not retried: a hung validator would otherwise cost twice RPC_TIMEOUT.
+        for attempt in range(2):
+            try:
+                self.conn.request("POST", self.path, body, headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                break
+            except STALE_CONNECTION_ERRORS as e:
+                self.conn.close()
+                if attempt:
+                    raise RpcError(f"{self.url}: {e}") from e
+            except (http.client.HTTPException, OSError) as e:
+                self.conn.close()
+                raise RpcError(f"{self.url}: {e}") from e
+        if resp.status != 200:
+            raise RpcError(f"{self.url}: HTTP {resp.status}")
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise RpcError(f"{self.url}: invalid JSON response") from e
+
+    def call(self, method, params=None):
+        """Send a single request and return its result (raises RpcError on an error response)."""
+        response = self.batch([(method, params)])[0]
+        if "error" in response:
+            raise RpcError(f"{method}: {response['error'].get('message', response['error'])}")
+        return response.get("result")
+
+    def batch(self, calls):
+        """Send [(method, params), ...] as one batched request; returns the raw responses in call order."""
+        payload = []
+        for method, params in calls:
+            request = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+            if params is not None:
+                request["params"] = params
+            payload.append(request)
+            self._next_id += 1
+        responses = self._post(payload)
+        if not isinstance(responses, list):
+            raise RpcError(f"{self.url}: batch request not supported")
+        by_id = {r.get("id"): r for r in responses}
+        return [by_id.get(request["id"], {"error": {"message": "missing response"}}) for request in payload]
+
+    def close(self):
+        self.conn.close()
+
+_clients = {}
+
+def get_client(url):
+    """Return a cached RpcClient so daemon cycles reuse the same connection."""
+    if url not in _clients:
+        _clients[url] = RpcClient(url)
+    return _clients[url]
+
+@check("Validator RPC Check", "Health")
+def check_validator_rpc(rpc_url=None, reference_url=None, identity=None, vote=None):
+    """Ask the local validator for its health, slot, epoch, vote status and block production.
+
+    All five calls go out as one batched request over a keep-alive connection.
+    Slot lag is measured against SOLANA_REFERENCE_RPC_URL when set, otherwise
+    taken from getHealth's numSlotsBehind.
+    """
+    result = new_result(check_validator_rpc)
+    rpc_url = rpc_url or get_local_rpc_url()
+    reference_url = reference_url or os.getenv("SOLANA_REFERENCE_RPC_URL")
+    if identity is None and vote is None:
+        identity, vote = get_validator_keys()
+
+    calls = [("getHealth", None), ("getSlot", [{"commitment": "processed"}]), ("getEpochInfo", None)]
+    if vote:
+        calls.append(("getVoteAccounts", [{"votePubkey": vote, "keepUnstakedDelinquents": True}]))
+    if identity:
+        calls.append(("getBlockProduction", [{"identity": identity}]))
+    try:
+        # getVoteAccounts is filtered to our votePubkey, so every response stays small
+        responses = get_client(rpc_url).batch(calls)
+    except RpcError as e:
+        result.status = Status.FAIL
+        result.message = f"Validator RPC unreachable: {e}"
+        return result
+    answers = dict(zip([method for method, _ in calls], responses))
+
+    failures = []
+    warnings = []
+    parts = []
+
+    health = answers["getHealth"]
+    if "error" in health:
+        behind = (health["error"].get("data") or {}).get("numSlotsBehind")
+        failures.append(f"getHealth: {health['error'].get('message', 'unhealthy')}")
+    else:
+        behind = 0
+
+    slot = answers["getSlot"].get("result")
+    if slot is not None and reference_url:
+        try:
+            reference_slot = get_client(reference_url).call("getSlot", [{"commitment": "processed"}])
+            behind = reference_slot - slot
+        except RpcError as e:
+            warnings.append(f"reference RPC unavailable ({e})")
+    if behind is not None:
+        result.metrics["slot_lag"] = max(behind, 0)
+        parts.append(f"slot {slot}, {max(behind, 0)} behind")
+        if behind > MAX_SLOT_LAG:
+            failures.append(f"{behind} slots behind (max {MAX_SLOT_LAG})")
+
+    epoch = answers["getEpochInfo"].get("result")
+    if epoch:
+        parts.append(f"epoch {epoch['epoch']} at {epoch['slotIndex'] / epoch['slotsInEpoch']:.0%}")
+
+    if vote:
+        accounts = answers["getVoteAccounts"].get("result") or {}
+        if any(a.get("votePubkey") == vote for a in accounts.get("delinquent", [])):
+            failures.append(f"vote account {vote} is delinquent")
+        elif any(a.get("votePubkey") == vote for a in accounts.get("current", [])):
+            parts.append("voting")
+        else:
+            warnings.append(f"vote account {vote} not found")
+
+    if identity:
+        production = answers["getBlockProduction"].get("result") or {}
+        leader_slots, produced = production.get("value", {}).get("byIdentity", {}).get(identity, (0, 0))
+        if leader_slots:
+            skip_rate = 1 - produced / leader_slots
+            result.metrics["skip_rate"] = skip_rate
+            parts.append(f"skip rate {skip_rate:.1%} ({leader_slots - produced}/{leader_slots})")
+            if skip_rate > MAX_SKIP_RATE:
+                warnings.append(f"skip rate {skip_rate:.1%} above {MAX_SKIP_RATE:.0%}")
+
+    summary = ", ".join(parts) or "no data"
+    if failures:
+        result.status = Status.FAIL
+        result.message = "; ".join(failures + warnings) + f". ({summary})"
+    elif warnings:
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings) + f". ({summary})"
+    else:
+        result.message = f"Validator healthy: {summary}."
+    return result
+
+_leader_cache = {}
+
+def load_leader_cache():
+    try:
+        with open(LEADER_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_leader_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(LEADER_CACHE_PATH), exist_ok=True)
+        with open(LEADER_CACHE_PATH, "w") as f:
+            json.dump(cache, f)
+    except Exception:
+        pass
+
+def get_leader_slots(client, identity):
+    """Return (current_slot, sorted absolute leader slots of `identity` in the current epoch).
+
+    The schedule only changes per epoch, so it is cached in memory and in
+    output/leader_schedule.json; a steady-state call costs a single getEpochInfo.
+    """
+    global _leader_cache
+    epoch = client.call("getEpochInfo", [{"commitment": "processed"}])
+    current = epoch["absoluteSlot"]
+    if not _leader_cache:
+        _leader_cache = load_leader_cache()
+    if _leader_cache.get("epoch") != epoch["epoch"] or _leader_cache.get("identity") != identity:
+        schedule = client.call("getLeaderSchedule", [None, {"identity": identity}]) or {}
+        first_slot = current - epoch["slotIndex"]
+        _leader_cache = {
+            "epoch": epoch["epoch"],
+            "identity": identity,
+            "slots": sorted(first_slot + i for i in schedule.get(identity, [])),
+        }
+        save_leader_cache(_leader_cache)
+    return current, _leader_cache["slots"]
+
+def slots_until_leader(current, leader_slots):
+    """Return how many slots remain before our next leader slot (0 while leading, None if none left this epoch)."""
+    i = bisect.bisect_left(leader_slots, current)
+    if i == len(leader_slots):
+        return None
+    return leader_slots[i] - current
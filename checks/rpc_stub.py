@@ -0,0 +1,149 @@
+# checks/rpc_stub.py
+"""Stand-in JSON-RPC endpoint for exercising checks.rpc without a validator.
+
+`python -m checks.rpc_stub` runs RpcClient and the Validator RPC Check
+against it: a batched request, a keep-alive connection the server drops
+between requests (the one case that is retried) and a server that never
+answers (which must cost a single timeout).
+"""
+
+import http.server
+import json
+import sys
+import threading
+import time
+
+from checks import rpc
+from checks.result import Status
+
+IDENTITY = "Ident1111111111111111111111111111111111111"
+VOTE = "Vote11111111111111111111111111111111111111"
+DEFAULT_ANSWERS = {
+    "getHealth": "ok",
+    "getSlot": 250_000_000,
+    "getEpochInfo": {"epoch": 578, "slotIndex": 216_000, "slotsInEpoch": 432_000, "absoluteSlot": 250_000_000},
+    "getVoteAccounts": {"current": [{"votePubkey": VOTE, "nodePubkey": IDENTITY}], "delinquent": []},
+    "getBlockProduction": {"value": {"byIdentity": {IDENTITY: [40, 39]}}},
+}
+
+class StubRpcServer:
+    """Serve canned JSON-RPC results on an ephemeral 127.0.0.1 port.
+
+    answers maps method -> result. With drop_after=N each connection is closed
+    without notice after N responses, as a server dropping an idle keep-alive
+    connection does. With hang=True requests are read but never answered.
+    requests and connections count what the server has seen.
+    """
+
+    def __init__(self, answers=None, drop_after=None, hang=False):
+        self.answers = DEFAULT_ANSWERS if answers is None else answers
+        self.drop_after = drop_after
+        self.hang = hang
+        self.requests = 0
+        self.connections = 0
+        self.stopped = threading.Event()
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+                self.served = 0
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                if stub.hang:
+                    stub.stopped.wait()
+                    self.close_connection = True
+                    return
+                calls = payload if isinstance(payload, list) else [payload]
+                replies = [stub.reply(call) for call in calls]
+                body = json.dumps(replies if isinstance(payload, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.served += 1
+                if stub.drop_after and self.served >= stub.drop_after:
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def reply(self, call):
+        if call["method"] not in self.answers:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": self.answers[call["method"]]}
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, name="stub-rpc", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def run_self_test():
+    """Run the client scenarios against stub servers; return a list of (name, ok, detail)."""
+    outcomes = []
+
+    with StubRpcServer() as stub:
+        client = rpc.RpcClient(stub.url)
+        responses = client.batch([("getSlot", None), ("getNoSuchMethod", None), ("getHealth", None)])
+        client.close()
+        ok = (responses[0].get("result") == DEFAULT_ANSWERS["getSlot"] and "error" in responses[1]
+              and responses[2].get("result") == "ok" and stub.requests == 1)
+        outcomes.append(("batched request", ok, f"{stub.requests} request(s), {len(responses)} response(s)"))
+
+    with StubRpcServer(drop_after=1) as stub:
+        client = rpc.RpcClient(stub.url)
+        try:
+            first = client.call("getSlot")
+            time.sleep(0.1)  # let the server close the connection, as an idle one would be
+            second = client.call("getSlot")
+            ok = first == second == DEFAULT_ANSWERS["getSlot"] and stub.connections == 2
+            detail = f"{stub.requests} request(s) over {stub.connections} connection(s)"
+        except rpc.RpcError as e:
+            ok, detail = False, str(e)
+        client.close()
+        outcomes.append(("dropped keep-alive connection is retried", ok, detail))
+
+    with StubRpcServer(hang=True) as stub:
+        timeout = 0.5
+        client = rpc.RpcClient(stub.url, timeout=timeout)
+        started = time.monotonic()
+        try:
+            client.call("getSlot")
+            ok, detail = False, "hung server answered"
+        except rpc.RpcError:
+            elapsed = time.monotonic() - started
+            ok = stub.requests == 1 and elapsed < 2 * timeout
+            detail = f"RpcError after {elapsed:.2f}s, {stub.requests} request(s)"
+        client.close()
+        outcomes.append(("timeout is not retried", ok, detail))
+
+    with StubRpcServer() as stub:
+        result = rpc.check_validator_rpc(rpc_url=stub.url, identity=IDENTITY, vote=VOTE)
+        outcomes.append(("Validator RPC Check", result.status == Status.PASS, result.message))
+    return outcomes
+
+def main():
+    outcomes = run_self_test()
+    for name, ok, detail in outcomes:
+        print(f"{'ok  ' if ok else 'FAIL'}  {name}: {detail}")
+    sys.exit(0 if all(ok for _, ok, _ in outcomes) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# checks/schedule.py
+
+import time
+
+from checks import rpc
+
+SLOT_SECONDS = 0.4            # nominal slot time
+EXPENSIVE_GAP_SLOTS = 250     # ~100s: how far away our next leader slot must be to run heavy probes
+LEADER_WINDOW_SLOTS = 4       # consecutive slots per leader rotation
+MAX_DEFER_WAIT = 180          # seconds a one-shot run will wait for a safe gap
+SCHEDULE_RETRY_SECONDS = 10   # pause between attempts when the leader schedule cannot be read
+
+def next_leader_gap(rpc_url=None):
+    """Return (slots until our next leader slot, current slot); slots is None when we lead no more this epoch.
+
+    Returns (None, None) when the validator or its keys are unavailable, so a
+    None current slot means the schedule is unknown rather than empty.
+    """
+    identity, _ = rpc.get_validator_keys()
+    if not identity:
+        return None, None
+    try:
+        client = rpc.get_client(rpc_url or rpc.get_local_rpc_url())
+        current, leader_slots = rpc.get_leader_slots(client, identity)
+    except (rpc.RpcError, KeyError, TypeError):
+        return None, None
+    return rpc.slots_until_leader(current, leader_slots), current
+
+def expensive_checks_allowed(rpc_url=None):
+    """Return True when heavy probes (apt-get update, dpkg -l) cannot overlap our next leader window."""
+    gap, _ = next_leader_gap(rpc_url)
+    return gap is None or gap >= EXPENSIVE_GAP_SLOTS
+
+def wait_for_safe_gap(max_wait=MAX_DEFER_WAIT, rpc_url=None, min_gap=EXPENSIVE_GAP_SLOTS, require_schedule=False):
+    """Block until our next leader slot is at least min_gap slots away or max_wait seconds pass. Returns True if so.
+
+    If a leader window is imminent we sleep until it has passed; the gap that
+    follows it is normally long enough (leader slots come in groups of four).
+    An unknown schedule (RPC error, keys unreadable) counts as safe for probes;
+    with require_schedule it does not, and the schedule is re-read every
+    SCHEDULE_RETRY_SECONDS until max_wait runs out.
+    """
+    deadline = time.monotonic() + max_wait
+    while True:
+        gap, current = next_leader_gap(rpc_url)
+        if current is None and require_schedule:
+            sleep_for = SCHEDULE_RETRY_SECONDS
+        elif gap is None or gap >= min_gap:
+            return True
+        else:
+            sleep_for = (gap + LEADER_WINDOW_SLOTS) * SLOT_SECONDS
+        if time.monotonic() + sleep_for > deadline:
+            return False
+        time.sleep(sleep_for)
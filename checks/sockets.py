@@ -0,0 +1,216 @@
+# checks/sockets.py
+
+import os
+import socket
+import struct
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+PROC_NET_FILES = {"tcp": "/proc/net/tcp", "tcp6": "/proc/net/tcp6", "udp": "/proc/net/udp", "udp6": "/proc/net/udp6"}
+TCP_LISTEN = "0A"
+UDP_UNCONNECTED = "07"
+DEFAULT_GOSSIP_PORT = 8001
+# Processes allowed to listen on public addresses besides the validator itself.
+ALLOWED_LISTENERS = {"sshd", "chronyd", "ntpd", "systemd-resolve", "systemd-timesyncd", "dhclient", "systemd-network"}
+
+# inode -> (pid, fd) from the previous cycle, verified with one readlink before reuse
+_inode_index = {}
+# (proto, port) -> drops from the previous cycle
+_last_drops = {}
+
+def decode_address(hex_addr):
+    """Decode a /proc/net address ('0100007F:1F90' or the 32-hex-digit IPv6 form) into (ip, port)."""
+    addr, port = hex_addr.split(":")
+    if len(addr) == 8:
+        ip = socket.inet_ntop(socket.AF_INET, struct.pack("<I", int(addr, 16)))
+    else:
+        # IPv6 addresses are printed as four host-endian 32-bit words.
+        ip = socket.inet_ntop(socket.AF_INET6, b"".join(struct.pack("<I", int(addr[i:i + 8], 16)) for i in range(0, 32, 8)))
+    return ip, int(port, 16)
+
+def is_loopback(ip):
+    return ip.startswith("127.") or ip == "::1" or ip.startswith("::ffff:127.")
+
+def read_listening_sockets():
+    """Return listening TCP and bound unconnected UDP sockets as dicts (proto, ip, port, uid, inode, rx_queue, drops)."""
+    sockets = []
+    for proto, path in PROC_NET_FILES.items():
+        try:
+            with open(path, "r") as f:
+                next(f)
+                lines = f.readlines()
+        except OSError:
+            continue
+        wanted_state = TCP_LISTEN if proto.startswith("tcp") else UDP_UNCONNECTED
+        for line in lines:
+            fields = line.split()
+            if fields[3] != wanted_state or fields[9] == "0":
+                continue
+            ip, port = decode_address(fields[1])
+            if proto.startswith("udp") and decode_address(fields[2])[1] != 0:
+                continue
+            sockets.append({
+                "proto": proto,
+                "ip": ip,
+                "port": port,
+                "uid": int(fields[7]),
+                "inode": int(fields[9]),
+                "rx_queue": int(fields[4].split(":")[1], 16),
+                "drops": int(fields[12]) if proto.startswith("udp") and len(fields) > 12 else 0,
+            })
+    return sockets
+
+def resolve_owners(inodes_by_uid, validator_pid=None):
+    """Map socket inodes to PIDs.
+
+    Cached (pid, fd) pairs from the last cycle are verified with a single
+    readlink each. Remaining inodes are searched only in processes owned by the
+    socket's uid, and the validator's huge fd table is walked last, so the
+    common case never lists it.
+    """
+    owners = {}
+    pending = set()
+    for inodes in inodes_by_uid.values():
+        for inode in inodes:
+            cached = _inode_index.get(inode)
+            if cached:
+                try:
+                    if os.readlink(f"/proc/{cached[0]}/fd/{cached[1]}") == f"socket:[{inode}]":
+                        owners[inode] = cached[0]
+                        continue
+                except OSError:
+                    pass
+            pending.add(inode)
+
+    if pending:
+        wanted_uids = {uid for uid, inodes in inodes_by_uid.items() if inodes & pending}
+        candidates = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                if os.stat(f"/proc/{entry}").st_uid in wanted_uids:
+                    candidates.append(int(entry))
+            except OSError:
+                continue
+        candidates.sort(key=lambda pid: pid == validator_pid)
+        for pid in candidates:
+            try:
+                fds = os.listdir(f"/proc/{pid}/fd")
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(f"/proc/{pid}/fd/{fd}")
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    inode = int(target[8:-1])
+                    if inode in pending:
+                        owners[inode] = pid
+                        _inode_index[inode] = (pid, fd)
+                        pending.discard(inode)
+            if not pending:
+                break
+
+    for inode in list(_inode_index):
+        if inode not in owners:
+            del _inode_index[inode]
+    return owners
+
+def get_expected_validator_ports():
+    """Return {(proto, port): label} the validator must have kernel sockets for.
+
+    With the default XDP network stack Firedancer serves TPU/QUIC traffic without
+    kernel sockets, so only gossip is required unless [net] provider is "socket".
+    """
+    gossip = topology.read_fd_table("gossip").get("port")
+    expected = {("udp", int(gossip) if gossip and gossip.isdigit() else DEFAULT_GOSSIP_PORT): "gossip"}
+    if topology.read_fd_table("net").get("provider") == "socket":
+        quic = topology.read_fd_table("tiles.quic")
+        for key, label in (("regular_transaction_listen_port", "tpu"), ("quic_transaction_listen_port", "tpu-quic")):
+            if quic.get(key, "").isdigit():
+                expected[("udp", int(quic[key]))] = label
+    return expected
+
+@check("Listening Socket Audit", "Security")
+def check_listening_sockets():
+    """Audit public listeners and the validator's gossip/TPU sockets straight from /proc/net.
+
+    Sockets whose owner cannot be found (not run as root, or a socket of
+    another PID namespace) are listed separately as a WARNING, not counted as
+    unexpected listeners, and an expected validator port held by one of them
+    is not reported missing.
+    """
+    result = new_result(check_listening_sockets)
+    try:
+        sockets = read_listening_sockets()
+    except Exception as e:
+        result.status = Status.WARNING
+        result.message = f"Could not read /proc/net: {e}"
+        return result
+
+    validator_pid = topology.find_validator_pid()
+    inodes_by_uid = {}
+    for sock in sockets:
+        inodes_by_uid.setdefault(sock["uid"], set()).add(sock["inode"])
+    owners = resolve_owners(inodes_by_uid, validator_pid)
+
+    unexpected = []
+    unowned = []
+    unowned_ports = set()
+    present = {}
+    for sock in sockets:
+        pid = owners.get(sock["inode"])
+        comm = topology.read_sysfs(f"/proc/{pid}/comm") if pid else None
+        sock["process"] = f"{comm}[{pid}]" if comm else "unknown"
+        is_validator = comm in topology.VALIDATOR_PROCESS_NAMES or (validator_pid and pid == validator_pid)
+        if is_validator:
+            present[(sock["proto"].rstrip("6"), sock["port"])] = sock
+        elif comm is None:
+            unowned_ports.add((sock["proto"].rstrip("6"), sock["port"]))
+            if not is_loopback(sock["ip"]):
+                unowned.append(f"{sock['proto']} {sock['ip']}:{sock['port']}")
+        elif not is_loopback(sock["ip"]) and comm not in ALLOWED_LISTENERS:
+            unexpected.append(f"{sock['proto']} {sock['ip']}:{sock['port']} ({sock['process']})")
+
+    problems = []
+    details = []
+    dropping = []
+    if unexpected:
+        problems.append("unexpected public listeners: " + ", ".join(sorted(set(unexpected))))
+    if validator_pid:
+        for key, label in get_expected_validator_ports().items():
+            sock = present.get(key)
+            if sock is None and key in unowned_ports:
+                details.append(f"{label} {key[1]}: bound, owner unknown")
+                continue
+            if sock is None:
+                problems.append(f"validator {label} socket {key[0]}/{key[1]} missing")
+                continue
+            new_drops = sock["drops"] - _last_drops.get(key, sock["drops"])
+            _last_drops[key] = sock["drops"]
+            result.metrics[f"{label}_new_drops"] = new_drops
+            if new_drops > 0:
+                dropping.append(label)
+            result.metrics[f"{label}_rx_queue"] = sock["rx_queue"]
+            details.append(f"{label} {key[1]}: rx queue {sock['rx_queue']}B, {sock['drops']} drops (+{new_drops})")
+
+    summary = f"{len(sockets)} listening socket(s)"
+    if details:
+        summary += "; " + "; ".join(details)
+    if problems:
+        result.status = Status.FAIL
+        result.message = "; ".join(problems) + f". ({summary})"
+    elif unowned or dropping:
+        warnings = []
+        if unowned:
+            warnings.append("owner unknown (run as root) for public listeners " + ", ".join(sorted(set(unowned))))
+        if dropping:
+            warnings.append(f"validator {', '.join(dropping)} socket(s) are dropping packets")
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings) + f". ({summary})"
+    else:
+        result.message = f"No unexpected public listeners. {summary}."
+    return result
@@ -0,0 +1,152 @@
+# checks/sshd_config.py
+
+import glob
+import os
+import re
+import subprocess
+
+from checks import deadline, probe
+
+SSHD_CONFIG = "/etc/ssh/sshd_config"
+MAX_INCLUDE_DEPTH = 16
+
+# Keywords sshd accumulates instead of "first value wins".
+MULTI_VALUE_KEYWORDS = {
+    "port", "listenaddress", "hostkey", "acceptenv", "setenv", "allowusers", "denyusers",
+    "allowgroups", "denygroups", "subsystem", "hostcertificate", "permitopen", "permitlisten",
+}
+# Defaults of the directives we evaluate, as documented in sshd_config(5).
+DEFAULTS = {
+    "port": ["22"],
+    "permitrootlogin": ["prohibit-password"],
+    "passwordauthentication": ["yes"],
+    "kbdinteractiveauthentication": ["yes"],
+    "pubkeyauthentication": ["yes"],
+    "permitemptypasswords": ["no"],
+    "x11forwarding": ["no"],
+    "usepam": ["no"],
+}
+
+# Parsed files keyed by path -> ((st_ino, st_mtime_ns), [(keyword, args, lineno), ...])
+_file_cache = {}
+# Last sshd -T comparison keyed by the identity of every file in the resolved tree
+_sshd_t_cache = {}
+
+def parse_file(path):
+    """Return the directive lines of one config file, reusing the cached parse if inode and mtime are unchanged."""
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime_ns)
+    cached = _file_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    lines = []
+    with open(path, "r") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            # The keyword ends at whitespace or "=" ("Port 22", "Port=22", "Port = 22").
+            m = re.match(r"([^\s=]+)[\s=]*(.*)", line)
+            keyword, rest = m.group(1).lower(), m.group(2)
+            lines.append((keyword, rest.split("#", 1)[0].split(), lineno))
+    _file_cache[path] = (key, lines)
+    return lines
+
+class SshdConfig:
+    """Resolved sshd configuration: global directives in file order plus Match blocks."""
+
+    def __init__(self):
+        self.entries = []        # (keyword, args, path, lineno, match) in resolution order
+        self.files = []          # (path, st_ino, st_mtime_ns) of every file read
+
+    def effective(self, keyword):
+        """Return the effective global value(s) of a keyword as a list, applying sshd's first-match rule."""
+        keyword = keyword.lower()
+        values = []
+        for kw, args, _, _, match in self.entries:
+            if kw != keyword or match is not None:
+                continue
+            if keyword in MULTI_VALUE_KEYWORDS:
+                values.extend(args)
+            else:
+                return args
+        return values or list(DEFAULTS.get(keyword, []))
+
+    def source(self, keyword):
+        """Return "path:line" where the effective global value of keyword was set, or "default"."""
+        keyword = keyword.lower()
+        for kw, _, path, lineno, match in self.entries:
+            if kw == keyword and match is None:
+                return f"{path}:{lineno}"
+        return "default"
+
+    def match_overrides(self, keyword):
+        """Return [(match criteria, args)] for Match blocks that set keyword."""
+        keyword = keyword.lower()
+        return [(match, args) for kw, args, _, _, match in self.entries if kw == keyword and match is not None]
+
+def resolve(path=SSHD_CONFIG):
+    """Parse sshd_config in one pass, expanding Include directives in place and tracking Match blocks.
+
+    Relative Include paths are resolved against /etc/ssh, and glob matches are
+    read in lexical order, as sshd does. A Match block lasts until the next
+    Match (or "Match all") or the end of the file it appears in; an Include
+    inside a Match block inherits that block's condition.
+    """
+    config = SshdConfig()
+    base_dir = os.path.dirname(path)
+
+    def walk(file_path, match, depth):
+        if depth > MAX_INCLUDE_DEPTH:
+            return
+        st = os.stat(file_path)
+        config.files.append((file_path, st.st_ino, st.st_mtime_ns))
+        for keyword, args, lineno in parse_file(file_path):
+            if keyword == "include":
+                for pattern in args:
+                    if not os.path.isabs(pattern):
+                        pattern = os.path.join(base_dir, pattern)
+                    for included in sorted(glob.glob(pattern)):
+                        if os.path.isfile(included):
+                            walk(included, match, depth + 1)
+            elif keyword == "match":
+                match = None if [a.lower() for a in args] == ["all"] else " ".join(args)
+            else:
+                config.entries.append((keyword, args, file_path, lineno, match))
+
+    walk(path, None, 0)
+    return config
+
+def compare_with_sshd_t(config, keywords):
+    """Compare our resolution with `sshd -T` for the given keywords.
+
+    Returns a list of mismatches, or None when sshd is unavailable or we are not
+    root. The result is cached per set of file identities, so sshd is forked at
+    most once per configuration change.
+    """
+    if probe.which("sshd") is None or os.geteuid() != 0:
+        return None
+    key = (tuple(config.files), tuple(sorted(keywords)))
+    if key in _sshd_t_cache:
+        return _sshd_t_cache[key]
+    try:
+        proc = deadline.run(["sshd", "-T"], timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if proc.returncode != 0:
+        return None
+    reported = {}
+    for line in proc.stdout.splitlines():
+        kw, _, value = line.partition(" ")
+        reported.setdefault(kw, []).append(value)
+    mismatches = []
+    for keyword in keywords:
+        ours = [v.lower() for v in config.effective(keyword)]
+        theirs = [v.lower() for v in reported.get(keyword.lower(), [])]
+        # sshd -T prints one line per Port but one space-separated line for most lists.
+        theirs = [part for value in theirs for part in value.split()]
+        if theirs and sorted(ours) != sorted(theirs):
+            mismatches.append(f"{keyword}: parsed {' '.join(ours)}, sshd -T {' '.join(theirs)}")
+    _sshd_t_cache.clear()
+    _sshd_t_cache[key] = mismatches
+    return mismatches
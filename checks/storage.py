@@ -0,0 +1,208 @@
+# checks/storage.py
+
+import json
+import os
+import re
+import shutil
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from checks import topology
+from checks.result import Status, check, new_result
+
+DEFAULT_LEDGER_PATH = "/mnt/ledger"
+DEFAULT_ACCOUNTS_PATH = "/mnt/account"
+STORAGE_CACHE_PATH = os.path.join("output", "storage_cache.json")
+# Files growing in place (rocksdb WAL, append-vecs) do not change their
+# directory's mtime, so cached sizes are refreshed with a full walk this often.
+FULL_RESCAN_SECONDS = 3600
+WARN_DISK_PERCENT = 80
+FAIL_DISK_PERCENT = 90
+MAX_FULL_SNAPSHOTS = 4
+MAX_FULL_SNAPSHOT_AGE = 6 * 3600
+
+FULL_SNAPSHOT_RE = re.compile(r"^snapshot-(\d+)-\w+\.tar(\.\w+)?$")
+INCREMENTAL_SNAPSHOT_RE = re.compile(r"^incremental-snapshot-(\d+)-(\d+)-\w+\.tar(\.\w+)?$")
+
+# dirpath -> {"key": [ino, mtime_ns], "sizes": {category: [count, bytes]}, "snapshots": [...], "subdirs": [...]}
+_dir_cache = {}
+_last_full_scan = 0.0
+
+def get_scan_roots():
+    """Return the ledger, accounts and snapshot directories from the Firedancer config, defaulting to /mnt/ledger and /mnt/account."""
+    ledger = topology.read_fd_table("ledger")
+    snapshots = topology.read_fd_table("snapshots")
+    roots = [ledger.get("path") or DEFAULT_LEDGER_PATH, ledger.get("accounts_path") or DEFAULT_ACCOUNTS_PATH]
+    if snapshots.get("path"):
+        roots.append(snapshots["path"])
+    # Drop roots nested in another root so nothing is counted twice.
+    roots = sorted({os.path.normpath(r) for r in roots if os.path.isdir(r)})
+    return [r for r in roots if not any(r != o and r.startswith(o + os.sep) for o in roots)]
+
+def categorize(dirpath, name):
+    if FULL_SNAPSHOT_RE.match(name):
+        return "full snapshots"
+    if INCREMENTAL_SNAPSHOT_RE.match(name):
+        return "incremental snapshots"
+    parts = dirpath.split(os.sep)
+    if "rocksdb" in parts:
+        return "rocksdb"
+    if any(p.startswith("accounts") or p == "run" for p in parts) or re.match(r"^\d+\.\d+$", name):
+        return "accounts"
+    return "other"
+
+def scan_dir(dirpath, key):
+    """Read one directory's direct entries and return its cache record."""
+    sizes, snapshots, subdirs = {}, [], []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            category = categorize(dirpath, entry.name)
+            count_bytes = sizes.setdefault(category, [0, 0])
+            count_bytes[0] += 1
+            count_bytes[1] += st.st_blocks * 512
+            if category.endswith("snapshots"):
+                snapshots.append([entry.name, st.st_size, st.st_mtime])
+    return {"key": key, "sizes": sizes, "snapshots": snapshots, "subdirs": subdirs}
+
+def walk_root(root, cache, full):
+    """Walk one tree, rescanning only directories whose (inode, mtime) changed.
+
+    Returns (records, rescanned count). Unchanged directories reuse their cached
+    record and only cost one stat; their subdirectories are still visited,
+    since a change deep in the tree does not touch the parents' mtime.
+    """
+    records, rescanned, stack = {}, 0, [root]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            st = os.stat(dirpath)
+        except OSError:
+            continue
+        key = [st.st_ino, st.st_mtime_ns]
+        record = cache.get(dirpath)
+        if full or record is None or record["key"] != key:
+            try:
+                record = scan_dir(dirpath, key)
+            except OSError:
+                continue
+            rescanned += 1
+        records[dirpath] = record
+        stack.extend(record["subdirs"])
+    return records, rescanned
+
+def load_cache():
+    try:
+        with open(STORAGE_CACHE_PATH, "r") as f:
+            data = json.load(f)
+        return data.get("dirs", {}), data.get("full_scan", 0.0)
+    except Exception:
+        return {}, 0.0
+
+def save_cache(dirs, full_scan):
+    try:
+        os.makedirs(os.path.dirname(STORAGE_CACHE_PATH), exist_ok=True)
+        with open(STORAGE_CACHE_PATH, "w") as f:
+            json.dump({"full_scan": full_scan, "dirs": dirs}, f, separators=(",", ":"))
+    except Exception:
+        pass
+
+def format_bytes(num):
+    for unit in ("B", "K", "M", "G", "T"):
+        if num < 1024 or unit == "T":
+            return f"{num:.0f}{unit}" if unit == "B" else f"{num:.1f}{unit}"
+        num /= 1024
+
+def full_scan_due():
+    """True when the next inventory will list every directory rather than only changed ones."""
+    global _dir_cache, _last_full_scan
+    if not _dir_cache:
+        _dir_cache, _last_full_scan = load_cache()
+    return not _dir_cache or time.time() - _last_full_scan > FULL_RESCAN_SECONDS
+
+# Only a full walk is expensive; an incremental cycle lists just the changed directories
+@check("Ledger Storage Check", "Health", expensive=full_scan_due)
+def check_storage_inventory(roots=None):
+    """Report ledger/accounts usage by category, snapshot count, age and interval, and disk fullness.
+
+    Each mount is walked in its own thread. Directory (inode, mtime) records
+    are kept in memory and in output/storage_cache.json, so a steady-state
+    cycle stats every directory but lists only the ones that changed.
+    """
+    global _dir_cache, _last_full_scan
+    result = new_result(check_storage_inventory)
+    roots = roots or get_scan_roots()
+    if not roots:
+        result.status = Status.SKIPPED
+        result.message = f"No ledger directories found ({DEFAULT_LEDGER_PATH}, {DEFAULT_ACCOUNTS_PATH})."
+        return result
+
+    full = full_scan_due()
+    with ThreadPoolExecutor(max_workers=len(roots)) as pool:
+        walks = list(pool.map(lambda root: walk_root(root, _dir_cache, full), roots))
+    _dir_cache = {path: record for records, _ in walks for path, record in records.items()}
+    if full:
+        _last_full_scan = time.time()
+    save_cache(_dir_cache, _last_full_scan)
+
+    sizes, snapshots = {}, []
+    for record in _dir_cache.values():
+        for category, (count, size) in record["sizes"].items():
+            total = sizes.setdefault(category, [0, 0])
+            total[0] += count
+            total[1] += size
+        snapshots.extend(record["snapshots"])
+
+    now = time.time()
+    problems, warnings = [], []
+    full_snaps = sorted((s for s in snapshots if FULL_SNAPSHOT_RE.match(s[0])), key=lambda s: s[2])
+    incr_snaps = sorted((s for s in snapshots if INCREMENTAL_SNAPSHOT_RE.match(s[0])), key=lambda s: s[2])
+    snap_summary = f"{len(full_snaps)} full / {len(incr_snaps)} incremental snapshot(s)"
+    if full_snaps:
+        age = now - full_snaps[-1][2]
+        snap_summary += f", newest full {age / 60:.0f}m old"
+        if len(full_snaps) > 1:
+            interval = statistics.median(b[2] - a[2] for a, b in zip(full_snaps, full_snaps[1:]))
+            snap_summary += f", every {interval / 60:.0f}m"
+        if age > MAX_FULL_SNAPSHOT_AGE:
+            warnings.append(f"newest full snapshot is {age / 3600:.1f}h old")
+        if len(full_snaps) > MAX_FULL_SNAPSHOTS:
+            warnings.append(f"{len(full_snaps)} full snapshots kept (stale archives?)")
+    if incr_snaps:
+        snap_summary += f", newest incremental {(now - incr_snaps[-1][2]) / 60:.0f}m old"
+
+    usage = []
+    for root in roots:
+        disk = shutil.disk_usage(root)
+        percent = disk.used / disk.total * 100 if disk.total else 0
+        result.metrics[f"{root}_percent_full"] = percent
+        usage.append(f"{root} {percent:.0f}% full")
+        if percent >= FAIL_DISK_PERCENT:
+            problems.append(f"{root} is {percent:.0f}% full")
+        elif percent >= WARN_DISK_PERCENT:
+            warnings.append(f"{root} is {percent:.0f}% full")
+
+    by_category = ", ".join(
+        f"{category} {format_bytes(size)} ({count} files)"
+        for category, (count, size) in sorted(sizes.items(), key=lambda item: -item[1][1])
+    )
+    rescanned = sum(n for _, n in walks)
+    summary = f"{'; '.join(usage)}. {by_category or 'no files'}. {snap_summary}. ({len(_dir_cache)} dirs, {rescanned} rescanned)"
+    if problems:
+        result.status = Status.FAIL
+        result.message = "; ".join(problems + warnings) + f". {summary}"
+    elif warnings:
+        result.status = Status.WARNING
+        result.message = "; ".join(warnings) + f". {summary}"
+    else:
+        result.message = summary
+    return result
@@ -0,0 +1,163 @@
+# checks/topology.py
+
+import glob
+import os
+import pwd
+import re
+
+from checks import probe
+
+FD_CONFIG_NAME = "active-fd-config.toml"
+
+def read_sysfs(path, default=None):
+    """Read and strip a small sysfs/procfs file, returning default on any error."""
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except Exception:
+        return default
+
+def parse_cpu_list(text):
+    """Parse a kernel CPU list such as '0-3,8,10-11' into a sorted list of ints.
+
+    Also accepts the stride form '0-15:2' used by isolcpus/nohz_full.
+    """
+    cpus = set()
+    if not text:
+        return []
+    for part in text.strip().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        stride = 1
+        if ":" in part:
+            part, stride_str = part.split(":", 1)
+            stride = int(stride_str)
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.update(range(int(lo), int(hi) + 1, stride))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def format_cpu_list(cpus):
+    """Format an iterable of CPU numbers back into the compact '0-3,8' form."""
+    cpus = sorted(set(cpus))
+    ranges = []
+    start = prev = None
+    for cpu in cpus:
+        if start is None:
+            start = prev = cpu
+        elif cpu == prev + 1:
+            prev = cpu
+        else:
+            ranges.append(f"{start}-{prev}" if start != prev else f"{start}")
+            start = prev = cpu
+    if start is not None:
+        ranges.append(f"{start}-{prev}" if start != prev else f"{start}")
+    return ",".join(ranges)
+
+def get_base_path():
+    """Return the operating user's home directory (honours sudo like the action scripts)."""
+    for user in (os.environ.get("SUDO_USER"), os.environ.get("USER")):
+        if user and user != "root":
+            try:
+                return pwd.getpwnam(user).pw_dir
+            except KeyError:
+                pass
+    return os.path.expanduser("~")
+
+def get_fd_config_path():
+    """Return the path of the active Firedancer config (the symlink in the user's home)."""
+    return os.path.join(get_base_path(), FD_CONFIG_NAME)
+
+def read_fd_table(table, config_path=None):
+    """Read one table (e.g. "layout", "consensus") of the Firedancer config.
+
+    Only top-level scalar keys are extracted, so no TOML parser is required.
+    Returns a dict (empty if the config cannot be read).
+    """
+    content = probe.read_file(config_path or get_fd_config_path())
+    if content is None:
+        return {}
+
+    values = {}
+    in_table = False
+    for line in content.splitlines():
+        stripped = line.split("#", 1)[0].strip()
+        if not stripped:
+            continue
+        if stripped.startswith("["):
+            in_table = stripped == f"[{table}]"
+            continue
+        if in_table:
+            m = re.match(r'([A-Za-z_]+)\s*=\s*"?([^"]*)"?', stripped)
+            if m:
+                values[m.group(1)] = m.group(2).strip()
+    return values
+
+def read_fd_layout(config_path=None):
+    """Read the [layout] table of the Firedancer config."""
+    return read_fd_table("layout", config_path)
+
+def get_tile_cores(config_path=None):
+    """Return the set of CPUs the validator tiles are pinned to, or an empty set.
+
+    Uses `affinity` from the Firedancer [layout] table. An 'auto' layout cannot be
+    resolved without fdctl, so it is treated as unknown.
+    """
+    affinity = read_fd_layout(config_path).get("affinity", "")
+    if not affinity or affinity == "auto":
+        return set()
+    try:
+        return set(parse_cpu_list(affinity))
+    except ValueError:
+        return set()
+
+def get_online_cpus():
+    """Return the list of online CPUs."""
+    return parse_cpu_list(read_sysfs("/sys/devices/system/cpu/online", "0"))
+
+def get_cpu_numa_map():
+    """Return a dict mapping CPU number -> NUMA node (all CPUs on node 0 if NUMA is absent)."""
+    cpu_node = {}
+    for node_path in glob.glob("/sys/devices/system/node/node[0-9]*"):
+        node = int(re.search(r"node(\d+)$", node_path).group(1))
+        for cpu in parse_cpu_list(read_sysfs(os.path.join(node_path, "cpulist"), "")):
+            cpu_node[cpu] = node
+    if not cpu_node:
+        cpu_node = {cpu: 0 for cpu in get_online_cpus()}
+    return cpu_node
+
+def get_nic_numa_nodes():
+    """Return a dict mapping physical NIC name -> NUMA node (-1 when the kernel does not know)."""
+    nics = {}
+    for path in glob.glob("/sys/class/net/*/device/numa_node"):
+        iface = path.split("/")[4]
+        value = read_sysfs(path)
+        if value is None:
+            continue
+        try:
+            nics[iface] = int(value)
+        except ValueError:
+            continue
+    return nics
+
+VALIDATOR_PROCESS_NAMES = ("fdctl", "fddev", "agave-validator", "solana-validator")
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+def find_validator_pid():
+    """Return the PID of the running validator (lowest PID wins for multi-process layouts), or None."""
+    pids = [pid for pid, comm, _ in probe.process_table() if comm in VALIDATOR_PROCESS_NAMES]
+    return min(pids) if pids else None
+
+def get_cgroup_dir(pid):
+    """Return the cgroup v2 directory of a process, or None on cgroup v1 / unknown PID."""
+    content = read_sysfs(f"/proc/{pid}/cgroup")
+    if not content:
+        return None
+    for line in content.splitlines():
+        if line.startswith("0::"):
+            path = os.path.normpath(os.path.join(CGROUP_ROOT, line[3:].lstrip("/")))
+            return path if os.path.isdir(path) else None
+    return None
@@ -3,6 +3,8 @@
 import json
 import requests
 
+POST_TIMEOUT = 10   # seconds; keeps a slow webhook from stretching the run past its deadline
+
 def raw_post_to_discord(report_path, webhook_url):
     """
     Post the JSON report to Discord via a webhook.
@@ -18,14 +20,14 @@ def raw_post_to_discord(report_path, webhook_url):
         return
 
     message_lines = ["**Validator Health Report**\n"]
-    for check in report:
+    for check in (c for group in report.get("results", {}).values() for c in group):
         line = f"- **{check['name']}**: {check['status']} — {check['message']}"
         message_lines.append(line)
     message = "\n".join(message_lines)
 
     data = {"content": message}
     try:
-        response = requests.post(webhook_url, json=data)
+        response = requests.post(webhook_url, json=data, timeout=POST_TIMEOUT)
         if response.status_code == 204:
             print("Successfully posted report to Discord.")
         else:
@@ -36,12 +38,39 @@ def raw_post_to_discord(report_path, webhook_url):
 
 import requests
 
+STATUS_ICONS = {"PASS": "✅", "WARNING": "⚠️", "SKIPPED": "⏭️", "DEFERRED": "⏳", "TIMEOUT": "⏱️", "ERROR": "💥"}
+MAX_MESSAGE_LENGTH = 2000   # Discord rejects message content longer than this
+
+def split_message(blocks, limit=MAX_MESSAGE_LENGTH):
+    """Pack blank-line separated blocks into as few messages of at most limit characters as possible.
+
+    A block too long for one message is split between lines; a single line
+    that is still too long is truncated.
+    """
+    lines = []
+    for block in blocks:
+        if lines:
+            lines.append("")
+        lines.extend(line if len(line) <= limit else line[:limit - 1] + "…" for line in block.split("\n"))
+    messages, current = [], ""
+    for line in lines:
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) <= limit:
+            current = candidate
+        elif current:
+            messages.append(current)
+            current = line
+    if current.strip():
+        messages.append(current)
+    return messages
+
 def post_health_summary_to_discord(health_data: dict, webhook_url: str):
+    """Post a report of CheckResult objects (as built by run_sentinel.run_checks)."""
     def format_section(title, results):
         lines = [f"**{title}**"]
         for item in results:
-            icon = "✅" if item["status"] == "PASS" else "❌"
-            lines.append(f"- {icon} {item['name']}: {item['message']}")
+            icon = STATUS_ICONS.get(item.status, "❌")
+            lines.append(f"- {icon} {item.name}: {item.message}")
         return "\n".join(lines)
 
     # Parse grouped results
@@ -49,21 +78,17 @@ def post_health_summary_to_discord(health_data: dict, webhook_url: str):
     health = format_section("🧠 Health", health_data["results"].get("health_results", []))
     security = format_section("🔐 Security", health_data["results"].get("security_results", []))
 
-    # Compose final message
-    message = "\n".join([
-        "📡 **Validator Health Check Summary**",
-        "",
-        config,
-        "",
-        health,
-        "",
-        security
-    ])
+    title = "📡 **Validator Health Check Summary**"
+    timed_out = health_data.get("meta", {}).get("deadline", {}).get("timed_out")
+    if timed_out:
+        title += f" (partial: {len(timed_out)} check(s) timed out)"
 
-    # Post to Discord webhook
-    response = requests.post(webhook_url, json={"content": message})
-    if response.status_code != 204:
-        raise Exception(f"Discord webhook failed with status {response.status_code}: {response.text}")
+    # Compose the message, split into several posts when it is over Discord's limit
+    for message in split_message([title, config, health, security]):
+        # Post to Discord webhook
+        response = requests.post(webhook_url, json={"content": message}, timeout=POST_TIMEOUT)
+        if response.status_code != 204:
+            raise Exception(f"Discord webhook failed with status {response.status_code}: {response.text}")
 
 
 if __name__ == "__main__":
@@ -71,4 +96,4 @@ if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python post_to_discord.py <report_path> <webhook_url>")
     else:
-        post_to_discord(sys.argv[1], sys.argv[2])
+        raw_post_to_discord(sys.argv[1], sys.argv[2])
@@ -1,13 +1,14 @@
 import argparse
-import json
 import os
 import sys
 import datetime
 import psutil  # still used for drives
 import re
+import time
 from pathlib import Path
 
-from checks import config, health, security
+from checks import anomaly, config, deadline, health, integrity, isolation, pressure, probe, profiling, remediate, report as report_writer, schedule, security
+from checks.result import Status, add_listener, emit, placeholder, remove_listener, run_check, set_expensive_allowed
 from post.post_to_discord import post_health_summary_to_discord
 
 GREEN = '\033[0;32m'
@@ -23,7 +24,20 @@ def parse_args():
     parser.add_argument("--skip-ssh-check", action="store_true", help="Skip the SSH security configuration check")
     parser.add_argument("-q", "--quiet", action="store_true", help="Suppress detailed output, only show summary")
     parser.add_argument("--env-file", help="Path to .env file containing Discord webhook URL", default=".env")
-    return parser.parse_args()
+    parser.add_argument("--daemon", action="store_true", help="Keep running and repeat the checks every --interval seconds")
+    parser.add_argument("--interval", type=int, default=60, help="Seconds between runs in daemon mode (default: 60)")
+    parser.add_argument("--low-footprint", action="store_true", help="Pin the sentinel and its children to housekeeping CPUs with idle IO and lowest CPU priority")
+    parser.add_argument("--cpu-budget", type=float, help="With --low-footprint, also cap the sentinel at this percent of one CPU via a cgroup")
+    parser.add_argument("--fix", action="store_true", help="Show a remediation plan for failed sysctl and CPU governor checks, apply it after confirmation and re-verify")
+    parser.add_argument("-y", "--yes", action="store_true", help="With --fix, apply the plan without asking")
+    parser.add_argument("--profile", action="store_true", help=f"Profile every check and the Discord post (cProfile, wall-clock stack samples, allocations) into {profiling.PROFILE_DIR}/")
+    parser.add_argument("--profile-sample-ms", type=float, default=profiling.SAMPLE_INTERVAL_MS, help=f"With --profile, wall-clock stack sampling period; 0 turns sampling off (default: {profiling.SAMPLE_INTERVAL_MS})")
+    parser.add_argument("--accept-integrity", nargs="?", const="", metavar="PATH", help="Accept the current state of PATH (a file or directory), or of every file when no PATH is given, as the new file integrity baseline, then exit")
+    parser.add_argument("--run-timeout", type=float, default=deadline.RUN_BUDGET, help=f"Seconds all checks of one run may take; checks still running are reported as TIMEOUT (default: {deadline.RUN_BUDGET})")
+    args = parser.parse_args()
+    if args.fix and args.daemon:
+        parser.error("--fix cannot be combined with --daemon")
+    return args
 
 def load_env_file(env_file):
     """Load environment variables from file."""
@@ -65,7 +79,7 @@ def get_cpu_info():
         pass
     return cpu_info
 
-def gather_meta_data():
+def gather_meta_data(footprint=None):
     # Get the current UTC date/time in ISO 8601 format.
     run_datetime = datetime.datetime.utcnow().isoformat() + "Z"
 
@@ -86,44 +100,77 @@ def gather_meta_data():
         except Exception:
             continue
 
+    # The sentinel's own overhead, so it can be shown to stay within budget
+    sentinel = isolation.get_own_usage()
+    if footprint:
+        sentinel["isolation"] = footprint
+
     meta = {
         "run_datetime": run_datetime,
         "cpu_info": cpu_info,
-        "drives": drives
+        "drives": drives,
+        "sentinel": sentinel,
+        "os": probe.os_release().get("PRETTY_NAME"),
+        # Facts computed once and shared by every check of this run
+        "probes": probe.get_stats()
     }
     return meta
 
-def main():
-    args = parse_args()
-    
-    # Load environment variables
-    env_vars = load_env_file(args.env_file)
-    webhook_url = os.getenv('DISCORD_WEBHOOK_URL') or env_vars.get('DISCORD_WEBHOOK_URL')
-    
-    if not webhook_url:
-        print(f"{YELLOW}Warning: DISCORD_WEBHOOK_URL not set. Discord notifications will be skipped.{NC}")
-    
+def run_checks(args, allow_expensive=None, footprint=None):
+    """Run every check once, print the results and write the report. Returns (report, failure_count).
+
+    Results are streamed to output/latest_report.ndjson as each check completes.
+    Checks still running when the run deadline passes are reported as TIMEOUT
+    and checks that raise as ERROR, so a partial report is always written.
+    allow_expensive decides whether expensive checks run or are DEFERRED; with
+    None the leader schedule is asked once, when the first one comes up.
+    """
+    probe.begin_run()
+    set_expensive_allowed(allow_expensive)
+    deadline.start_run(args.run_timeout)
+    stream = report_writer.NdjsonWriter()
+    add_listener(stream)
     all_results = []
+    try:
+        config_results = config.run_config_checks()
+        all_results.extend(config_results)
+        
+        health_results = health.run_health_checks()
+        if args.skip_package_updates:
+            health_results = [r for r in health_results if r.name != "Package Updates Check"]
+            health_results.append(emit(placeholder(health.check_package_updates, Status.SKIPPED, "Package updates check skipped.")))
+        all_results.extend(health_results)
+        
+        security_results = security.run_security_checks(skip_fail2ban=args.skip_fail2ban, skip_ssh_check=args.skip_ssh_check)
+        all_results.extend(security_results)
+
+        # Runs last: it compares the metrics every other check just reported with their baselines
+        health_results.append(run_check(anomaly.check_metric_anomalies, all_results))
+        all_results.append(health_results[-1])
+    finally:
+        remove_listener(stream)
+
+    meta = gather_meta_data(footprint)
+    meta["deadline"] = {
+        "budget": args.run_timeout,
+        "timed_out": [r.name for r in all_results if r.status == Status.TIMEOUT],
+    }
+    # The stream keeps what the checks reported; results re-verified by --fix only go into the final report
+    stream.close(meta)
+
+    if args.fix:
+        fixed = fix_failures(all_results, assume_yes=args.yes, run_timeout=args.run_timeout)
+        for results in (config_results, health_results, security_results):
+            results[:] = [fixed.get(r.name, r) for r in results]
+        all_results = config_results + health_results + security_results
     
-    config_results = config.run_config_checks()
-    all_results.extend(config_results)
-    
-    health_results = health.run_health_checks()
-    if args.skip_package_updates:
-        health_results = [r for r in health_results if r["name"] != "Package Updates Check"]
-        health_results.append({"name": "Package Updates Check", "status": "SKIPPED", "message": "Package updates check skipped.", "category": "Health"})
-    all_results.extend(health_results)
-    
-    security_results = security.run_security_checks(skip_fail2ban=args.skip_fail2ban, skip_ssh_check=args.skip_ssh_check)
-    all_results.extend(security_results)
-    
-    failure_count = sum(1 for r in all_results if r["status"] == "FAIL")
+    failure_count = sum(1 for r in all_results if r.status in (Status.FAIL, Status.TIMEOUT, Status.ERROR))
     
     if not args.quiet:
         for r in all_results:
-            color = GREEN if r["status"] == "PASS" else RED if r["status"] == "FAIL" else YELLOW
-            print(f"{BLUE}{r['name']}: {color}{r['status']}{NC}")
-            print(f"    {r['message']}")
+            color = GREEN if r.status == Status.PASS else RED if r.status in (Status.FAIL, Status.TIMEOUT, Status.ERROR) else YELLOW
+            print(f"{BLUE}{r.name}: {color}{r.status}{NC}")
+            print(f"    {r.message}")
     
     print(f"\n{BLUE}Health check complete.{NC}")
     if failure_count == 0:
@@ -132,7 +179,7 @@ def main():
         print(f"{RED}{failure_count} check(s) failed.{NC}")
     
     report = {
-        "meta": gather_meta_data(),
+        "meta": meta,
         "results": {
             "config_results": config_results,
             "health_results": health_results,
@@ -140,14 +187,130 @@ def main():
         }
     }
     
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
-    report_path = os.path.join(output_dir, "latest_report.json")
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    report_writer.write_report(report)
+    return report, failure_count
+
+def fix_failures(results, assume_yes=False, run_timeout=deadline.RUN_BUDGET):
+    """Show the remediation plan for failed results, apply it once confirmed and return {check name: re-verified result}.
+
+    Runs after the checks' deadline and result stream are closed: the
+    re-verification gets a fresh run_timeout budget that starts once the
+    changes are applied, however long the confirmation prompt waited.
+    """
+    plan = remediate.build_plan(results)
+    if not plan:
+        print(f"{GREEN}Nothing to fix automatically.{NC}")
+        return {}
+    print(f"{BLUE}Remediation plan:{NC}")
+    print(remediate.render_diff(plan))
+    if os.geteuid() != 0:
+        print(f"{RED}--fix needs root to write /proc/sys and {remediate.SYSCTL_DROPIN}; nothing was changed.{NC}")
+        return {}
+    if not assume_yes and input("Apply these changes? [y/N] ").strip().lower() not in ("y", "yes"):
+        print(f"{YELLOW}No changes made.{NC}")
+        return {}
+    outcome = remediate.apply_plan(plan)
+    for error in outcome["errors"]:
+        print(f"{RED}    {error}{NC}")
+    print(f"{GREEN}Applied {len(outcome['applied'])} of {len(plan)} change(s) in {outcome['elapsed_ms']:.1f} ms.{NC}")
+    deadline.start_run(run_timeout)
+    return remediate.verify_plan(outcome["applied"])
+
+def status_signature(report):
+    """Return the set of (check, status) pairs that are not passing, used to detect changes between daemon runs."""
+    return frozenset(
+        (r.name, r.status)
+        for results in report["results"].values()
+        for r in results
+        if r.status not in (Status.PASS, Status.DEFERRED)
+    )
+
+def run_daemon(args, webhook_url, footprint=None):
+    """Repeat the checks every args.interval seconds, posting to Discord only when the outcome changes.
+
+    With --profile only the first cycle (and its post) is profiled, so later
+    cycles neither overwrite its files nor keep tracemalloc running.
+    """
+    pressure.start_monitor()
+    last_signature = None
+    try:
+        while True:
+            started = time.monotonic()
+            # Deferred checks simply run on a later cycle once the leader window has passed.
+            report, _ = run_checks(args, footprint=footprint)
+            signature = status_signature(report)
+            if webhook_url and signature != last_signature:
+                try:
+                    profiling.call("post_health_summary_to_discord", post_health_summary_to_discord, report, webhook_url)
+                except Exception as e:
+                    print(f"{RED}Error posting to Discord: {e}{NC}")
+            last_signature = signature
+            finish_profile()
+            time.sleep(max(0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pressure.stop_monitor()
+        finish_profile()
+
+def finish_profile():
+    """With --profile, print the slowest calls and where their profiles were written."""
+    summary = profiling.get_summary()
+    path = profiling.disable()
+    if path is None:
+        return
+    print(f"\n{BLUE}Profile (wall / cpu / waiting ms):{NC}")
+    for entry in summary[:10]:
+        print(f"    {entry['wall_ms']:9.1f} {entry['cpu_ms']:9.1f} {entry['wait_ms']:9.1f}  {entry['label']}")
+    print(f"Per-check .pstats, .folded and .alloc.txt files and {os.path.basename(path)} are in {os.path.dirname(path)}/")
+
+def accept_integrity(path):
+    """--accept-integrity: move the file integrity baseline of path (or of every file) to its current state."""
+    accepted = integrity.accept_changes(path or None)
+    for accepted_path in accepted:
+        print(f"{GREEN}Accepted:{NC} {accepted_path}")
+    if not accepted:
+        print(f"{YELLOW}Nothing to accept{' under ' + path if path else ''}: no tracked file differs from its baseline.{NC}")
+
+def main():
+    args = parse_args()
+    if args.accept_integrity is not None:
+        accept_integrity(args.accept_integrity)
+        return
+    
+    # Load environment variables
+    env_vars = load_env_file(args.env_file)
+    webhook_url = os.getenv('DISCORD_WEBHOOK_URL') or env_vars.get('DISCORD_WEBHOOK_URL')
+    # RPC, hugepage and frequency settings are read by the checks themselves; the environment wins over .env
+    for key in ("SOLANA_RPC_URL", "SOLANA_REFERENCE_RPC_URL", health.HUGEPAGES_ENV, health.FREQ_SHARE_ENV):
+        if key in env_vars:
+            os.environ.setdefault(key, env_vars[key])
+    
+    if not webhook_url:
+        print(f"{YELLOW}Warning: DISCORD_WEBHOOK_URL not set. Discord notifications will be skipped.{NC}")
+    
+    # Must happen before any thread or child process is started so they inherit it
+    footprint = isolation.apply_low_footprint(args.cpu_budget) if args.low_footprint else None
     
-    if webhook_url:
-        post_health_summary_to_discord(report, webhook_url)
+    if args.profile:
+        profiling.enable(sample_ms=args.profile_sample_ms)
+    
+    if args.daemon:
+        run_daemon(args, webhook_url, footprint)
+        return
+    
+    try:
+        # A one-shot run waits (bounded) for a gap in our leader schedule before the heavy probes.
+        report, failure_count = run_checks(args, allow_expensive=schedule.wait_for_safe_gap(), footprint=footprint)
+        
+        if webhook_url:
+            try:
+                profiling.call("post_health_summary_to_discord", post_health_summary_to_discord, report, webhook_url)
+            except Exception as e:
+                print(f"{RED}Error posting to Discord: {e}{NC}")
+    finally:
+        # Also when the run or the post is interrupted: that is when the profile matters most
+        finish_profile()
     sys.exit(0 if failure_count == 0 else 1)
 
 if __name__ == "__main__":